@@ -11,6 +11,12 @@ Demonstrates:
 - Task state machine: submitted -> working -> input-required (x3) -> completed
 - Push notification support via InMemoryPushNotificationConfigStore
 - In-memory session state keyed by task_id to track conversation step
+- Refusing a turn whose caller deadline (X-A2A-Timeout-Ms) has already expired
+- Prometheus metrics at GET /metrics (see shared/metrics.py)
+- Continuing the orchestrator's trace from the `traceparent` header
+  (spans at GET /traces, see shared/tracing.py)
+- Simulated work time and injected faults from BOOKING_AGENT_LATENCY etc.
+  (see shared/latency_profile.py)
 
 Run:
     python agents/booking_agent.py
@@ -18,7 +24,9 @@ Endpoint: http://localhost:8003
 """
 
 import logging
-from datetime import datetime, timezone
+import sys
+from contextlib import asynccontextmanager
+from pathlib import Path
 from uuid import uuid4
 
 import uvicorn
@@ -31,38 +39,29 @@ from a2a.types import (
     AgentCapabilities,
     AgentCard,
     AgentSkill,
-    Artifact,
-    DataPart,
-    Message,
-    Part,
-    Role,
-    TaskArtifactUpdateEvent,
     TaskState,
-    TaskStatus,
-    TaskStatusUpdateEvent,
-    TextPart,
 )
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from shared.card_endpoint import serve_cached_agent_card  # noqa: E402
+from shared.deadline import Deadline, DeadlineExceeded  # noqa: E402
+from shared.events import artifact_event, now, status_event  # noqa: E402
+from shared.latency_profile import InjectedFault, LatencyProfile, SimulatedWork  # noqa: E402
+from shared.metrics import ServiceMetrics  # noqa: E402
+from shared.recording import record_requests  # noqa: E402
+from shared.tracing import Tracer  # noqa: E402
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Simulated time per booking turn: none unless BOOKING_AGENT_LATENCY /
+# BOOKING_AGENT_WORK_DELAY etc. choose a profile (shared/latency_profile.py).
+WORK = SimulatedWork(LatencyProfile.from_env("BOOKING_AGENT"))
+
 # Resolve the input-required TaskState value safely
 INPUT_REQUIRED = next(s for s in TaskState if s.value == "input-required")
 
 
-def _now() -> str:
-    return datetime.now(timezone.utc).isoformat()
-
-
-def _agent_message(text: str) -> Message:
-    """Helper to create an agent Message containing a single TextPart."""
-    return Message(
-        message_id=str(uuid4()),
-        role=Role.agent,
-        parts=[Part(root=TextPart(text=text))],
-    )
-
-
 # ── In-memory session state ───────────────────────────────────────────────────
 # Keyed by task_id. Each session tracks conversation step and collected answers.
 #
@@ -95,26 +94,40 @@ class BookingAgentExecutor(AgentExecutor):
         task_id = context.task_id
         context_id = context.context_id
         user_input = context.get_user_input().strip()
+        deadline = Deadline.from_context(context)
 
-        # Section 4: submitted
-        await event_queue.enqueue_event(
-            TaskStatusUpdateEvent(
-                task_id=task_id,
-                context_id=context_id,
-                status=TaskStatus(state=TaskState.submitted, timestamp=_now()),
-                final=False,
+        # Section 10: skip work the caller is no longer waiting for
+        if deadline.expired():
+            logger.warning("[task %s] Skipped: caller deadline already exceeded", task_id)
+            await event_queue.enqueue_event(
+                status_event(
+                    task_id, context_id, TaskState.failed,
+                    "Deadline exceeded: booking step not started.",
+                    final=True,
+                )
             )
-        )
+            return
+
+        # Section 4: submitted
+        await event_queue.enqueue_event(status_event(task_id, context_id, TaskState.submitted))
 
         # Section 4: working
-        await event_queue.enqueue_event(
-            TaskStatusUpdateEvent(
-                task_id=task_id,
-                context_id=context_id,
-                status=TaskStatus(state=TaskState.working, timestamp=_now()),
-                final=False,
+        await event_queue.enqueue_event(status_event(task_id, context_id, TaskState.working))
+
+        try:
+            await WORK.step(deadline)  # simulate processing time
+        except (DeadlineExceeded, InjectedFault) as exc:
+            logger.warning("[task %s] Booking step abandoned: %s", task_id, exc)
+            await event_queue.enqueue_event(
+                status_event(
+                    task_id, context_id, TaskState.failed,
+                    "Deadline exceeded: booking step stopped early."
+                    if isinstance(exc, DeadlineExceeded)
+                    else f"Booking step failed: {exc}.",
+                    final=True,
+                )
             )
-        )
+            return
 
         session = booking_sessions.get(task_id)
 
@@ -125,17 +138,10 @@ class BookingAgentExecutor(AgentExecutor):
 
             # Section 7: Emit input-required — agent needs more info
             await event_queue.enqueue_event(
-                TaskStatusUpdateEvent(
-                    task_id=task_id,
-                    context_id=context_id,
-                    status=TaskStatus(
-                        state=INPUT_REQUIRED,
-                        timestamp=_now(),
-                        message=_agent_message(
-                            "What seat class would you prefer?\n"
-                            "Options: economy / business / first"
-                        ),
-                    ),
+                status_event(
+                    task_id, context_id, INPUT_REQUIRED,
+                    "What seat class would you prefer?\n"
+                    "Options: economy / business / first",
                     final=True,  # final=True ends this execution turn
                 )
             )
@@ -148,17 +154,10 @@ class BookingAgentExecutor(AgentExecutor):
             session["step"] = 2
 
             await event_queue.enqueue_event(
-                TaskStatusUpdateEvent(
-                    task_id=task_id,
-                    context_id=context_id,
-                    status=TaskStatus(
-                        state=INPUT_REQUIRED,
-                        timestamp=_now(),
-                        message=_agent_message(
-                            "What is your meal preference?\n"
-                            "Options: standard / vegetarian / vegan / halal / kosher"
-                        ),
-                    ),
+                status_event(
+                    task_id, context_id, INPUT_REQUIRED,
+                    "What is your meal preference?\n"
+                    "Options: standard / vegetarian / vegan / halal / kosher",
                     final=True,
                 )
             )
@@ -171,17 +170,10 @@ class BookingAgentExecutor(AgentExecutor):
             session["step"] = 3
 
             await event_queue.enqueue_event(
-                TaskStatusUpdateEvent(
-                    task_id=task_id,
-                    context_id=context_id,
-                    status=TaskStatus(
-                        state=INPUT_REQUIRED,
-                        timestamp=_now(),
-                        message=_agent_message(
-                            "Please provide your airline loyalty program number "
-                            "(or type 'none' to skip):"
-                        ),
-                    ),
+                status_event(
+                    task_id, context_id, INPUT_REQUIRED,
+                    "Please provide your airline loyalty program number "
+                    "(or type 'none' to skip):",
                     final=True,
                 )
             )
@@ -206,20 +198,15 @@ class BookingAgentExecutor(AgentExecutor):
                     f"Your {data.get('seat_class','economy')} seat with "
                     f"{data.get('meal_preference','standard')} meal has been reserved."
                 ),
-                "confirmed_at": _now(),
+                "confirmed_at": now(),
             }
 
             # Emit artifact with booking confirmation
             await event_queue.enqueue_event(
-                TaskArtifactUpdateEvent(
-                    task_id=task_id,
-                    context_id=context_id,
-                    artifact=Artifact(
-                        artifact_id=str(uuid4()),
-                        name="booking_confirmation",
-                        description="Booking confirmation details",
-                        parts=[Part(root=DataPart(data=confirmation))],
-                    ),
+                artifact_event(
+                    task_id, context_id, "booking_confirmation",
+                    data=confirmation,
+                    description="Booking confirmation details",
                     append=False,
                     last_chunk=True,
                 )
@@ -227,12 +214,7 @@ class BookingAgentExecutor(AgentExecutor):
 
             # Section 4: completed
             await event_queue.enqueue_event(
-                TaskStatusUpdateEvent(
-                    task_id=task_id,
-                    context_id=context_id,
-                    status=TaskStatus(state=TaskState.completed, timestamp=_now()),
-                    final=True,
-                )
+                status_event(task_id, context_id, TaskState.completed, final=True)
             )
 
             # Clean up session
@@ -244,12 +226,7 @@ class BookingAgentExecutor(AgentExecutor):
         # Clean up any in-progress session
         booking_sessions.pop(task_id, None)
         await event_queue.enqueue_event(
-            TaskStatusUpdateEvent(
-                task_id=task_id,
-                context_id=context.context_id,
-                status=TaskStatus(state=TaskState.canceled, timestamp=_now()),
-                final=True,
-            )
+            status_event(task_id, context.context_id, TaskState.canceled, final=True)
         )
 
 
@@ -294,13 +271,28 @@ def build_agent_card() -> AgentCard:
 
 def create_app():
     agent_card = build_agent_card()
+    metrics = ServiceMetrics("booking_agent")
+    tracer = Tracer.from_env("booking_agent")
+
+    @asynccontextmanager
+    async def lifespan(_app):
+        yield
+        tracer.close()
+
     handler = DefaultRequestHandler(
-        agent_executor=BookingAgentExecutor(),
+        agent_executor=metrics.instrument(tracer.instrument(BookingAgentExecutor())),
         task_store=InMemoryTaskStore(),
         # Section 8: Push notification store enables tasks/pushNotificationConfig/set
         push_config_store=InMemoryPushNotificationConfigStore(),
     )
-    return A2AFastAPIApplication(agent_card=agent_card, http_handler=handler).build()
+    app = A2AFastAPIApplication(agent_card=agent_card, http_handler=handler).build(
+        lifespan=lifespan
+    )
+    serve_cached_agent_card(app, agent_card)
+    metrics.install(app)
+    tracer.install(app)
+    record_requests(app, "booking")
+    return app
 
 
 app = create_app()
@@ -308,4 +300,5 @@ app = create_app()
 if __name__ == "__main__":
     logger.info("Starting Booking Agent on http://localhost:8003")
     logger.info("Supports: input-required multi-turn + push notifications")
+    logger.info("Simulated work: %s", WORK.profile.describe())
     uvicorn.run(app, host="0.0.0.0", port=8003, log_level="warning")
@@ -5,20 +5,57 @@ Section 2 (Agent Cards) + Section 5 (SSE Streaming) + Section 9 (Bearer Auth)
 
 Demonstrates:
 - AgentCard with skills, capabilities.streaming=True, Bearer security scheme
-- Streaming results via TaskArtifactUpdateEvent with append + last_chunk flags
+- Streaming results via TaskArtifactUpdateEvent with append + last_chunk flags,
+  all chunks of one artifact_id, optionally batched several results per chunk
+  (see shared/artifact_stream.py)
+- Searching an indexed inventory (shared/flight_inventory.py): the query is
+  parsed once into a FlightQuery (shared/flight_query.py) — route, dates,
+  cabin, price cap, stops, time of day, ordering — and compiled into a plan
+  that pushes what it can into the index; only the best matches are streamed
+- Structured queries: a DataPart with the same fields skips text parsing
+- Best-first streaming: results are computed lazily in rank order (a heap
+  merge across inventory shards, a heap top-K for "fastest"), so the first
+  chunk is the best answer and a client that cancels after N chunks stops
+  the search before the rest is computed
+- Multi-leg itineraries ("... with connections", "up to 2 stops") from a
+  top-K search over the route graph (shared/connections.py), streamed in rank
+  order
 - Bearer token validation from request headers
 - Task lifecycle: submitted -> working -> completed (or failed on bad auth)
+- Honouring the caller's deadline (X-A2A-Timeout-Ms): stops streaming and
+  fails the task once the budget is spent
+- Prometheus metrics at GET /metrics (see shared/metrics.py)
+- Continuing the orchestrator's trace from the `traceparent` header
+  (spans at GET /traces, see shared/tracing.py)
+- Simulated work time and injected faults from FLIGHT_AGENT_LATENCY etc.
+  (see shared/latency_profile.py)
 
 Run:
     python agents/flight_agent.py
 Endpoint: http://localhost:8001
 Auth:     Authorization: Bearer flight-secret-token
+
+Configuration (environment variables, all optional):
+    FLIGHT_AGENT_INVENTORY     .json / .jsonl file of flight segments, or
+                               synthetic:N[:SEED]   (default: the sample flights below);
+                               a comma-separated list makes one shard per source
+    FLIGHT_AGENT_MAX_RESULTS   flights / itineraries streamed per search (default 10)
+    FLIGHT_AGENT_MIN_CONNECTION_MINUTES, FLIGHT_AGENT_MAX_CONNECTION_HOURS,
+    FLIGHT_AGENT_MAX_STOPS, FLIGHT_AGENT_MAX_EXPANSIONS
+                               connection rules (see shared/connections.py)
+    FLIGHT_AGENT_QUERY_CACHE_SIZE
+                               parsed query texts kept (default 1024, 0 disables)
+    FLIGHT_AGENT_CHUNK_MAX_ITEMS, FLIGHT_AGENT_CHUNK_MAX_BYTES,
+    FLIGHT_AGENT_CHUNK_LINGER_MS
+                               results batched per chunk (default: one per chunk)
 """
 
-import asyncio
 import logging
-from datetime import datetime, timezone
-from uuid import uuid4
+import os
+import sys
+from contextlib import asynccontextmanager
+from itertools import chain
+from pathlib import Path
 
 import uvicorn
 from a2a.server.agent_execution import AgentExecutor, RequestContext
@@ -30,26 +67,40 @@ from a2a.types import (
     AgentCapabilities,
     AgentCard,
     AgentSkill,
-    Artifact,
     DataPart,
     HTTPAuthSecurityScheme,
-    Message,
-    Part,
-    Role,
-    TaskArtifactUpdateEvent,
     TaskState,
-    TaskStatus,
-    TaskStatusUpdateEvent,
-    TextPart,
 )
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from shared.artifact_stream import ArtifactStream, ChunkPolicy  # noqa: E402
+from shared.card_endpoint import serve_cached_agent_card  # noqa: E402
+from shared.connections import SORT_KEYS as CONNECTION_SORTS, ConnectionRules, RouteGraph  # noqa: E402
+from shared.deadline import Deadline, DeadlineExceeded  # noqa: E402
+from shared.events import status_event  # noqa: E402
+from shared.flight_inventory import FlightInventory, ShardedInventory, load_shards  # noqa: E402
+from shared.flight_query import FlightQuery, QueryParser  # noqa: E402
+from shared.latency_profile import InjectedFault, LatencyProfile, SimulatedWork  # noqa: E402
+from shared.metrics import ServiceMetrics  # noqa: E402
+from shared.recording import record_requests  # noqa: E402
+from shared.tracing import Tracer  # noqa: E402
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 # ── Auth ──────────────────────────────────────────────────────────────────────
 VALID_TOKEN = "flight-secret-token"
 
-# ── Mock flight data ──────────────────────────────────────────────────────────
+# Simulated search time per flight: 0.5 s unless FLIGHT_AGENT_LATENCY /
+# FLIGHT_AGENT_WORK_DELAY etc. choose another profile (shared/latency_profile.py).
+WORK = SimulatedWork(LatencyProfile.from_env("FLIGHT_AGENT", LatencyProfile(delay=0.5)))
+
+# One flight / itinerary per chunk unless FLIGHT_AGENT_CHUNK_MAX_ITEMS etc.
+# batch them (shared/artifact_stream.py).
+CHUNKS = ChunkPolicy.from_env("FLIGHT_AGENT")
+
+# ── Sample flight inventory ───────────────────────────────────────────────────
+# Three flights per route on 2026-03-15; FLIGHT_AGENT_INVENTORY replaces them.
 MOCK_FLIGHTS = [
     {
         "flight_id": "FL001",
@@ -90,11 +141,147 @@ MOCK_FLIGHTS = [
         "seats_available": 22,
         "class": "economy",
     },
+    {
+        "flight_id": "FL004",
+        "airline": "Virgin Atlantic",
+        "iata_code": "VS4",
+        "origin": "JFK",
+        "destination": "LHR",
+        "departure": "2026-03-15T19:00:00Z",
+        "arrival": "2026-03-16T02:00:00Z",
+        "duration_h": 7.0,
+        "price_usd": 695,
+        "seats_available": 9,
+        "class": "economy",
+    },
+    {
+        "flight_id": "FL005",
+        "airline": "Delta Air Lines",
+        "iata_code": "DL264",
+        "origin": "JFK",
+        "destination": "CDG",
+        "departure": "2026-03-15T17:45:00Z",
+        "arrival": "2026-03-16T01:15:00Z",
+        "duration_h": 7.5,
+        "price_usd": 840,
+        "seats_available": 17,
+        "class": "economy",
+    },
+    {
+        "flight_id": "FL006",
+        "airline": "Air France",
+        "iata_code": "AF011",
+        "origin": "JFK",
+        "destination": "CDG",
+        "departure": "2026-03-15T10:30:00Z",
+        "arrival": "2026-03-15T18:00:00Z",
+        "duration_h": 7.5,
+        "price_usd": 1010,
+        "seats_available": 4,
+        "class": "economy",
+    },
+    {
+        "flight_id": "FL007",
+        "airline": "Japan Airlines",
+        "iata_code": "JL5",
+        "origin": "JFK",
+        "destination": "HND",
+        "departure": "2026-03-15T13:25:00Z",
+        "arrival": "2026-03-16T03:40:00Z",
+        "duration_h": 14.25,
+        "price_usd": 1480,
+        "seats_available": 11,
+        "class": "economy",
+    },
+    {
+        "flight_id": "FL008",
+        "airline": "ANA",
+        "iata_code": "NH9",
+        "origin": "JFK",
+        "destination": "HND",
+        "departure": "2026-03-15T16:30:00Z",
+        "arrival": "2026-03-16T06:45:00Z",
+        "duration_h": 14.25,
+        "price_usd": 1320,
+        "seats_available": 8,
+        "class": "economy",
+    },
+    {
+        "flight_id": "FL009",
+        "airline": "American Airlines",
+        "iata_code": "AA167",
+        "origin": "JFK",
+        "destination": "HND",
+        "departure": "2026-03-15T10:50:00Z",
+        "arrival": "2026-03-16T01:20:00Z",
+        "duration_h": 14.5,
+        "price_usd": 1395,
+        "seats_available": 19,
+        "class": "economy",
+    },
+    {
+        "flight_id": "FL010",
+        "airline": "British Airways",
+        "iata_code": "BA304",
+        "origin": "LHR",
+        "destination": "CDG",
+        "departure": "2026-03-15T06:30:00Z",
+        "arrival": "2026-03-15T07:45:00Z",
+        "duration_h": 1.25,
+        "price_usd": 145,
+        "seats_available": 31,
+        "class": "economy",
+    },
+    {
+        "flight_id": "FL011",
+        "airline": "Air France",
+        "iata_code": "AF1081",
+        "origin": "LHR",
+        "destination": "CDG",
+        "departure": "2026-03-15T09:15:00Z",
+        "arrival": "2026-03-15T10:30:00Z",
+        "duration_h": 1.25,
+        "price_usd": 168,
+        "seats_available": 12,
+        "class": "economy",
+    },
+    {
+        "flight_id": "FL012",
+        "airline": "British Airways",
+        "iata_code": "BA318",
+        "origin": "LHR",
+        "destination": "CDG",
+        "departure": "2026-03-15T21:10:00Z",
+        "arrival": "2026-03-15T22:25:00Z",
+        "duration_h": 1.25,
+        "price_usd": 132,
+        "seats_available": 25,
+        "class": "economy",
+    },
 ]
 
+_source = os.getenv("FLIGHT_AGENT_INVENTORY")
+_shards = load_shards(_source) if _source else [MOCK_FLIGHTS]
+if len(_shards) == 1:
+    INVENTORY = FlightInventory(_shards[0])
+else:
+    INVENTORY = ShardedInventory(map(FlightInventory, _shards))
+ROUTES = RouteGraph(chain.from_iterable(_shards), ConnectionRules.from_env("FLIGHT_AGENT"))
+QUERIES = QueryParser.from_env("FLIGHT_AGENT", airports=INVENTORY.airports)
+MAX_RESULTS = int(os.getenv("FLIGHT_AGENT_MAX_RESULTS", "10"))
 
-def _now() -> str:
-    return datetime.now(timezone.utc).isoformat()
+
+# How a direct-flight artifact is ordered, by FlightQuery.sort.
+_FIRST = {"departure": "earliest", "duration": "shortest"}
+
+
+def _read_query(context: RequestContext) -> FlightQuery:
+    """A DataPart with explicit search fields wins over the message text."""
+    if context.message:
+        for part in context.message.parts:
+            if isinstance(part.root, DataPart):
+                return QUERIES.from_data(part.root.data)
+    return QUERIES.parse(context.get_user_input())
 
 
 # ── Agent Executor ────────────────────────────────────────────────────────────
@@ -103,9 +290,17 @@ class FlightAgentExecutor(AgentExecutor):
     Handles flight search tasks.
 
     Section 5 — Streaming:
-        Each flight is emitted as a separate TaskArtifactUpdateEvent chunk.
-        The first chunk has append=False; subsequent chunks have append=True.
-        The final chunk has last_chunk=True.
+        The query (text, or a DataPart of search fields) becomes a
+        FlightQuery whose plan reads INVENTORY; at most MAX_RESULTS flights
+        are streamed, cheapest first unless the query asks otherwise.
+        Queries asking for connections ("with up to 2 stops", "fastest
+        connection") search ROUTES instead and stream ranked itineraries.
+        Each result is emitted as a TaskArtifactUpdateEvent chunk (or, with
+        a batching CHUNKS policy, several results share one chunk's parts).
+        The results form one artifact (flight_results, or flight_itineraries
+        for a connection search): the first chunk has append=False, later chunks
+        append=True, and the chunk holding the last result has last_chunk=True.
+        It is the only artifact this agent streams.
 
     Section 9 — Bearer Auth:
         Reads the Authorization header from the request context and validates
@@ -127,91 +322,111 @@ class FlightAgentExecutor(AgentExecutor):
         if token != VALID_TOKEN:
             logger.warning("Unauthorized request to flight agent")
             await event_queue.enqueue_event(
-                TaskStatusUpdateEvent(
-                    task_id=task_id,
-                    context_id=context_id,
-                    status=TaskStatus(
-                        state=TaskState.failed,
-                        timestamp=_now(),
-                        message=Message(
-                            message_id=str(uuid4()),
-                            role=Role.agent,
-                            parts=[
-                                Part(
-                                    root=TextPart(
-                                        text="Unauthorized: invalid or missing Bearer token. "
-                                        "Use 'Authorization: Bearer flight-secret-token'."
-                                    )
-                                )
-                            ],
-                        ),
-                    ),
+                status_event(
+                    task_id, context_id, TaskState.failed,
+                    "Unauthorized: invalid or missing Bearer token. "
+                    "Use 'Authorization: Bearer flight-secret-token'.",
                     final=True,
                 )
             )
             return
 
         # ── Section 4: submitted ───────────────────────────────────────────────
-        await event_queue.enqueue_event(
-            TaskStatusUpdateEvent(
-                task_id=task_id,
-                context_id=context_id,
-                status=TaskStatus(state=TaskState.submitted, timestamp=_now()),
-                final=False,
-            )
-        )
+        await event_queue.enqueue_event(status_event(task_id, context_id, TaskState.submitted))
 
         # ── Section 4: working ────────────────────────────────────────────────
-        await event_queue.enqueue_event(
-            TaskStatusUpdateEvent(
-                task_id=task_id,
-                context_id=context_id,
-                status=TaskStatus(state=TaskState.working, timestamp=_now()),
-                final=False,
-            )
-        )
+        await event_queue.enqueue_event(status_event(task_id, context_id, TaskState.working))
 
-        user_query = context.get_user_input()
-        logger.info("Flight search query: %s", user_query)
+        deadline = Deadline.from_context(context)
+        try:
+            query = _read_query(context)
+        except ValueError as exc:
+            await event_queue.enqueue_event(
+                status_event(
+                    task_id, context_id, TaskState.failed,
+                    f"Invalid flight query: {exc}", final=True,
+                )
+            )
+            return
 
-        # ── Section 5: Stream one flight at a time ────────────────────────────
-        for i, flight in enumerate(MOCK_FLIGHTS):
-            await asyncio.sleep(0.5)  # simulate work per flight
-            is_last = i == len(MOCK_FLIGHTS) - 1
+        origin, destination, date = query.origin, query.destination, query.date
+        if destination is None:
+            await event_queue.enqueue_event(
+                status_event(
+                    task_id, context_id, TaskState.completed,
+                    "No route found in the query. Try 'Find flights from New York to "
+                    "London on 2026-03-15'.",
+                    final=True,
+                )
+            )
+            return
+        limit = min(query.limit or MAX_RESULTS, MAX_RESULTS)
+        if query.connections:
+            sort = query.sort if query.sort in CONNECTION_SORTS else "price"
+            results = ROUTES.connections(
+                origin, destination, date, sort=sort, limit=limit,
+                max_stops=query.max_stops, max_price=query.max_price,
+                where=query.plan.predicate,
+            )
+            name = "flight_itineraries"
+            description = f"Itineraries {origin} to {destination}, best {sort} first"
+            logger.info("Connection search: %s-%s %s, best %s first", origin, destination,
+                        date or "every day", sort)
+        else:
+            logger.info("Flight search: %s", query.plan.describe())
+            results = query.plan.run(INVENTORY, limit)
+            name = "flight_results"
+            first = _FIRST.get(query.sort, "cheapest")
+            description = f"Flights {origin} to {destination}, {first} first"
+
+        # ── Section 5: Stream results best first, batched per CHUNKS ─────────
+        # A result is added once the next one is known, so the chunk holding
+        # the last result can carry last_chunk=True.
+        stream = ArtifactStream(event_queue, task_id, context_id, name, CHUNKS, description=description)
+        try:
+            async with stream:
+                result = next(results, None)
+                while result is not None:
+                    await WORK.step(deadline)  # simulate work per result
+                    following = next(results, None)
+                    await stream.add(result, last=following is None)
+                    result = following
+        except (DeadlineExceeded, InjectedFault) as exc:
+            logger.warning("Flight search abandoned: %s", exc)
+            await event_queue.enqueue_event(
+                status_event(
+                    task_id, context_id, TaskState.failed,
+                    "Deadline exceeded: flight search stopped early."
+                    if isinstance(exc, DeadlineExceeded)
+                    else f"Flight search failed: {exc}.",
+                    final=True,
+                )
+            )
+            return
+        if query.connections and results.truncated:
+            logger.warning("Connection search %s-%s hit its expansion budget", origin, destination)
 
+        if stream.items == 0:
+            on_date = f" on {date}" if date else ""
             await event_queue.enqueue_event(
-                TaskArtifactUpdateEvent(
-                    task_id=task_id,
-                    context_id=context_id,
-                    artifact=Artifact(
-                        artifact_id=str(uuid4()),
-                        name="flight_results",
-                        description="Streaming flight search results",
-                        parts=[Part(root=DataPart(data=flight))],
-                    ),
-                    append=(i > 0),       # first chunk: append=False
-                    last_chunk=is_last,   # last chunk signals stream end
+                status_event(
+                    task_id, context_id, TaskState.completed,
+                    f"No flights from {origin} to {destination}{on_date}.",
+                    final=True,
                 )
             )
+            return
 
         # ── Section 4: completed ──────────────────────────────────────────────
         await event_queue.enqueue_event(
-            TaskStatusUpdateEvent(
-                task_id=task_id,
-                context_id=context_id,
-                status=TaskStatus(state=TaskState.completed, timestamp=_now()),
-                final=True,
-            )
+            status_event(task_id, context_id, TaskState.completed, final=True)
         )
 
     async def cancel(self, context: RequestContext, event_queue: EventQueue) -> None:
+        # The handler also cancels execute(); results not yet streamed are never computed.
+        logger.info("Flight search %s canceled", context.task_id)
         await event_queue.enqueue_event(
-            TaskStatusUpdateEvent(
-                task_id=context.task_id,
-                context_id=context.context_id,
-                status=TaskStatus(state=TaskState.canceled, timestamp=_now()),
-                final=True,
-            )
+            status_event(context.task_id, context.context_id, TaskState.canceled, final=True)
         )
 
 
@@ -226,6 +441,9 @@ def build_agent_card() -> AgentCard:
     - What it can do (skills with inputModes/outputModes)
     - What protocol features it supports (capabilities)
     - How to authenticate (security_schemes)
+
+    create_app() serves it pre-serialized with an ETag and Cache-Control
+    (shared/card_endpoint.py), so repeated discovery returns 304.
     """
     return AgentCard(
         name="Flight Search Agent",
@@ -256,13 +474,32 @@ def build_agent_card() -> AgentCard:
                 name="Search Flights",
                 description=(
                     "Search for available flights given origin, destination, "
-                    "and travel date. Returns results as a streaming artifact."
+                    "and travel date, optionally filtered by cabin, price, stops "
+                    "and departure time. Accepts text or a DataPart of the same "
+                    "fields. Returns results as a streaming artifact."
                 ),
                 tags=["flights", "travel", "search"],
                 examples=[
                     "Find flights from New York to London on 2026-03-15",
-                    "Search flights LHR to CDG tomorrow",
-                    "Cheap flights NYC to PAR next week",
+                    "Search flights LHR-CDG morning, earliest first",
+                    "Business class flights NYC to Paris Mar 15 to Mar 18 under $2,000",
+                ],
+                input_modes=["text/plain", "application/json"],
+                output_modes=["application/json"],
+            ),
+            AgentSkill(
+                id="search_connections",
+                name="Search Connecting Itineraries",
+                description=(
+                    "Search multi-leg itineraries with up to two stops, ranked by "
+                    "price, total duration or number of stops, respecting minimum "
+                    "connection times. Returns ranked itineraries as a streaming artifact."
+                ),
+                tags=["flights", "travel", "search", "connections"],
+                examples=[
+                    "Find flights from New York to Paris with connections on 2026-03-15",
+                    "Fastest connection from JFK to SYD with up to 2 stops",
+                    "Fewest stops from London to Tokyo",
                 ],
                 input_modes=["text/plain"],
                 output_modes=["application/json"],
@@ -283,11 +520,26 @@ def build_agent_card() -> AgentCard:
 # ── App factory ───────────────────────────────────────────────────────────────
 def create_app():
     agent_card = build_agent_card()
+    metrics = ServiceMetrics("flight_agent")
+    tracer = Tracer.from_env("flight_agent")
+
+    @asynccontextmanager
+    async def lifespan(_app):
+        yield
+        tracer.close()
+
     handler = DefaultRequestHandler(
-        agent_executor=FlightAgentExecutor(),
+        agent_executor=metrics.instrument(tracer.instrument(FlightAgentExecutor())),
         task_store=InMemoryTaskStore(),
     )
-    return A2AFastAPIApplication(agent_card=agent_card, http_handler=handler).build()
+    app = A2AFastAPIApplication(agent_card=agent_card, http_handler=handler).build(
+        lifespan=lifespan
+    )
+    serve_cached_agent_card(app, agent_card)
+    metrics.install(app)
+    tracer.install(app)
+    record_requests(app, "flight")
+    return app
 
 
 app = create_app()
@@ -295,4 +547,7 @@ app = create_app()
 if __name__ == "__main__":
     logger.info("Starting Flight Agent on http://localhost:8001")
     logger.info("Auth: Authorization: Bearer %s", VALID_TOKEN)
+    logger.info("Simulated work: %s", WORK.profile.describe())
+    logger.info("Artifact chunks: %s", CHUNKS.describe())
+    logger.info("Inventory: %d flights on %d routes", len(INVENTORY), len(INVENTORY.routes()))
     uvicorn.run(app, host="0.0.0.0", port=8001, log_level="warning")
@@ -10,6 +10,12 @@ Demonstrates:
 - DataPart output: returning structured JSON data as Artifacts
 - TextPart + FilePart in the same message (multimodal request)
 - API key validation from X-Api-Key request header
+- Refusing work whose caller deadline (X-A2A-Timeout-Ms) has already expired
+- Prometheus metrics at GET /metrics (see shared/metrics.py)
+- Continuing the orchestrator's trace from the `traceparent` header
+  (spans at GET /traces, see shared/tracing.py)
+- Simulated work time and injected faults from HOTEL_AGENT_LATENCY etc.
+  (see shared/latency_profile.py)
 
 Run:
     python agents/hotel_agent.py
@@ -19,8 +25,9 @@ Auth:     X-Api-Key: hotel-api-key-12345
 
 import base64
 import logging
-from datetime import datetime, timezone
-from uuid import uuid4
+import sys
+from contextlib import asynccontextmanager
+from pathlib import Path
 
 import uvicorn
 from a2a.server.agent_execution import AgentExecutor, RequestContext
@@ -33,28 +40,28 @@ from a2a.types import (
     AgentCapabilities,
     AgentCard,
     AgentSkill,
-    Artifact,
-    DataPart,
     FilePart,
     In,
-    Message,
-    Part,
-    Role,
-    TaskArtifactUpdateEvent,
     TaskState,
-    TaskStatus,
-    TaskStatusUpdateEvent,
-    TextPart,
 )
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from shared.card_endpoint import serve_cached_agent_card  # noqa: E402
+from shared.deadline import Deadline, DeadlineExceeded  # noqa: E402
+from shared.events import artifact_event, status_event  # noqa: E402
+from shared.latency_profile import InjectedFault, LatencyProfile, SimulatedWork  # noqa: E402
+from shared.metrics import ServiceMetrics  # noqa: E402
+from shared.recording import record_requests  # noqa: E402
+from shared.tracing import Tracer  # noqa: E402
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 API_KEY = "hotel-api-key-12345"
 
-
-def _now() -> str:
-    return datetime.now(timezone.utc).isoformat()
+# Simulated search time: none unless HOTEL_AGENT_LATENCY / HOTEL_AGENT_WORK_DELAY
+# etc. choose a profile (shared/latency_profile.py).
+WORK = SimulatedWork(LatencyProfile.from_env("HOTEL_AGENT"))
 
 
 # ── Mock hotel data ───────────────────────────────────────────────────────────
@@ -139,6 +146,7 @@ class HotelAgentExecutor(AgentExecutor):
     async def execute(self, context: RequestContext, event_queue: EventQueue) -> None:
         task_id = context.task_id
         context_id = context.context_id
+        deadline = Deadline.from_context(context)
 
         # ── Section 9: Validate API key ────────────────────────────────────────
         headers: dict = {}
@@ -149,49 +157,47 @@ class HotelAgentExecutor(AgentExecutor):
         if provided_key != API_KEY:
             logger.warning("Unauthorized request to hotel agent (bad API key)")
             await event_queue.enqueue_event(
-                TaskStatusUpdateEvent(
-                    task_id=task_id,
-                    context_id=context_id,
-                    status=TaskStatus(
-                        state=TaskState.failed,
-                        timestamp=_now(),
-                        message=Message(
-                            message_id=str(uuid4()),
-                            role=Role.agent,
-                            parts=[
-                                Part(
-                                    root=TextPart(
-                                        text="Unauthorized: invalid or missing API key. "
-                                        "Add header 'X-Api-Key: hotel-api-key-12345'."
-                                    )
-                                )
-                            ],
-                        ),
-                    ),
+                status_event(
+                    task_id, context_id, TaskState.failed,
+                    "Unauthorized: invalid or missing API key. "
+                    "Add header 'X-Api-Key: hotel-api-key-12345'.",
                     final=True,
                 )
             )
             return
 
-        # ── Section 4: submitted ───────────────────────────────────────────────
-        await event_queue.enqueue_event(
-            TaskStatusUpdateEvent(
-                task_id=task_id,
-                context_id=context_id,
-                status=TaskStatus(state=TaskState.submitted, timestamp=_now()),
-                final=False,
+        # ── Section 10: Skip work the caller is no longer waiting for ─────────
+        if deadline.expired():
+            logger.warning("Hotel search skipped: caller deadline already exceeded")
+            await event_queue.enqueue_event(
+                status_event(
+                    task_id, context_id, TaskState.failed,
+                    "Deadline exceeded: hotel search not started.",
+                    final=True,
+                )
             )
-        )
+            return
+
+        # ── Section 4: submitted ───────────────────────────────────────────────
+        await event_queue.enqueue_event(status_event(task_id, context_id, TaskState.submitted))
 
         # ── Section 4: working ────────────────────────────────────────────────
-        await event_queue.enqueue_event(
-            TaskStatusUpdateEvent(
-                task_id=task_id,
-                context_id=context_id,
-                status=TaskStatus(state=TaskState.working, timestamp=_now()),
-                final=False,
+        await event_queue.enqueue_event(status_event(task_id, context_id, TaskState.working))
+
+        try:
+            await WORK.step(deadline)  # simulate search time
+        except (DeadlineExceeded, InjectedFault) as exc:
+            logger.warning("Hotel search abandoned: %s", exc)
+            await event_queue.enqueue_event(
+                status_event(
+                    task_id, context_id, TaskState.failed,
+                    "Deadline exceeded: hotel search stopped early."
+                    if isinstance(exc, DeadlineExceeded)
+                    else f"Hotel search failed: {exc}.",
+                    final=True,
+                )
             )
-        )
+            return
 
         # ── Section 6: Check for FilePart (PDF brochure) ──────────────────────
         result_data = None
@@ -230,15 +236,10 @@ class HotelAgentExecutor(AgentExecutor):
 
         # ── Emit artifact (DataPart) ──────────────────────────────────────────
         await event_queue.enqueue_event(
-            TaskArtifactUpdateEvent(
-                task_id=task_id,
-                context_id=context_id,
-                artifact=Artifact(
-                    artifact_id=str(uuid4()),
-                    name=artifact_name,
-                    description="Hotel search results or brochure extraction",
-                    parts=[Part(root=DataPart(data=result_data))],
-                ),
+            artifact_event(
+                task_id, context_id, artifact_name,
+                data=result_data,
+                description="Hotel search results or brochure extraction",
                 append=False,
                 last_chunk=True,
             )
@@ -246,22 +247,12 @@ class HotelAgentExecutor(AgentExecutor):
 
         # ── Section 4: completed ──────────────────────────────────────────────
         await event_queue.enqueue_event(
-            TaskStatusUpdateEvent(
-                task_id=task_id,
-                context_id=context_id,
-                status=TaskStatus(state=TaskState.completed, timestamp=_now()),
-                final=True,
-            )
+            status_event(task_id, context_id, TaskState.completed, final=True)
         )
 
     async def cancel(self, context: RequestContext, event_queue: EventQueue) -> None:
         await event_queue.enqueue_event(
-            TaskStatusUpdateEvent(
-                task_id=context.task_id,
-                context_id=context.context_id,
-                status=TaskStatus(state=TaskState.canceled, timestamp=_now()),
-                final=True,
-            )
+            status_event(context.task_id, context.context_id, TaskState.canceled, final=True)
         )
 
 
@@ -319,11 +310,26 @@ def build_agent_card() -> AgentCard:
 
 def create_app():
     agent_card = build_agent_card()
+    metrics = ServiceMetrics("hotel_agent")
+    tracer = Tracer.from_env("hotel_agent")
+
+    @asynccontextmanager
+    async def lifespan(_app):
+        yield
+        tracer.close()
+
     handler = DefaultRequestHandler(
-        agent_executor=HotelAgentExecutor(),
+        agent_executor=metrics.instrument(tracer.instrument(HotelAgentExecutor())),
         task_store=InMemoryTaskStore(),
     )
-    return A2AFastAPIApplication(agent_card=agent_card, http_handler=handler).build()
+    app = A2AFastAPIApplication(agent_card=agent_card, http_handler=handler).build(
+        lifespan=lifespan
+    )
+    serve_cached_agent_card(app, agent_card)
+    metrics.install(app)
+    tracer.install(app)
+    record_requests(app, "hotel")
+    return app
 
 
 app = create_app()
@@ -331,4 +337,5 @@ app = create_app()
 if __name__ == "__main__":
     logger.info("Starting Hotel Agent on http://localhost:8002")
     logger.info("Auth: X-Api-Key: %s", API_KEY)
+    logger.info("Simulated work: %s", WORK.profile.describe())
     uvicorn.run(app, host="0.0.0.0", port=8002, log_level="warning")
@@ -8,17 +8,32 @@ Demonstrates:
 - Streaming a 7-day forecast via TaskArtifactUpdateEvent chunks
 - append=True to signal the client that chunks belong to the same artifact
 - last_chunk=True to signal the stream is complete
+- One artifact_id for every chunk, and optional batching of several days per
+  chunk (see shared/artifact_stream.py)
 - No authentication (public agent)
+- Honouring the caller's deadline (X-A2A-Timeout-Ms): stops streaming and
+  fails the task once the budget is spent
+- Prometheus metrics at GET /metrics (see shared/metrics.py)
+- Continuing the orchestrator's trace from the `traceparent` header
+  (spans at GET /traces, see shared/tracing.py)
+- Simulated work time and injected faults from WEATHER_AGENT_LATENCY etc.
+  (see shared/latency_profile.py)
 
 Run:
     python agents/weather_agent.py
 Endpoint: http://localhost:8004
+
+Configuration (environment variables, all optional):
+    WEATHER_AGENT_CHUNK_MAX_ITEMS, WEATHER_AGENT_CHUNK_MAX_BYTES,
+    WEATHER_AGENT_CHUNK_LINGER_MS
+                               forecast days batched per chunk (default: one per chunk)
 """
 
-import asyncio
 import logging
+import sys
+from contextlib import asynccontextmanager
 from datetime import datetime, timedelta, timezone
-from uuid import uuid4
+from pathlib import Path
 
 import uvicorn
 from a2a.server.agent_execution import AgentExecutor, RequestContext
@@ -30,21 +45,30 @@ from a2a.types import (
     AgentCapabilities,
     AgentCard,
     AgentSkill,
-    Artifact,
-    DataPart,
-    Part,
-    TaskArtifactUpdateEvent,
     TaskState,
-    TaskStatus,
-    TaskStatusUpdateEvent,
 )
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from shared.artifact_stream import ArtifactStream, ChunkPolicy  # noqa: E402
+from shared.card_endpoint import serve_cached_agent_card  # noqa: E402
+from shared.deadline import Deadline, DeadlineExceeded  # noqa: E402
+from shared.events import status_event  # noqa: E402
+from shared.latency_profile import InjectedFault, LatencyProfile, SimulatedWork  # noqa: E402
+from shared.metrics import ServiceMetrics  # noqa: E402
+from shared.recording import record_requests  # noqa: E402
+from shared.tracing import Tracer  # noqa: E402
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Simulated computation time per forecast day: 0.3 s unless
+# WEATHER_AGENT_LATENCY / WEATHER_AGENT_WORK_DELAY etc. choose another profile
+# (shared/latency_profile.py).
+WORK = SimulatedWork(LatencyProfile.from_env("WEATHER_AGENT", LatencyProfile(delay=0.3)))
 
-def _now() -> str:
-    return datetime.now(timezone.utc).isoformat()
+# One forecast day per chunk unless WEATHER_AGENT_CHUNK_MAX_ITEMS etc. batch
+# them (shared/artifact_stream.py).
+CHUNKS = ChunkPolicy.from_env("WEATHER_AGENT")
 
 
 # ── Mock weather data generator ───────────────────────────────────────────────
@@ -86,8 +110,9 @@ class WeatherAgentExecutor(AgentExecutor):
     Handles weather forecast tasks.
 
     Section 5 — Streaming:
-        Emits one TaskArtifactUpdateEvent per day of the forecast.
-        Uses append=True for days 2-7 and last_chunk=True for day 7.
+        Emits one TaskArtifactUpdateEvent per day of the forecast (or per
+        batch of days, see CHUNKS). Uses append=True for every chunk after the
+        first and last_chunk=True for the chunk holding day 7.
     """
 
     async def execute(self, context: RequestContext, event_queue: EventQueue) -> None:
@@ -95,24 +120,10 @@ class WeatherAgentExecutor(AgentExecutor):
         context_id = context.context_id
 
         # Section 4: submitted
-        await event_queue.enqueue_event(
-            TaskStatusUpdateEvent(
-                task_id=task_id,
-                context_id=context_id,
-                status=TaskStatus(state=TaskState.submitted, timestamp=_now()),
-                final=False,
-            )
-        )
+        await event_queue.enqueue_event(status_event(task_id, context_id, TaskState.submitted))
 
         # Section 4: working
-        await event_queue.enqueue_event(
-            TaskStatusUpdateEvent(
-                task_id=task_id,
-                context_id=context_id,
-                status=TaskStatus(state=TaskState.working, timestamp=_now()),
-                final=False,
-            )
-        )
+        await event_queue.enqueue_event(status_event(task_id, context_id, TaskState.working))
 
         # Parse city from user input
         user_input = context.get_user_input().strip()
@@ -128,45 +139,40 @@ class WeatherAgentExecutor(AgentExecutor):
 
         logger.info("Generating 7-day forecast for: %s", city)
         forecast = _generate_forecast(city)
-
-        # Section 5: Stream one day at a time
-        for i, day in enumerate(forecast):
-            await asyncio.sleep(0.3)  # simulate per-day computation
-            is_last = i == len(forecast) - 1
-
+        deadline = Deadline.from_context(context)
+
+        # Section 5: Stream one day at a time (or batches of days, per CHUNKS)
+        try:
+            async with ArtifactStream(
+                event_queue, task_id, context_id, "weather_forecast", CHUNKS,
+                description=f"7-day weather forecast for {city}",
+            ) as stream:
+                for i, day in enumerate(forecast):
+                    await WORK.step(deadline)  # simulate per-day computation
+                    # The first chunk opens the artifact (append=False), later ones
+                    # append to it; the one holding the final day has last_chunk=True.
+                    await stream.add(day, last=i == len(forecast) - 1)
+        except (DeadlineExceeded, InjectedFault) as exc:
+            logger.warning("Forecast for %s abandoned: %s", city, exc)
             await event_queue.enqueue_event(
-                TaskArtifactUpdateEvent(
-                    task_id=task_id,
-                    context_id=context_id,
-                    artifact=Artifact(
-                        artifact_id=str(uuid4()),
-                        name="weather_forecast",
-                        description=f"7-day weather forecast for {city}",
-                        parts=[Part(root=DataPart(data=day))],
-                    ),
-                    append=(i > 0),     # True for days 2–7 (same logical artifact)
-                    last_chunk=is_last, # True only for the final day
+                status_event(
+                    task_id, context_id, TaskState.failed,
+                    "Deadline exceeded: forecast stopped early."
+                    if isinstance(exc, DeadlineExceeded)
+                    else f"Forecast failed: {exc}.",
+                    final=True,
                 )
             )
+            return
 
         # Section 4: completed
         await event_queue.enqueue_event(
-            TaskStatusUpdateEvent(
-                task_id=task_id,
-                context_id=context_id,
-                status=TaskStatus(state=TaskState.completed, timestamp=_now()),
-                final=True,
-            )
+            status_event(task_id, context_id, TaskState.completed, final=True)
         )
 
     async def cancel(self, context: RequestContext, event_queue: EventQueue) -> None:
         await event_queue.enqueue_event(
-            TaskStatusUpdateEvent(
-                task_id=context.task_id,
-                context_id=context.context_id,
-                status=TaskStatus(state=TaskState.canceled, timestamp=_now()),
-                final=True,
-            )
+            status_event(context.task_id, context.context_id, TaskState.canceled, final=True)
         )
 
 
@@ -206,15 +212,32 @@ def build_agent_card() -> AgentCard:
 
 def create_app():
     agent_card = build_agent_card()
+    metrics = ServiceMetrics("weather_agent")
+    tracer = Tracer.from_env("weather_agent")
+
+    @asynccontextmanager
+    async def lifespan(_app):
+        yield
+        tracer.close()
+
     handler = DefaultRequestHandler(
-        agent_executor=WeatherAgentExecutor(),
+        agent_executor=metrics.instrument(tracer.instrument(WeatherAgentExecutor())),
         task_store=InMemoryTaskStore(),
     )
-    return A2AFastAPIApplication(agent_card=agent_card, http_handler=handler).build()
+    app = A2AFastAPIApplication(agent_card=agent_card, http_handler=handler).build(
+        lifespan=lifespan
+    )
+    serve_cached_agent_card(app, agent_card)
+    metrics.install(app)
+    tracer.install(app)
+    record_requests(app, "weather")
+    return app
 
 
 app = create_app()
 
 if __name__ == "__main__":
     logger.info("Starting Weather Agent on http://localhost:8004")
+    logger.info("Simulated work: %s", WORK.profile.describe())
+    logger.info("Artifact chunks: %s", CHUNKS.describe())
     uvicorn.run(app, host="0.0.0.0", port=8004, log_level="warning")
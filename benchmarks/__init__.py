@@ -0,0 +1,9 @@
+"""
+benchmarks/
+===========
+Load, replay and micro-benchmark tools for the agent mesh.
+
+Scripts are run directly (``python benchmarks/load.py`` etc.) and put the
+repository root on ``sys.path``, like the agents do, so they can import
+``shared.<module>`` and each other as ``benchmarks.<module>``.
+"""
@@ -0,0 +1,212 @@
+"""
+benchmarks/chunking.py
+======================
+Chunk coalescing for SSE artifact streams: the Flight Agent's results sent
+one per TaskArtifactUpdateEvent, or batched several per chunk
+(shared/artifact_stream.py).
+
+Demonstrates:
+- The Flight Agent served by uvicorn on a loopback port (in this process,
+  on this event loop) over a synthetic inventory with its simulated work
+  off, streaming `--results` flights per task through message/stream: the
+  SDK's event queue, task manager (which appends every chunk to the task's
+  artifact), JSON-RPC envelope, SSE framing and HTTP are all measured.
+  httpx.ASGITransport is not used because it buffers the whole response,
+  which would hide time to the first flight
+- One run per batching policy, given as items[:bytes[:linger_ms]]
+- Per policy: SSE events and artifact chunks per task, bytes on the wire per
+  task and per flight, tasks/s, events/s, flights/s and time to the first
+  flight
+- A check that every policy delivers the same flights in the same order
+- --delay-ms puts simulated work back in (per flight), to show what
+  max_items alone does to time to the first flight and what linger gives back
+
+Run:
+    python benchmarks/chunking.py
+    python benchmarks/chunking.py --results 500 --policies 1 10 100 100:32768
+    python benchmarks/chunking.py --delay-ms 20 --tasks 5 --policies 1 20 20:0:100
+"""
+
+import argparse
+import asyncio
+import gc
+import importlib.util
+import json
+import logging
+import os
+import socket
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from types import ModuleType
+
+import httpx
+import uvicorn
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+from shared.artifact_stream import ChunkPolicy  # noqa: E402
+from shared.latency import LatencyHistogram, format_table  # noqa: E402
+from shared.latency_profile import LatencyProfile, SimulatedWork  # noqa: E402
+
+HEADERS = {"Authorization": "Bearer flight-secret-token"}
+
+
+def parse_policy(text: str) -> ChunkPolicy:
+    """items[:bytes[:linger_ms]], e.g. "50", "50:16384", "50:0:20"."""
+    items, max_bytes, linger_ms = (text.split(":") + ["0", "0"])[:3]
+    return ChunkPolicy(max_items=int(items), max_bytes=int(max_bytes), max_linger=float(linger_ms) / 1000)
+
+
+def load_flight_agent(inventory: int, results: int) -> ModuleType:
+    """Import agents/flight_agent.py over a synthetic inventory."""
+    os.environ["FLIGHT_AGENT_INVENTORY"] = f"synthetic:{inventory}"
+    os.environ["FLIGHT_AGENT_MAX_RESULTS"] = str(results)
+    spec = importlib.util.spec_from_file_location("flight_agent", ROOT / "agents/flight_agent.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def request(text: str, n: int) -> dict:
+    message = {"role": "user", "messageId": f"m{n}", "parts": [{"kind": "text", "text": text}]}
+    return {"jsonrpc": "2.0", "id": str(n), "method": "message/stream", "params": {"message": message}}
+
+
+async def stream_task(client: httpx.AsyncClient, text: str, n: int) -> dict:
+    """One message/stream task: what arrived, how many bytes, how soon."""
+    start = time.perf_counter()
+    task = {"events": 0, "chunks": 0, "bytes": 0, "first_s": None, "flights": []}
+    buffer = b""
+    async with client.stream("POST", "/", json=request(text, n), headers=HEADERS) as response:
+        async for raw in response.aiter_bytes():
+            task["bytes"] += len(raw)
+            buffer += raw
+            *frames, buffer = buffer.replace(b"\r\n", b"\n").split(b"\n\n")
+            for frame in frames:
+                if not frame.startswith(b"data:"):
+                    continue
+                task["events"] += 1
+                result = json.loads(frame[5:])["result"]
+                if result.get("kind") != "artifact-update":
+                    continue
+                task["chunks"] += 1
+                if task["first_s"] is None:
+                    task["first_s"] = time.perf_counter() - start
+                task["flights"].extend(part["data"]["flight_id"] for part in result["artifact"]["parts"])
+    return task
+
+
+async def bench_policy(
+    client: httpx.AsyncClient, module: ModuleType, policy: ChunkPolicy, queries: list[str]
+) -> dict:
+    module.CHUNKS = policy
+    first = LatencyHistogram()
+    totals = {"events": 0, "chunks": 0, "bytes": 0, "flights": 0}
+    order = []
+    await stream_task(client, queries[0], 0)  # warm-up
+    start = time.perf_counter()
+    for n, text in enumerate(queries, 1):
+        task = await stream_task(client, text, n)
+        if task["first_s"] is not None:
+            first.record(task["first_s"])
+        for key in ("events", "chunks", "bytes"):
+            totals[key] += task[key]
+        totals["flights"] += len(task["flights"])
+        order.append(task["flights"])
+    elapsed = time.perf_counter() - start
+    tasks = len(queries)
+    return {
+        "policy": policy.describe(),
+        "events_per_task": round(totals["events"] / tasks, 1),
+        "chunks_per_task": round(totals["chunks"] / tasks, 1),
+        "bytes_per_task": round(totals["bytes"] / tasks),
+        "bytes_per_flight": round(totals["bytes"] / max(totals["flights"], 1), 1),
+        "tasks_per_s": round(tasks / elapsed, 1),
+        "events_per_s": round(totals["events"] / elapsed),
+        "flights_per_s": round(totals["flights"] / elapsed),
+        "first_flight": first.summary(),
+        "order": order,
+    }
+
+
+async def run(module: ModuleType, policies: dict[str, ChunkPolicy], queries: list[str]) -> dict:
+    """Serve the agent on a free loopback port and run every policy against it."""
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    server = uvicorn.Server(uvicorn.Config(module.app, host="127.0.0.1", port=port, log_level="warning"))
+    serving = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.01)
+    results = {}
+    try:
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", timeout=120) as client:
+            for text, policy in policies.items():
+                print(f"  policy {text} ({policy.describe()}) ...", flush=True)
+                results[text] = await bench_policy(client, module, policy, queries)
+    finally:
+        server.should_exit = True
+        await serving
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark batched vs per-result artifact chunks.")
+    parser.add_argument("--policies", nargs="+", default=["1", "10", "50", "50:8192", "50:0:50"],
+                        help="batching policies as items[:bytes[:linger_ms]]")
+    parser.add_argument("--results", type=int, default=200, help="flights streamed per task")
+    parser.add_argument("--tasks", type=int, default=30, help="tasks per policy")
+    parser.add_argument("--inventory", type=int, default=300_000, help="synthetic inventory size")
+    parser.add_argument("--delay-ms", type=float, default=0.0,
+                        help="simulated work per flight (default 0: off)")
+    parser.add_argument("--json", type=Path, help="write the report to this file")
+    args = parser.parse_args()
+    policies = {text: parse_policy(text) for text in args.policies}
+
+    logging.disable(logging.WARNING)
+    print(f"  loading {args.inventory:,} synthetic flights ...", flush=True)
+    module = load_flight_agent(args.inventory, args.results)
+    gc.freeze()  # keep the inventory out of the collections timed below
+    profile = LatencyProfile(delay=args.delay_ms / 1000) if args.delay_ms else LatencyProfile.off()
+    module.WORK = SimulatedWork(profile)
+    routes = sorted(module.INVENTORY.routes())
+    queries = [
+        f"top {args.results} flights from {origin} to {destination}"
+        for origin, destination in routes[: args.tasks]
+    ]
+
+    results = asyncio.run(run(module, policies, queries))
+    baseline = results[args.policies[0]]["order"]
+    for r in results.values():
+        r["mismatches"] = sum(a != b for a, b in zip(r.pop("order"), baseline))
+
+    print(format_table({text: r["first_flight"] for text, r in results.items()},
+                       "\nTime to first flight (ms)"))
+    print(f"\nThroughput ({args.results} flights per task, {args.tasks} tasks)")
+    print(f"  {'policy':<12} {'events':>7} {'chunks':>7} {'KiB/task':>9} {'B/flight':>9} "
+          f"{'tasks/s':>8} {'events/s':>9} {'flights/s':>10} {'mismatch':>9}")
+    for text, r in results.items():
+        print(f"  {text:<12} {r['events_per_task']:>7} {r['chunks_per_task']:>7} "
+              f"{r['bytes_per_task'] / 1024:>9.1f} {r['bytes_per_flight']:>9} {r['tasks_per_s']:>8} "
+              f"{r['events_per_s']:>9} {r['flights_per_s']:>10} {r['mismatches']:>9}")
+
+    if args.json:
+        report = {
+            "tool": "benchmarks/chunking.py",
+            "started_at": datetime.now(timezone.utc).isoformat(),
+            "config": {
+                "results": args.results,
+                "tasks": args.tasks,
+                "inventory": args.inventory,
+                "delay_ms": args.delay_ms,
+            },
+            "policies": results,
+        }
+        args.json.write_text(json.dumps(report, indent=2, sort_keys=True) + "\n")
+        print(f"\nReport written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,376 @@
+"""
+benchmarks/executors.py
+=======================
+In-process benchmarks for the agent executors — no HTTP server, no sockets.
+
+Demonstrates:
+- Calling each AgentExecutor.execute() directly with a synthetic
+  RequestContext (headers in call_context.state, where the SDK's
+  DefaultCallContextBuilder puts them) and an event queue
+- Turning the agents' simulated work off (their latency profiles, see
+  shared/latency_profile.py), so the numbers are executor cost rather than
+  sleep time; --with-delays keeps the profiles configured in the environment
+- Tasks/s, events/s, time per event and per-task latency percentiles
+- Allocation cost per task: tracemalloc peak, bytes still held after the
+  task (e.g. per-task session state), gen-0 garbage collections
+- Pydantic overhead: building, validating and serializing the event models
+  the executors emit, next to model_construct() and the status templates
+  and coarse clock in shared/events.py, per event and per flight task
+
+The orchestrator needs its agents, so it is measured with its pooled clients
+routed to the agents' ASGI apps in-process (httpx.ASGITransport): its numbers
+include the agents and JSON-RPC (de)serialization, but no network. Its result
+cache is disabled so every task does the full fan-out.
+
+Run:
+    python benchmarks/executors.py                                  # all, delays off
+    python benchmarks/executors.py --executor flight --tasks 5000 --concurrency 50
+    python benchmarks/executors.py --with-delays --tasks 10
+    python benchmarks/executors.py --sdk-queue --json executors.json
+"""
+
+import argparse
+import asyncio
+import gc
+import importlib.util
+import json
+import logging
+import sys
+import time
+import timeit
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+from types import ModuleType
+from uuid import uuid4
+
+import httpx
+from a2a.server.agent_execution import AgentExecutor, RequestContext
+from a2a.server.context import ServerCallContext
+from a2a.server.events import EventQueue
+from a2a.types import (
+    Artifact,
+    DataPart,
+    Message,
+    MessageSendParams,
+    Part,
+    Role,
+    TaskArtifactUpdateEvent,
+    TaskState,
+    TaskStatus,
+    TaskStatusUpdateEvent,
+    TextPart,
+)
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+from shared import events  # noqa: E402
+from shared.http_pool import AgentHTTPPool  # noqa: E402
+from shared.latency import LatencyHistogram, format_table  # noqa: E402
+from shared.latency_profile import LatencyProfile, SimulatedWork  # noqa: E402
+from shared.result_cache import ResultCache  # noqa: E402
+
+AGENTS = {
+    "flight": ("agents/flight_agent.py", "FlightAgentExecutor"),
+    "hotel": ("agents/hotel_agent.py", "HotelAgentExecutor"),
+    "weather": ("agents/weather_agent.py", "WeatherAgentExecutor"),
+    "booking": ("agents/booking_agent.py", "BookingAgentExecutor"),
+}
+EXECUTORS = (*AGENTS, "orchestrator")
+REQUESTS = {
+    "flight": ("Find flights from New York to Paris", {"authorization": "Bearer flight-secret-token"}),
+    "hotel": ("Hotels in Paris", {"x-api-key": "hotel-api-key-12345"}),
+    "weather": ("Weather forecast for Paris", {}),
+    "booking": ("Book a trip to Paris", {}),
+    "orchestrator": ("Plan a trip to Paris", {}),
+}
+# Rounds of --model-ops operations per pydantic micro-benchmark; the best one is reported.
+MODEL_REPEATS = 5
+
+
+def load_script(relative: str) -> ModuleType:
+    """Import an entry-point script (agents/*.py are not a package) as a module."""
+    name = Path(relative).stem
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.spec_from_file_location(name, ROOT / relative)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def make_context(name: str) -> RequestContext:
+    text, headers = REQUESTS[name]
+    message = Message(message_id=uuid4().hex, role=Role.user, parts=[Part(root=TextPart(text=text))])
+    return RequestContext(
+        request=MessageSendParams(message=message),
+        call_context=ServerCallContext(state={"headers": dict(headers)}),
+    )
+
+
+class _CountingSink:
+    """Stands in for EventQueue: counts events and drops them."""
+
+    def __init__(self) -> None:
+        self.events = 0
+
+    async def enqueue_event(self, event) -> None:
+        self.events += 1
+
+
+async def _execute(executor: AgentExecutor, name: str, sdk_queue: bool) -> int:
+    """Run one task; returns the number of events it produced."""
+    if not sdk_queue:
+        sink = _CountingSink()
+        await executor.execute(make_context(name), sink)
+        return sink.events
+    queue = EventQueue()
+    await executor.execute(make_context(name), queue)
+    events = 0
+    while True:
+        try:
+            await queue.dequeue_event(no_wait=True)
+        except asyncio.QueueEmpty:
+            break
+        queue.task_done()
+        events += 1
+    await queue.close()
+    return events
+
+
+async def bench_executor(
+    name: str, executor: AgentExecutor, tasks: int, concurrency: int, sdk_queue: bool
+) -> dict:
+    """Throughput and latency over `tasks` executions, then an allocation pass."""
+    await _execute(executor, name, sdk_queue)  # warm caches and lazy imports
+    latency = LatencyHistogram()
+    events = 0
+    remaining = tasks
+
+    async def worker() -> None:
+        nonlocal events, remaining
+        while remaining > 0:
+            remaining -= 1
+            started = time.perf_counter()
+            produced = await _execute(executor, name, sdk_queue)
+            events += produced
+            latency.record(time.perf_counter() - started)
+
+    gc.collect()
+    gen0 = gc.get_stats()[0]["collections"]
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    gen0 = gc.get_stats()[0]["collections"] - gen0
+
+    # Allocation pass: sequential, traced (tracemalloc slows everything down).
+    sample = min(tasks, 200)
+    gc.collect()
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    tracemalloc.reset_peak()
+    for _ in range(sample):
+        await _execute(executor, name, sdk_queue)
+    gc.collect()
+    after, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "tasks": tasks,
+        "concurrency": concurrency,
+        "events": events,
+        "elapsed_s": round(elapsed, 4),
+        "tasks_per_s": round(tasks / elapsed, 1),
+        "events_per_s": round(events / elapsed, 1),
+        "us_per_event": round(elapsed / events * 1e6, 2) if events else None,
+        "latency": latency.summary(),
+        "gc_gen0_per_1k_tasks": round(gen0 * 1000 / tasks, 2),
+        "peak_kib": round((peak - before) / 1024, 1),
+        "retained_bytes_per_task": round((after - before) / sample),
+    }
+
+
+# ── Pydantic overhead ─────────────────────────────────────────────────────────
+def bench_models(number: int) -> dict[str, float]:
+    """
+    Nanoseconds per operation for the event models the executors emit: the
+    best of MODEL_REPEATS rounds of `number` operations, so one noisy round
+    does not decide a comparison.
+    """
+    flight = load_script(AGENTS["flight"][0]).MOCK_FLIGHTS[0]
+    ts = datetime.now(timezone.utc).isoformat()
+
+    def status_event() -> TaskStatusUpdateEvent:
+        return TaskStatusUpdateEvent(
+            task_id="t", context_id="c",
+            status=TaskStatus(state=TaskState.working, timestamp=ts), final=False,
+        )
+
+    def status_event_construct() -> TaskStatusUpdateEvent:
+        return TaskStatusUpdateEvent.model_construct(
+            task_id="t", context_id="c",
+            status=TaskStatus.model_construct(state=TaskState.working, timestamp=ts), final=False,
+        )
+
+    def artifact_event() -> TaskArtifactUpdateEvent:
+        return TaskArtifactUpdateEvent(
+            task_id="t", context_id="c",
+            artifact=Artifact(artifact_id="a", name="flight_results",
+                              parts=[Part(root=DataPart(data=flight))]),
+            append=True, last_chunk=False,
+        )
+
+    def artifact_event_construct() -> TaskArtifactUpdateEvent:
+        return TaskArtifactUpdateEvent.model_construct(
+            task_id="t", context_id="c",
+            artifact=Artifact.model_construct(
+                artifact_id="a", name="flight_results",
+                parts=[Part.model_construct(root=DataPart.model_construct(data=flight))],
+            ),
+            append=True, last_chunk=False,
+        )
+
+    def flight_task_validated() -> None:
+        # What a flight task emitted before shared/events.py: validated
+        # models and a fresh datetime.now().isoformat() per status.
+        for state in (TaskState.submitted, TaskState.working):
+            TaskStatusUpdateEvent(
+                task_id="t", context_id="c", final=False,
+                status=TaskStatus(state=state, timestamp=datetime.now(timezone.utc).isoformat()),
+            )
+        for i in range(3):
+            TaskArtifactUpdateEvent(
+                task_id="t", context_id="c",
+                artifact=Artifact(artifact_id=str(uuid4()), name="flight_results",
+                                  parts=[Part(root=DataPart(data=flight))]),
+                append=i > 0, last_chunk=i == 2,
+            )
+        TaskStatusUpdateEvent(
+            task_id="t", context_id="c", final=True,
+            status=TaskStatus(state=TaskState.completed, timestamp=datetime.now(timezone.utc).isoformat()),
+        )
+
+    def flight_task_factory() -> None:
+        for state in (TaskState.submitted, TaskState.working):
+            events.status_event("t", "c", state)
+        for i in range(3):
+            events.artifact_event("t", "c", "flight_results", data=flight,
+                                  append=i > 0, last_chunk=i == 2)
+        events.status_event("t", "c", TaskState.completed, final=True)
+
+    built = artifact_event()
+    as_dict = built.model_dump(mode="json", by_alias=True, exclude_none=True)
+    cases = {
+        "timestamp: datetime.now().isoformat()": lambda: datetime.now(timezone.utc).isoformat(),
+        "timestamp: shared.events.now()": events.now,
+        "status event: constructor": status_event,
+        "status event: model_construct": status_event_construct,
+        "status event: shared.events": lambda: events.status_event("t", "c", TaskState.working),
+        "artifact event: constructor": artifact_event,
+        "artifact event: model_construct": artifact_event_construct,
+        "artifact event: shared.events": lambda: events.artifact_event(
+            "t", "c", "flight_results", data=flight, artifact_id="a", append=True, last_chunk=False
+        ),
+        "artifact event: model_validate(dict)": lambda: TaskArtifactUpdateEvent.model_validate(as_dict),
+        "artifact event: model_dump_json": lambda: built.model_dump_json(by_alias=True, exclude_none=True),
+        "flight task (6 events): constructors": flight_task_validated,
+        "flight task (6 events): shared.events": flight_task_factory,
+    }
+    return {
+        label: round(min(timeit.repeat(case, number=number, repeat=MODEL_REPEATS)) / number * 1e9, 1)
+        for label, case in cases.items()
+    }
+
+
+# ── Setup ─────────────────────────────────────────────────────────────────────
+def build_executors(names: list[str], with_delays: bool) -> dict[str, AgentExecutor]:
+    modules = {name: load_script(path) for name, (path, _) in AGENTS.items()}
+    if not with_delays:
+        for module in modules.values():
+            module.WORK = SimulatedWork(LatencyProfile.off())
+    executors: dict[str, AgentExecutor] = {
+        name: getattr(modules[name], AGENTS[name][1])() for name in names if name in AGENTS
+    }
+    if "orchestrator" in names:
+        orchestrator = load_script("orchestrator/travel_orchestrator.py")
+        transports = {
+            url: httpx.ASGITransport(app=modules[agent].app)
+            for agent, urls in orchestrator.AGENT_URLS.items()
+            for url in urls
+        }
+        executors["orchestrator"] = orchestrator.TravelOrchestratorExecutor(
+            http_pool=AgentHTTPPool(transports=transports),
+            result_cache=ResultCache(max_bytes=0),
+        )
+    return executors
+
+
+async def run(args: argparse.Namespace) -> dict:
+    names = args.executor or list(EXECUTORS)
+    executors = build_executors(names, args.with_delays)
+    results = {}
+    for name in names:
+        print(f"  {name} ...", flush=True)
+        results[name] = await bench_executor(
+            name, executors[name], args.tasks, args.concurrency, args.sdk_queue
+        )
+    if "orchestrator" in executors:
+        await executors["orchestrator"].shutdown()
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the agent executors in-process.")
+    parser.add_argument("--executor", action="append", choices=EXECUTORS,
+                        help="executor to benchmark (repeatable; default all)")
+    parser.add_argument("--tasks", type=int, default=500, help="tasks per executor")
+    parser.add_argument("--concurrency", type=int, default=1, help="tasks in flight at once")
+    parser.add_argument("--with-delays", action="store_true",
+                        help="keep the agents' latency profiles (*_AGENT_LATENCY etc.)")
+    parser.add_argument("--sdk-queue", action="store_true",
+                        help="use the SDK's EventQueue instead of a counting sink")
+    parser.add_argument("--model-ops", type=int, default=20_000,
+                        help="iterations per round of each pydantic micro-benchmark (0 skips them)")
+    parser.add_argument("--json", type=Path, help="write the report to this file")
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)  # the agents log every request
+    print(f"Benchmarking executors: {args.tasks} tasks, concurrency {args.concurrency}, "
+          f"delays {'on' if args.with_delays else 'off'}, "
+          f"{'SDK EventQueue' if args.sdk_queue else 'counting sink'}")
+    results = asyncio.run(run(args))
+    models = bench_models(args.model_ops) if args.model_ops else {}
+
+    print(format_table({name: r["latency"] for name, r in results.items()}, "\nTask latency (ms)"))
+    print("\nThroughput and allocations")
+    print(f"  {'':<12} {'tasks/s':>9} {'events/s':>10} {'us/event':>9} "
+          f"{'peak KiB':>9} {'kept B/task':>12} {'gc0/1k':>8}")
+    for name, r in results.items():
+        print(f"  {name:<12} {r['tasks_per_s']:>9} {r['events_per_s']:>10} {r['us_per_event']:>9} "
+              f"{r['peak_kib']:>9} {r['retained_bytes_per_task']:>12} {r['gc_gen0_per_1k_tasks']:>8}")
+    if models:
+        print("\nPydantic event models (ns/op)")
+        for label, ns in models.items():
+            print(f"  {label:<40} {ns:>10,.0f}")
+
+    if args.json:
+        report = {
+            "tool": "benchmarks/executors.py",
+            "started_at": datetime.now(timezone.utc).isoformat(),
+            "config": {
+                "tasks": args.tasks,
+                "concurrency": args.concurrency,
+                "with_delays": args.with_delays,
+                "sdk_queue": args.sdk_queue,
+                "model_ops": args.model_ops,
+            },
+            "executors": results,
+            "models_ns_per_op": models,
+        }
+        args.json.write_text(json.dumps(report, indent=2, sort_keys=True) + "\n")
+        print(f"\nReport written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,304 @@
+"""
+benchmarks/inventory.py
+=======================
+Flight search latency over the indexed inventory (shared/flight_inventory.py)
+against a full-table scan, and multi-leg connection search latency over the
+route graph (shared/connections.py), at 10k, 100k and 1M segments.
+
+Demonstrates:
+- A deterministic synthetic inventory per size (same seed, same segments)
+- Index build time and the memory the index adds on top of the segments
+  (tracemalloc, skipped with --no-memory since it slows the build down)
+- Lookup latency percentiles for the searches the Flight Agent runs:
+    route+date   cheapest `--limit` flights on one day
+    window       one day, departing in a 3-hour window, earliest first
+    under $      one day, at most $600, cheapest first
+    any day      cheapest `--limit` flights on the route across all days
+  next to the scan the agent used to do: walk every segment, filter, sort
+- A cross-check that the index returns the same prices as the scan
+- The same inventory split into `--shards` shards and searched through a
+  heap merge: latency of the whole top-`--limit` and of the first (best)
+  result, cross-checked against the single index (--shards 1 skips it)
+- Top-`--limit` itineraries with up to two stops between random airports,
+  ranked by price, by duration and by fewest stops: latency percentiles,
+  graph build time, nodes expanded per search and searches that hit the
+  expansion budget (--connection-queries 0 skips them)
+- Query parsing (shared/flight_query.py): free-text queries parsed with the
+  cache off and on, and the compiled plan run against the index
+  (--parser-queries 0 skips them)
+
+Run:
+    python benchmarks/inventory.py
+    python benchmarks/inventory.py --sizes 100000 --queries 20000 --json inventory.json
+"""
+
+import argparse
+import json
+import random
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta, timezone
+from itertools import islice
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+from shared.connections import SORT_KEYS, RouteGraph  # noqa: E402
+from shared.flight_inventory import FlightInventory, ShardedInventory, generate_inventory  # noqa: E402
+from shared.flight_query import QueryParser  # noqa: E402
+from shared.latency import LatencyHistogram, format_table  # noqa: E402
+
+QUERY_KINDS = ("route+date", "window", "under $", "any day")
+QUERY_TEMPLATES = (
+    "Find flights from {origin} to {destination} on {date}",
+    "cheapest flights {origin}-{destination} {date} under $900",
+    "top 5 flights from {origin} to {destination} on {date}, morning, earliest first",
+    "business class flights from {origin} to {destination} {date} to {last}",
+    "nonstop flights from {origin} to {destination} on {date}",
+    "fastest flights from {origin} to {destination}",
+)
+
+
+def scan(segments: list[dict], origin: str, destination: str, date: str | None, limit: int) -> list[dict]:
+    """The baseline: every segment is looked at for every search."""
+    matches = [
+        s for s in segments
+        if s["origin"] == origin and s["destination"] == destination
+        and (date is None or s["departure"].startswith(date))
+    ]
+    matches.sort(key=lambda s: s["price_usd"])
+    return matches[:limit]
+
+
+def make_queries(inventory: FlightInventory, count: int, seed: int) -> list[tuple[str, str, str]]:
+    """(origin, destination, date) triples for routes that exist; 5% fall outside the dates."""
+    rng = random.Random(seed)
+    routes = inventory.routes()
+    first_day = datetime(2026, 3, 15)  # generate_inventory()'s default start
+    queries = []
+    for _ in range(count):
+        origin, destination = rng.choice(routes)
+        day = first_day + timedelta(days=rng.randrange(30) if rng.random() > 0.05 else 60)
+        queries.append((origin, destination, day.strftime("%Y-%m-%d")))
+    return queries
+
+
+def run_kind(inventory: FlightInventory, kind: str, queries: list, limit: int) -> LatencyHistogram:
+    histogram = LatencyHistogram()
+    clock = time.perf_counter
+    for origin, destination, date in queries:
+        start = clock()
+        if kind == "route+date":
+            inventory.search(origin, destination, date, limit=limit)
+        elif kind == "window":
+            inventory.search(origin, destination, date, sort="departure", limit=limit,
+                             depart_after=f"{date}T09:00", depart_before=f"{date}T12:00")
+        elif kind == "under $":
+            inventory.search(origin, destination, date, limit=limit, max_price=600)
+        else:
+            inventory.search(origin, destination, limit=limit)
+        histogram.record(clock() - start)
+    return histogram
+
+
+def bench_shards(
+    segments: list[dict], inventory: FlightInventory, queries: list, shards: int, limit: int
+) -> dict:
+    """Top-`limit` and first-result latency over `shards` shards, checked against `inventory`."""
+    start = time.perf_counter()
+    sharded = ShardedInventory(FlightInventory(segments[n::shards]) for n in range(shards))
+    result = {"shards": shards, "build_s": round(time.perf_counter() - start, 3), "mismatches": 0}
+    histograms = {
+        f"{shards} shards": run_kind(sharded, "route+date", queries, limit),
+        f"{shards} shards any": run_kind(sharded, "any day", queries, limit),
+    }
+    first = LatencyHistogram()
+    clock = time.perf_counter
+    for origin, destination, _ in queries:
+        start = clock()
+        next(sharded.iter_search(origin, destination), None)
+        first.record(clock() - start)
+    histograms[f"{shards} shards 1st"] = first
+    for origin, destination, date in queries:
+        for day in (date, None):
+            expected = inventory.search(origin, destination, day, limit=limit)
+            found = sharded.search(origin, destination, day, limit=limit)
+            if [s["price_usd"] for s in found] != [s["price_usd"] for s in expected]:
+                result["mismatches"] += 1
+    result["latency"] = {kind: histogram.summary() for kind, histogram in histograms.items()}
+    return result
+
+
+def bench_connections(segments: list[dict], queries: list, limit: int) -> dict:
+    start = time.perf_counter()
+    graph = RouteGraph(segments)
+    result = {"build_s": round(time.perf_counter() - start, 3), "latency": {}, "expanded": {}}
+    for sort in SORT_KEYS:
+        histogram, expanded, truncated = LatencyHistogram(), 0, 0
+        for origin, destination, date in queries:
+            start = time.perf_counter()
+            search = graph.connections(origin, destination, date, sort=sort, limit=limit, max_stops=2)
+            for _ in search:
+                pass
+            histogram.record(time.perf_counter() - start)
+            expanded += search.expanded
+            truncated += search.truncated
+        result["latency"][f"2-stop {sort}"] = histogram.summary()
+        result["expanded"][sort] = round(expanded / len(queries), 1)
+        result.setdefault("truncated", 0)
+        result["truncated"] += truncated
+    return result
+
+
+def bench_parser(inventory: FlightInventory, queries: list, limit: int) -> dict:
+    """Parse each text twice (cold, then cached) and run the plans it compiles to."""
+    texts = [
+        QUERY_TEMPLATES[n % len(QUERY_TEMPLATES)].format(
+            origin=origin, destination=destination, date=date, last=f"{date[:8]}{int(date[8:]) % 28 + 1:02d}"
+        )
+        for n, (origin, destination, date) in enumerate(queries)
+    ]
+    histograms = {"parse (cold)": LatencyHistogram(), "parse (cached)": LatencyHistogram()}
+    cold = QueryParser(airports=inventory.airports, cache_size=0)
+    cached = QueryParser(airports=inventory.airports, cache_size=len(texts))
+    for text in texts:
+        cached.parse(text)
+    clock = time.perf_counter
+    for parser, histogram in zip((cold, cached), histograms.values()):
+        for text in texts:
+            start = clock()
+            parser.parse(text)
+            histogram.record(clock() - start)
+    plans = LatencyHistogram()
+    for text in texts:
+        query = cached.parse(text)
+        start = clock()
+        for _ in islice(query.plan.run(inventory), limit):
+            pass
+        plans.record(clock() - start)
+    histograms["plan + run"] = plans
+    return {kind: histogram.summary() for kind, histogram in histograms.items()}
+
+
+def bench_size(size: int, args: argparse.Namespace) -> dict:
+    segments = generate_inventory(size, seed=args.seed)
+    start = time.perf_counter()
+    inventory = FlightInventory(segments)
+    build_s = time.perf_counter() - start
+    result = {"segments": size, "build_s": round(build_s, 3), **inventory.stats()}
+
+    if args.memory:
+        tracemalloc.start()
+        FlightInventory(segments)  # measured copy; the timed one is kept
+        result["index_mib"] = round(tracemalloc.get_traced_memory()[1] / 2**20, 1)
+        tracemalloc.stop()
+
+    queries = make_queries(inventory, args.queries, args.seed)
+    histograms = {kind: run_kind(inventory, kind, queries, args.limit) for kind in QUERY_KINDS}
+
+    scan_histogram, mismatches = LatencyHistogram(), 0
+    for origin, destination, date in queries[: args.scan_queries]:
+        start = time.perf_counter()
+        expected = scan(segments, origin, destination, date, args.limit)
+        scan_histogram.record(time.perf_counter() - start)
+        found = inventory.search(origin, destination, date, limit=args.limit)
+        if [s["price_usd"] for s in found] != [s["price_usd"] for s in expected]:
+            mismatches += 1
+    histograms["full scan"] = scan_histogram
+    result["latency"] = {kind: histogram.summary() for kind, histogram in histograms.items()}
+    result["mismatches"] = mismatches
+    indexed, scanned = histograms["route+date"].mean, scan_histogram.mean
+    result["speedup"] = round(scanned / indexed) if indexed and scanned else None
+
+    if args.shards > 1:
+        result["sharded"] = bench_shards(segments, inventory, queries, args.shards, args.limit)
+
+    if args.connection_queries:
+        rng = random.Random(args.seed)
+        airports = sorted({airport for route in inventory.routes() for airport in route})
+        trips = [
+            (*rng.sample(airports, 2), date)
+            for _, _, date in queries[: args.connection_queries]
+        ]
+        result["connections"] = bench_connections(segments, trips, args.limit)
+    if args.parser_queries:
+        result["parser"] = bench_parser(inventory, queries[: args.parser_queries], args.limit)
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark indexed flight search vs a full scan.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000],
+                        help="inventory sizes in segments")
+    parser.add_argument("--queries", type=int, default=10_000, help="indexed searches per kind")
+    parser.add_argument("--scan-queries", type=int, default=50,
+                        help="full-scan searches (slow on large inventories)")
+    parser.add_argument("--connection-queries", type=int, default=300,
+                        help="connection searches per ranking (0 skips them)")
+    parser.add_argument("--shards", type=int, default=4,
+                        help="shards for the heap-merged search (1 skips it)")
+    parser.add_argument("--parser-queries", type=int, default=2000,
+                        help="free-text queries parsed and planned (0 skips them)")
+    parser.add_argument("--limit", type=int, default=10, help="results per search")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--no-memory", dest="memory", action="store_false",
+                        help="skip measuring the index's memory with tracemalloc")
+    parser.add_argument("--json", type=Path, help="write the report to this file")
+    args = parser.parse_args()
+
+    results = {}
+    for size in args.sizes:
+        print(f"  {size:,} segments ...", flush=True)
+        results[size] = bench_size(size, args)
+
+    for size, r in results.items():
+        latency = {
+            **r["latency"], **r.get("sharded", {}).get("latency", {}),
+            **r.get("connections", {}).get("latency", {}), **r.get("parser", {}),
+        }
+        print(format_table(latency, f"\n{size:,} segments: search latency (ms)"))
+    print("\nIndex")
+    print(f"  {'segments':>10} {'keys':>8} {'largest':>8} {'build s':>8} {'index MiB':>10} "
+          f"{'speedup':>8} {'mismatch':>9}")
+    for size, r in results.items():
+        print(f"  {size:>10,} {r['keys']:>8,} {r['largest_key']:>8} {r['build_s']:>8} "
+              f"{r.get('index_mib', '-'):>10} {r['speedup'] or '-':>7}x {r['mismatches']:>9}")
+    if any("connections" in r for r in results.values()):
+        print("\nRoute graph (connection search)")
+        print(f"  {'segments':>10} {'build s':>8} {'expanded/search (price, duration, stops)':>42} "
+              f"{'truncated':>10}")
+        for size, r in results.items():
+            c = r.get("connections")
+            if c:
+                expanded = ", ".join(str(c["expanded"][sort]) for sort in SORT_KEYS)
+                print(f"  {size:>10,} {c['build_s']:>8} {expanded:>42} {c['truncated']:>10}")
+    if any("sharded" in r for r in results.values()):
+        print("\nSharded inventory (heap merge)")
+        print(f"  {'segments':>10} {'shards':>7} {'build s':>8} {'mismatch':>9}")
+        for size, r in results.items():
+            sh = r.get("sharded")
+            if sh:
+                print(f"  {size:>10,} {sh['shards']:>7} {sh['build_s']:>8} {sh['mismatches']:>9}")
+
+    if args.json:
+        report = {
+            "tool": "benchmarks/inventory.py",
+            "started_at": datetime.now(timezone.utc).isoformat(),
+            "config": {
+                "queries": args.queries,
+                "scan_queries": args.scan_queries,
+                "connection_queries": args.connection_queries,
+                "parser_queries": args.parser_queries,
+                "shards": args.shards,
+                "limit": args.limit,
+                "seed": args.seed,
+            },
+            "sizes": {str(size): r for size, r in results.items()},
+        }
+        args.json.write_text(json.dumps(report, indent=2, sort_keys=True) + "\n")
+        print(f"\nReport written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,358 @@
+"""
+benchmarks/load.py
+==================
+Load generator and latency benchmark for the agent mesh.
+
+Demonstrates:
+- Closed-loop load: `--concurrency` workers per target, each sending its next
+  request as soon as the previous one finishes
+- Open-loop load: requests started at `--rate` per second per target (fixed
+  spacing or Poisson arrivals) however many are still in flight; latency is
+  measured from the *scheduled* start, so a stalled server cannot hide its
+  queueing delay (coordinated omission)
+- Time to first chunk (first artifact-update event) for message/stream
+- Error rates by kind: http_<status>, jsonrpc_error, task_failed, timeout,
+  transport
+- HDR-style percentile tables (shared/latency.py) and a JSON report with
+  stable keys that can be diffed between runs, or compared with --baseline
+
+Start the agents and the orchestrator first, then for example:
+    python benchmarks/load.py --target flight --target hotel --concurrency 8 --duration 20
+    python benchmarks/load.py --target orchestrator --mode open --rate 5 --json run.json
+    python benchmarks/load.py --target orchestrator --mode open --rate 5 --baseline run.json
+
+Targets: flight, hotel, weather, booking, orchestrator — or NAME=URL to point a
+target at another host. Requests rotate through --cities, but the
+orchestrator's result cache (shared/result_cache.py) still answers repeats;
+set A2A_RESULT_CACHE_MAX_BYTES=0 on it to measure the full fan-out.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+from collections import Counter
+from collections.abc import Callable
+from dataclasses import dataclass, field, replace
+from datetime import datetime, timezone
+from pathlib import Path
+from uuid import uuid4
+
+import httpx
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from shared.latency import LatencyHistogram, format_table  # noqa: E402
+
+
+# ── Targets ───────────────────────────────────────────────────────────────────
+@dataclass(frozen=True)
+class Target:
+    name: str
+    url: str
+    method: str  # "message/send" or "message/stream"
+    text: str  # "{city}" is replaced per request
+    headers: dict = field(default_factory=dict)
+
+
+TARGETS = {
+    "flight": Target(
+        "flight", "http://localhost:8001", "message/stream",
+        "Find flights from New York to {city}", {"Authorization": "Bearer flight-secret-token"},
+    ),
+    "hotel": Target(
+        "hotel", "http://localhost:8002", "message/send",
+        "Hotels in {city}", {"X-Api-Key": "hotel-api-key-12345"},
+    ),
+    "weather": Target(
+        "weather", "http://localhost:8004", "message/stream", "Weather forecast for {city}",
+    ),
+    "booking": Target(
+        "booking", "http://localhost:8003", "message/send", "Book a flight and hotel in {city}",
+    ),
+    "orchestrator": Target(
+        "orchestrator", "http://localhost:8010", "message/stream", "Plan a trip to {city}",
+    ),
+}
+CITIES = ("Paris", "London", "Tokyo", "New York", "Sydney", "Rome")
+
+
+@dataclass
+class TargetStats:
+    latency: LatencyHistogram = field(default_factory=LatencyHistogram)
+    ttfc: LatencyHistogram = field(default_factory=LatencyHistogram)
+    errors: Counter = field(default_factory=Counter)
+    dropped: int = 0
+
+    def report(self, target: Target, duration: float) -> dict:
+        requests = self.latency.count
+        return {
+            "method": target.method,
+            "requests": requests,
+            "errors": sum(self.errors.values()),
+            "error_rate": round(sum(self.errors.values()) / requests, 4) if requests else 0.0,
+            "errors_by_kind": dict(sorted(self.errors.items())),
+            "dropped": self.dropped,
+            "throughput_rps": round(requests / duration, 2) if duration else 0.0,
+            "latency": self.latency.summary(),
+            "ttfc": self.ttfc.summary() if target.method == "message/stream" else None,
+        }
+
+
+def _payload(target: Target, seq: int, cities: list[str]) -> dict:
+    text = target.text.format(city=cities[seq % len(cities)])
+    return {
+        "jsonrpc": "2.0",
+        "id": str(seq),
+        "method": target.method,
+        "params": {
+            "message": {
+                "role": "user",
+                "messageId": uuid4().hex,
+                "parts": [{"kind": "text", "text": text}],
+            }
+        },
+    }
+
+
+# ── One request ───────────────────────────────────────────────────────────────
+STREAMING_METHODS = ("message/stream", "tasks/resubscribe")
+
+
+@dataclass
+class Outcome:
+    ttfc: float | None = None  # message/stream: first artifact-update
+    error: str | None = None
+    task_id: str | None = None
+    context_id: str | None = None
+    # Called once, as soon as the task id is known (mid-stream for message/stream).
+    on_ids: Callable[["Outcome"], None] | None = field(default=None, repr=False)
+
+    def observe(self, message: dict, started: float) -> None:
+        """Update from one JSON-RPC response or SSE event."""
+        if "error" in message:
+            self.error = self.error or "jsonrpc_error"
+            return
+        result = message.get("result")
+        if not isinstance(result, dict):
+            return
+        kind = result.get("kind")
+        if self.ttfc is None and kind == "artifact-update":
+            self.ttfc = time.perf_counter() - started
+        if self.task_id is None:
+            self.task_id = result.get("taskId") or (result.get("id") if kind == "task" else None)
+            self.context_id = result.get("contextId")
+            if self.task_id is not None and self.on_ids is not None:
+                self.on_ids(self)
+        if (result.get("status") or {}).get("state") == "failed":
+            self.error = self.error or "task_failed"
+
+
+async def send_one(
+    client: httpx.AsyncClient,
+    url: str,
+    payload: dict,
+    headers: dict,
+    started: float,
+    outcome: Outcome | None = None,
+) -> Outcome:
+    """
+    POST one JSON-RPC `payload` to `url`, streaming the reply for streaming
+    methods. Times are measured from `started`, which may lie before the send.
+    """
+    outcome = outcome or Outcome()
+    try:
+        if payload.get("method") in STREAMING_METHODS:
+            async with client.stream("POST", url, json=payload, headers=headers) as response:
+                if response.status_code != 200:
+                    await response.aread()
+                    outcome.error = f"http_{response.status_code}"
+                    return outcome
+                async for line in response.aiter_lines():
+                    if line.startswith("data:"):
+                        outcome.observe(json.loads(line[5:]), started)
+        else:
+            response = await client.post(url, json=payload, headers=headers)
+            if response.status_code != 200:
+                outcome.error = f"http_{response.status_code}"
+                return outcome
+            outcome.observe(response.json(), started)
+    except httpx.TimeoutException:
+        outcome.error = "timeout"
+    except (httpx.HTTPError, ValueError):
+        outcome.error = "transport"
+    return outcome
+
+
+class LoadRun:
+    """Drives every target for `warmup + duration` seconds and records the measured part."""
+
+    def __init__(self, args: argparse.Namespace, targets: list[Target]) -> None:
+        self.args = args
+        self.targets = targets
+        self.stats = {target.name: TargetStats() for target in targets}
+        self.cities = [c.strip() for c in args.cities.split(",") if c.strip()] or list(CITIES)
+
+    async def run(self) -> None:
+        limits = httpx.Limits(
+            max_connections=None, max_keepalive_connections=self.args.concurrency * len(self.targets)
+        )
+        async with httpx.AsyncClient(timeout=self.args.timeout, limits=limits) as client:
+            self.measure_from = time.perf_counter() + self.args.warmup
+            self.stop_at = self.measure_from + self.args.duration
+            loop = self._closed_loop if self.args.mode == "closed" else self._open_loop
+            await asyncio.gather(*(loop(client, target) for target in self.targets))
+
+    async def _request(self, client: httpx.AsyncClient, target: Target, seq: int, started: float) -> None:
+        outcome = await send_one(
+            client, f"{target.url}/", _payload(target, seq, self.cities), target.headers, started
+        )
+        if started < self.measure_from:
+            return  # warm-up
+        stats = self.stats[target.name]
+        stats.latency.record(time.perf_counter() - started)
+        if outcome.ttfc is not None:
+            stats.ttfc.record(outcome.ttfc)
+        if outcome.error is not None:
+            stats.errors[outcome.error] += 1
+
+    async def _closed_loop(self, client: httpx.AsyncClient, target: Target) -> None:
+        async def worker(first: int) -> None:
+            seq = first
+            while time.perf_counter() < self.stop_at:
+                await self._request(client, target, seq, time.perf_counter())
+                seq += self.args.concurrency
+
+        await asyncio.gather(*(worker(i) for i in range(self.args.concurrency)))
+
+    async def _open_loop(self, client: httpx.AsyncClient, target: Target) -> None:
+        rate = self.args.rate
+        inflight: set[asyncio.Task] = set()
+        next_at = time.perf_counter()
+        seq = 0
+        while next_at < self.stop_at:
+            await asyncio.sleep(max(0.0, next_at - time.perf_counter()))
+            if len(inflight) >= self.args.max_inflight:
+                if next_at >= self.measure_from:
+                    self.stats[target.name].dropped += 1
+            else:
+                task = asyncio.create_task(self._request(client, target, seq, next_at))
+                inflight.add(task)
+                task.add_done_callback(inflight.discard)
+            seq += 1
+            next_at += random.expovariate(rate) if self.args.arrivals == "poisson" else 1.0 / rate
+        await asyncio.gather(*inflight)
+
+    def report(self) -> dict:
+        return {
+            "tool": "benchmarks/load.py",
+            "started_at": datetime.now(timezone.utc).isoformat(),
+            "config": {
+                "mode": self.args.mode,
+                "concurrency": self.args.concurrency if self.args.mode == "closed" else None,
+                "rate": self.args.rate if self.args.mode == "open" else None,
+                "arrivals": self.args.arrivals if self.args.mode == "open" else None,
+                "duration_s": self.args.duration,
+                "warmup_s": self.args.warmup,
+                "timeout_s": self.args.timeout,
+                "targets": {t.name: {"url": t.url, "method": t.method} for t in self.targets},
+            },
+            "results": {
+                t.name: self.stats[t.name].report(t, self.args.duration) for t in self.targets
+            },
+        }
+
+
+# ── Output ────────────────────────────────────────────────────────────────────
+def print_report(report: dict) -> None:
+    results = report["results"]
+    print(format_table({name: r["latency"] for name, r in results.items()}, "\nLatency (ms)"))
+    streams = {name: r["ttfc"] for name, r in results.items() if r["ttfc"] is not None}
+    if streams:
+        print(format_table(streams, "\nTime to first chunk (ms)"))
+    print("\nThroughput / errors")
+    for name, r in results.items():
+        kinds = ", ".join(f"{kind}={n}" for kind, n in r["errors_by_kind"].items())
+        dropped = f", dropped {r['dropped']}" if r["dropped"] else ""
+        print(
+            f"  {name:<12} {r['throughput_rps']:>8.2f} req/s  "
+            f"errors {r['error_rate']:.2%}{f' ({kinds})' if kinds else ''}{dropped}"
+        )
+
+
+def print_comparison(report: dict, baseline: dict) -> None:
+    """Relative change of the headline numbers against an earlier report."""
+    def change(new: float | None, old: float | None) -> str:
+        if new is None or old is None:
+            return "n/a"
+        if old == 0:
+            return f"{old:g} -> {new:g}"
+        return f"{old:g} -> {new:g} ({(new - old) / old:+.1%})"
+
+    print("\nCompared with baseline")
+    for name, new in report["results"].items():
+        old = baseline.get("results", {}).get(name)
+        if old is None:
+            print(f"  {name:<12} (not in baseline)")
+            continue
+        print(f"  {name}")
+        print(f"    p50 ms      {change(new['latency']['p50_ms'], old['latency']['p50_ms'])}")
+        print(f"    p99 ms      {change(new['latency']['p99_ms'], old['latency']['p99_ms'])}")
+        print(f"    req/s       {change(new['throughput_rps'], old['throughput_rps'])}")
+        print(f"    error rate  {change(new['error_rate'], old['error_rate'])}")
+
+
+def _parse_target(spec: str) -> Target:
+    name, _, url = spec.partition("=")
+    if name not in TARGETS:
+        raise argparse.ArgumentTypeError(f"unknown target {name!r} (choose from {', '.join(TARGETS)})")
+    target = TARGETS[name]
+    return replace(target, url=url.rstrip("/")) if url else target
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Load-test the A2A agents and orchestrator.")
+    parser.add_argument("--target", action="append", type=_parse_target,
+                        help="flight|hotel|weather|booking|orchestrator[=URL] (repeatable; default all)")
+    parser.add_argument("--mode", choices=("closed", "open"), default="closed")
+    parser.add_argument("--concurrency", type=int, default=4, help="closed loop: workers per target")
+    parser.add_argument("--rate", type=float, default=5.0, help="open loop: requests/s per target")
+    parser.add_argument("--arrivals", choices=("fixed", "poisson"), default="fixed",
+                        help="open loop: request spacing")
+    parser.add_argument("--max-inflight", type=int, default=1000,
+                        help="open loop: requests in flight per target before new ones are dropped")
+    parser.add_argument("--duration", type=float, default=10.0, help="measured seconds")
+    parser.add_argument("--warmup", type=float, default=2.0, help="unmeasured seconds first")
+    parser.add_argument("--timeout", type=float, default=60.0, help="per-request timeout (s)")
+    parser.add_argument("--method", choices=("send", "stream"),
+                        help="force message/send or message/stream for every target")
+    parser.add_argument("--cities", default=",".join(CITIES), help="comma-separated destinations")
+    parser.add_argument("--json", type=Path, help="write the report to this file")
+    parser.add_argument("--baseline", type=Path, help="compare with an earlier --json report")
+    args = parser.parse_args()
+
+    targets = args.target or list(TARGETS.values())
+    if args.method:
+        targets = [replace(t, method=f"message/{args.method}") for t in targets]
+
+    run = LoadRun(args, targets)
+    mode = (
+        f"closed loop, {args.concurrency} per target" if args.mode == "closed"
+        else f"open loop, {args.rate:g} req/s per target ({args.arrivals})"
+    )
+    print(f"Benchmarking {', '.join(t.name for t in targets)}: {mode}, "
+          f"{args.warmup:g}s warm-up + {args.duration:g}s")
+    asyncio.run(run.run())
+
+    report = run.report()
+    print_report(report)
+    if args.baseline:
+        print_comparison(report, json.loads(args.baseline.read_text()))
+    if args.json:
+        args.json.write_text(json.dumps(report, indent=2, sort_keys=True) + "\n")
+        print(f"\nReport written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
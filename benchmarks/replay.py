@@ -0,0 +1,316 @@
+"""
+benchmarks/replay.py
+====================
+Replay recorded A2A traffic against the agents and the orchestrator.
+
+Demonstrates:
+- Streaming a JSONL recording (written by shared/recording.py when a server
+  runs with A2A_RECORD_FILE) line by line instead of loading it
+- Preserving the recorded inter-arrival times, or compressing them with
+  --speed N (N times faster; 0 sends as fast as --max-inflight allows)
+- A bounded reorder window: servers write each request when it *finishes*,
+  so the file is only roughly in arrival order
+- Mapping recorded task / context ids onto the ones the replayed servers
+  create, so `tasks/get`, `tasks/cancel` and multi-turn messages reach real
+  tasks; a follow-up waits until its original task's new id is known
+- Latency (from the scheduled send time), time to first chunk and errors per
+  JSON-RPC method, plus how far the replay fell behind its schedule
+
+Record, then replay:
+    A2A_RECORD_FILE=traffic.jsonl python agents/flight_agent.py   # any server
+    python benchmarks/replay.py traffic.jsonl
+    python benchmarks/replay.py traffic.jsonl --speed 10 --target flight=http://staging:8001
+
+When every server records into one file, the orchestrator's own calls to the
+agents are in it too; replay with --only orchestrator (plus any agents the
+clients called directly) to avoid sending them twice.
+
+Each line is a recording ({"ts", "target", "url", "request", "task_id",
+"context_id", ...}) or a bare JSON-RPC request, which is sent to
+--default-target right after the previous one. Other lines are skipped and
+counted.
+"""
+
+import argparse
+import asyncio
+import copy
+import heapq
+import json
+import sys
+import time
+from collections import Counter
+from collections.abc import Iterator
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+
+import httpx
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from benchmarks.load import (  # noqa: E402
+    STREAMING_METHODS,
+    TARGETS,
+    Outcome,
+    TargetStats,
+    send_one,
+)
+from shared.latency import LatencyHistogram, format_table  # noqa: E402
+
+
+@dataclass
+class Record:
+    ts: float
+    target: str
+    url: str | None
+    request: dict
+    task_id: str | None = None
+    context_id: str | None = None
+
+
+def read_records(path: Path, default_target: str, window: int, skipped: Counter) -> Iterator[Record]:
+    """Yield the recording's requests in `ts` order, holding at most `window` lines."""
+    heap: list[tuple[float, int, Record]] = []
+    last_ts = 0.0
+    with path.open(encoding="utf-8") as lines:
+        for number, line in enumerate(lines):
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                skipped["not_json"] += 1
+                continue
+            if not isinstance(entry, dict):
+                skipped["not_a2a"] += 1
+                continue
+            request = entry.get("request", entry)
+            if not isinstance(request, dict) or "method" not in request:
+                skipped["not_a2a"] += 1
+                continue
+            ts = entry.get("ts")
+            last_ts = float(ts) if isinstance(ts, (int, float)) else last_ts
+            record = Record(
+                ts=last_ts,
+                target=entry.get("target") or default_target,
+                url=entry.get("url"),
+                request=request,
+                task_id=entry.get("task_id"),
+                context_id=entry.get("context_id"),
+            )
+            heapq.heappush(heap, (record.ts, number, record))
+            if len(heap) > window:
+                yield heapq.heappop(heap)[2]
+    while heap:
+        yield heapq.heappop(heap)[2]
+
+
+class Replay:
+    def __init__(self, args: argparse.Namespace) -> None:
+        self.args = args
+        self.overrides: dict[str, str] = dict(args.target or [])
+        self.stats: dict[str, TargetStats] = {}
+        self.lag = LatencyHistogram()
+        self.skipped: Counter = Counter()
+        self.unmapped = 0
+        self.replayed = 0
+        self.recorded_span = 0.0
+        self.elapsed = 0.0
+        # Recorded task id -> future of the id this replay created for it
+        # (None if the replayed request created no task).
+        self.task_ids: dict[str, asyncio.Future] = {}
+        self.context_ids: dict[str, str] = {}
+
+    async def run(self) -> None:
+        limits = httpx.Limits(max_connections=None, max_keepalive_connections=self.args.max_inflight)
+        inflight = asyncio.Semaphore(self.args.max_inflight)
+        tasks: set[asyncio.Task] = set()
+        async with httpx.AsyncClient(timeout=self.args.timeout, limits=limits) as client:
+            began = time.perf_counter()
+            first_ts = None
+            launched = 0
+            for record in read_records(
+                self.args.recording, self.args.default_target, self.args.reorder_window, self.skipped
+            ):
+                if self.args.only and record.target not in self.args.only:
+                    self.skipped["filtered"] += 1
+                    continue
+                first_ts = record.ts if first_ts is None else first_ts
+                self.recorded_span = record.ts - first_ts
+                due = time.perf_counter()
+                if self.args.speed > 0:
+                    due = began + self.recorded_span / self.args.speed
+                    await asyncio.sleep(max(0.0, due - time.perf_counter()))
+                await inflight.acquire()
+                self.lag.record(time.perf_counter() - due)
+                task = asyncio.create_task(self._replay(client, record, due))
+                task.add_done_callback(lambda t: (tasks.discard(t), inflight.release()))
+                tasks.add(task)
+                launched += 1
+                if self.args.limit and launched >= self.args.limit:
+                    break
+            await asyncio.gather(*tasks)
+            self.elapsed = time.perf_counter() - began
+
+    # ── Internals ─────────────────────────────────────────────────────────────
+    def _endpoint(self, record: Record) -> tuple[str, dict]:
+        target = TARGETS.get(record.target)
+        headers = target.headers if target is not None else {}
+        if record.target in self.overrides:
+            return f"{self.overrides[record.target].rstrip('/')}/", headers
+        if record.url:
+            return record.url, headers
+        return f"{target.url}/" if target is not None else "", headers
+
+    async def _mapped_task_id(self, task_id: str) -> str:
+        """The replay's id for a recorded task id (waiting for it if still in flight)."""
+        future = self.task_ids.get(task_id)
+        if future is not None:
+            try:
+                mapped = await asyncio.wait_for(asyncio.shield(future), self.args.timeout)
+            except TimeoutError:
+                mapped = None
+            if mapped is not None:
+                return mapped
+        self.unmapped += 1
+        return task_id
+
+    async def _rewrite(self, request: dict) -> dict:
+        """Point a follow-up request at the ids this replay created."""
+        request = copy.deepcopy(request)
+        params = request.get("params")
+        if not isinstance(params, dict):
+            return request
+        message = params.get("message")
+        if isinstance(message, dict):
+            # message/send|stream continuing an earlier task
+            slots = [(message, "taskId")]
+        else:
+            # tasks/get, tasks/cancel, tasks/resubscribe, push notification config
+            slots = [(params, "id"), (params, "taskId")]
+        for holder, key in slots:
+            if isinstance(holder.get(key), str):
+                holder[key] = await self._mapped_task_id(holder[key])
+        if isinstance(message, dict) and isinstance(message.get("contextId"), str):
+            message["contextId"] = self.context_ids.get(message["contextId"], message["contextId"])
+        return request
+
+    async def _replay(self, client: httpx.AsyncClient, record: Record, due: float) -> None:
+        method = record.request.get("method", "?")
+        outcome = Outcome()
+        future = None
+        if record.task_id and record.task_id not in self.task_ids and method.startswith("message/"):
+            future = asyncio.get_running_loop().create_future()
+            self.task_ids[record.task_id] = future
+
+            def learned(result: Outcome) -> None:
+                if not future.done():
+                    future.set_result(result.task_id)
+                if record.context_id and result.context_id:
+                    self.context_ids[record.context_id] = result.context_id
+
+            outcome.on_ids = learned
+        url, headers = self._endpoint(record)
+        if url:
+            await send_one(client, url, await self._rewrite(record.request), headers, due, outcome)
+        else:
+            outcome.error = "unknown_target"
+        if future is not None and not future.done():
+            future.set_result(None)  # no task was created: follow-ups keep the recorded id
+
+        stats = self.stats.setdefault(method, TargetStats())
+        stats.latency.record(time.perf_counter() - due)
+        if outcome.ttfc is not None:
+            stats.ttfc.record(outcome.ttfc)
+        if outcome.error is not None:
+            stats.errors[outcome.error] += 1
+        self.replayed += 1
+
+    def report(self) -> dict:
+        methods = {}
+        for method, stats in sorted(self.stats.items()):
+            requests = stats.latency.count
+            errors = sum(stats.errors.values())
+            methods[method] = {
+                "requests": requests,
+                "errors": errors,
+                "error_rate": round(errors / requests, 4) if requests else 0.0,
+                "errors_by_kind": dict(sorted(stats.errors.items())),
+                "latency": stats.latency.summary(),
+                "ttfc": stats.ttfc.summary() if method in STREAMING_METHODS else None,
+            }
+        return {
+            "tool": "benchmarks/replay.py",
+            "started_at": datetime.now(timezone.utc).isoformat(),
+            "config": {
+                "recording": str(self.args.recording),
+                "speed": self.args.speed,
+                "max_inflight": self.args.max_inflight,
+                "targets": dict(sorted(self.overrides.items())),
+            },
+            "replayed": self.replayed,
+            "skipped_lines": dict(sorted(self.skipped.items())),
+            "unmapped_task_ids": self.unmapped,
+            "recorded_span_s": round(self.recorded_span, 3),
+            "replay_span_s": round(self.elapsed, 3),
+            "schedule_lag": self.lag.summary(),
+            "methods": methods,
+        }
+
+
+def print_report(report: dict) -> None:
+    methods = report["methods"]
+    print(format_table({m: r["latency"] for m, r in methods.items()}, "\nLatency by method (ms)"))
+    streams = {m: r["ttfc"] for m, r in methods.items() if r["ttfc"] is not None}
+    if streams:
+        print(format_table(streams, "\nTime to first chunk (ms)"))
+    print("\nErrors by method")
+    for method, r in methods.items():
+        kinds = ", ".join(f"{kind}={n}" for kind, n in r["errors_by_kind"].items())
+        print(f"  {method:<24} {r['error_rate']:.2%}{f' ({kinds})' if kinds else ''}")
+    print(format_table({"lag": report["schedule_lag"]}, "\nSchedule lag (ms)"))
+    skipped = sum(report["skipped_lines"].values())
+    print(
+        f"\nReplayed {report['replayed']} requests "
+        f"({report['recorded_span_s']:g}s recorded in {report['replay_span_s']:g}s); "
+        f"{skipped} lines skipped, {report['unmapped_task_ids']} task ids left unmapped"
+    )
+
+
+def _parse_target(spec: str) -> tuple[str, str]:
+    name, sep, url = spec.partition("=")
+    if not sep or not url:
+        raise argparse.ArgumentTypeError("expected NAME=URL, e.g. flight=http://localhost:8001")
+    return name, url
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Replay recorded A2A requests.")
+    parser.add_argument("recording", type=Path, help="JSONL recording (see shared/recording.py)")
+    parser.add_argument("--speed", type=float, default=1.0,
+                        help="time compression: 1 = recorded pace, 10 = 10x faster, 0 = no waiting")
+    parser.add_argument("--target", action="append", type=_parse_target,
+                        help="NAME=URL: send NAME's requests to URL instead (repeatable)")
+    parser.add_argument("--default-target", default="orchestrator", choices=sorted(TARGETS),
+                        help="target for lines without one")
+    parser.add_argument("--only", action="append", choices=sorted(TARGETS),
+                        help="replay only these targets' requests (repeatable), e.g. --only "
+                             "orchestrator to skip the agent calls it makes itself")
+    parser.add_argument("--max-inflight", type=int, default=256)
+    parser.add_argument("--reorder-window", type=int, default=1000,
+                        help="lines buffered to restore arrival order")
+    parser.add_argument("--limit", type=int, default=0, help="stop after this many requests")
+    parser.add_argument("--timeout", type=float, default=60.0, help="per-request timeout (s)")
+    parser.add_argument("--json", type=Path, help="write the report to this file")
+    args = parser.parse_args()
+
+    replay = Replay(args)
+    print(f"Replaying {args.recording} at "
+          f"{'full speed' if args.speed <= 0 else f'{args.speed:g}x'}")
+    asyncio.run(replay.run())
+    report = replay.report()
+    print_report(report)
+    if args.json:
+        args.json.write_text(json.dumps(report, indent=2, sort_keys=True) + "\n")
+        print(f"\nReport written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
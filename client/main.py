@@ -19,6 +19,7 @@ import asyncio
 import base64
 import json
 import logging
+import sys
 from pathlib import Path
 from uuid import uuid4
 
@@ -49,8 +50,15 @@ from a2a.types import (
     TextPart,
 )
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from shared.card_cache import AgentCardCache  # noqa: E402
+
 logging.basicConfig(level=logging.WARNING)
 
+# Every section closes its httpx client when it is done, so a background
+# refresh could start on a client that is about to close: refresh inline.
+card_cache = AgentCardCache.from_env(background_refresh=False)
+
 # ── Endpoints ─────────────────────────────────────────────────────────────────
 FLIGHT_URL = "http://localhost:8001"
 HOTEL_URL = "http://localhost:8002"
@@ -122,6 +130,9 @@ async def demo_section2_agent_cards() -> None:
     - skills[].id, skills[].tags, skills[].examples
     - capabilities.streaming, capabilities.push_notifications
     - security_schemes (Bearer, API key)
+
+    Cards are stored in the script's card_cache (shared/card_cache.py),
+    so every later section reuses them instead of refetching.
     """
     section(2, "Agent Cards — Discovery via /.well-known/agent.json")
 
@@ -135,8 +146,7 @@ async def demo_section2_agent_cards() -> None:
     for name, url, headers in agents:
         try:
             async with httpx.AsyncClient(headers=headers, timeout=5.0) as http_client:
-                resolver = A2ACardResolver(http_client, url)
-                card = await resolver.get_agent_card()
+                card = await card_cache.get(http_client, url)
 
             info(f"{name}: {card.name} v{card.version}")
             info(f"  URL: {card.url}")
@@ -175,8 +185,7 @@ async def demo_section3_basic_task() -> None:
         async with httpx.AsyncClient(
             headers={"X-Api-Key": HOTEL_API_KEY}, timeout=15.0
         ) as http_client:
-            resolver = A2ACardResolver(http_client, HOTEL_URL)
-            card = await resolver.get_agent_card()
+            card = await card_cache.get(http_client, HOTEL_URL)
             client = A2AClient(httpx_client=http_client, agent_card=card)
 
             msg = _user_msg("Hotels in Paris")
@@ -225,8 +234,7 @@ async def demo_section4_task_lifecycle() -> None:
         async with httpx.AsyncClient(
             headers={"X-Api-Key": HOTEL_API_KEY}, timeout=15.0
         ) as http_client:
-            resolver = A2ACardResolver(http_client, HOTEL_URL)
-            card = await resolver.get_agent_card()
+            card = await card_cache.get(http_client, HOTEL_URL)
             client = A2AClient(httpx_client=http_client, agent_card=card)
 
             # 4a: Send a task, then retrieve it with tasks/get
@@ -256,8 +264,7 @@ async def demo_section4_task_lifecycle() -> None:
         info("")
         info("Demonstrating tasks/cancel — starting Weather task then canceling:")
         async with httpx.AsyncClient(timeout=15.0) as http_client:
-            resolver = A2ACardResolver(http_client, WEATHER_URL)
-            card = await resolver.get_agent_card()
+            card = await card_cache.get(http_client, WEATHER_URL)
             client = A2AClient(httpx_client=http_client, agent_card=card)
 
             # Use non-blocking send for cancel demo
@@ -299,6 +306,7 @@ async def demo_section5_streaming() -> None:
     - TaskArtifactUpdateEvent: incremental artifact chunks
     - last_chunk=True: signals the stream is complete
     - append=True: chunks belong to the same logical artifact
+    - Best-first results: a client can tasks/cancel after the chunks it needs
     """
     section(5, "SSE Streaming — message/stream with TaskArtifactUpdateEvent chunks")
 
@@ -306,8 +314,7 @@ async def demo_section5_streaming() -> None:
     info("Streaming 7-day weather forecast for Tokyo:")
     try:
         async with httpx.AsyncClient(timeout=30.0) as http_client:
-            resolver = A2ACardResolver(http_client, WEATHER_URL)
-            card = await resolver.get_agent_card()
+            card = await card_cache.get(http_client, WEATHER_URL)
             client = A2AClient(httpx_client=http_client, agent_card=card)
 
             req = SendStreamingMessageRequest(
@@ -340,8 +347,7 @@ async def demo_section5_streaming() -> None:
         async with httpx.AsyncClient(
             headers={"Authorization": f"Bearer {FLIGHT_TOKEN}"}, timeout=30.0
         ) as http_client:
-            resolver = A2ACardResolver(http_client, FLIGHT_URL)
-            card = await resolver.get_agent_card()
+            card = await card_cache.get(http_client, FLIGHT_URL)
             client = A2AClient(httpx_client=http_client, agent_card=card)
 
             req = SendStreamingMessageRequest(
@@ -367,6 +373,39 @@ async def demo_section5_streaming() -> None:
     except Exception as exc:
         warn(f"Flight streaming failed: {exc}")
 
+    # 5c: Best-first streaming — the first chunk is the cheapest flight, so a
+    # client that only needs one can cancel and spare the agent the rest.
+    info("")
+    info("Best-first streaming NYC → Paris: keep the first chunk, then tasks/cancel:")
+    try:
+        async with httpx.AsyncClient(
+            headers={"Authorization": f"Bearer {FLIGHT_TOKEN}"}, timeout=30.0
+        ) as http_client:
+            card = await card_cache.get(http_client, FLIGHT_URL)
+            client = A2AClient(httpx_client=http_client, agent_card=card)
+
+            req = SendStreamingMessageRequest(
+                id=str(uuid4()),
+                params=MessageSendParams(
+                    message=_user_msg("Find flights from New York to Paris on 2026-03-15")
+                ),
+            )
+            task_id = None
+            async for resp in client.send_message_streaming(req):
+                result = resp.root.result
+                if isinstance(result, TaskArtifactUpdateEvent):
+                    task_id = result.task_id
+                    f = result.artifact.parts[0].root.data
+                    info(f"  [Best] {f['airline']} {f['iata_code']} — ${f['price_usd']}")
+                    break
+
+            if task_id is not None:
+                cancel_req = CancelTaskRequest(id=str(uuid4()), params=TaskIdParams(id=task_id))
+                cancel_resp = await client.cancel_task(cancel_req)
+                ok(f"tasks/cancel after 1 chunk — state: {cancel_resp.root.result.status.state.value}")
+    except Exception as exc:
+        warn(f"Best-first cancel demo failed: {exc}")
+
 
 # ── Section 6: Multimodal ──────────────────────────────────────────────────────
 async def demo_section6_multimodal() -> None:
@@ -398,8 +437,7 @@ async def demo_section6_multimodal() -> None:
         async with httpx.AsyncClient(
             headers={"X-Api-Key": HOTEL_API_KEY}, timeout=15.0
         ) as http_client:
-            resolver = A2ACardResolver(http_client, HOTEL_URL)
-            card = await resolver.get_agent_card()
+            card = await card_cache.get(http_client, HOTEL_URL)
             client = A2AClient(httpx_client=http_client, agent_card=card)
 
             # Multimodal message: TextPart instruction + FilePart PDF
@@ -466,8 +504,7 @@ async def demo_section7_input_required() -> None:
 
     try:
         async with httpx.AsyncClient(timeout=15.0) as http_client:
-            resolver = A2ACardResolver(http_client, BOOKING_URL)
-            card = await resolver.get_agent_card()
+            card = await card_cache.get(http_client, BOOKING_URL)
             client = A2AClient(httpx_client=http_client, agent_card=card)
 
             # Initial request — no task_id yet (new task)
@@ -549,8 +586,7 @@ async def demo_section8_push_notifications() -> None:
 
     try:
         async with httpx.AsyncClient(timeout=15.0) as http_client:
-            resolver = A2ACardResolver(http_client, BOOKING_URL)
-            card = await resolver.get_agent_card()
+            card = await card_cache.get(http_client, BOOKING_URL)
 
             # Check agent supports push notifications
             if not card.capabilities.push_notifications:
@@ -638,8 +674,7 @@ async def demo_section9_authentication() -> None:
         async with httpx.AsyncClient(
             headers={"Authorization": f"Bearer {FLIGHT_TOKEN}"}, timeout=5.0
         ) as http_client:
-            resolver = A2ACardResolver(http_client, FLIGHT_URL)
-            card = await resolver.get_agent_card()
+            card = await card_cache.get(http_client, FLIGHT_URL)
 
         if card.security_schemes:
             for scheme_id, scheme in card.security_schemes.items():
@@ -658,8 +693,7 @@ async def demo_section9_authentication() -> None:
         async with httpx.AsyncClient(
             headers={"Authorization": f"Bearer {FLIGHT_TOKEN}"}, timeout=15.0
         ) as http_client:
-            resolver = A2ACardResolver(http_client, FLIGHT_URL)
-            card = await resolver.get_agent_card()
+            card = await card_cache.get(http_client, FLIGHT_URL)
             client = A2AClient(httpx_client=http_client, agent_card=card)
             req = SendMessageRequest(
                 id=str(uuid4()),
@@ -678,8 +712,7 @@ async def demo_section9_authentication() -> None:
         async with httpx.AsyncClient(
             headers={"Authorization": "Bearer wrong-token"}, timeout=15.0
         ) as http_client:
-            resolver = A2ACardResolver(http_client, FLIGHT_URL)
-            card = await resolver.get_agent_card()
+            card = await card_cache.get(http_client, FLIGHT_URL)
             client = A2AClient(httpx_client=http_client, agent_card=card)
             req = SendMessageRequest(
                 id=str(uuid4()),
@@ -718,8 +751,7 @@ async def demo_section10_error_handling() -> None:
         async with httpx.AsyncClient(
             headers={"X-Api-Key": "wrong-key"}, timeout=10.0
         ) as http_client:
-            resolver = A2ACardResolver(http_client, HOTEL_URL)
-            card = await resolver.get_agent_card()
+            card = await card_cache.get(http_client, HOTEL_URL)
             client = A2AClient(httpx_client=http_client, agent_card=card)
             req = SendMessageRequest(
                 id=str(uuid4()),
@@ -742,8 +774,7 @@ async def demo_section10_error_handling() -> None:
         async with httpx.AsyncClient(
             headers={"X-Api-Key": HOTEL_API_KEY}, timeout=10.0
         ) as http_client:
-            resolver = A2ACardResolver(http_client, HOTEL_URL)
-            card = await resolver.get_agent_card()
+            card = await card_cache.get(http_client, HOTEL_URL)
             client = A2AClient(httpx_client=http_client, agent_card=card)
             fake_id = str(uuid4())
             get_req = GetTaskRequest(
@@ -789,8 +820,7 @@ async def demo_section11_orchestration() -> None:
 
     try:
         async with httpx.AsyncClient(timeout=60.0) as http_client:
-            resolver = A2ACardResolver(http_client, ORCHESTRATOR_URL)
-            card = await resolver.get_agent_card()
+            card = await card_cache.get(http_client, ORCHESTRATOR_URL)
             client = A2AClient(httpx_client=http_client, agent_card=card)
 
             req = SendStreamingMessageRequest(
@@ -806,6 +836,8 @@ async def demo_section11_orchestration() -> None:
                 if isinstance(result, TaskStatusUpdateEvent):
                     info(f"  [Status] {result.status.state.value}")
                 elif isinstance(result, TaskArtifactUpdateEvent):
+                    if result.artifact.name != "travel_plan":
+                        continue  # streamed partials and the orchestration log
                     for part in result.artifact.parts:
                         if isinstance(part.root, DataPart) and not plan_received:
                             plan = part.root.data
@@ -848,6 +880,7 @@ async def main() -> None:
 
     banner("Tutorial Complete!")
     print("  All A2A protocol features have been demonstrated.")
+    print(f"  Agent Card cache: {card_cache.stats.as_dict()}")
     print("  See TUTORIAL_PLAN.md for the full feature coverage matrix.\n")
 
 
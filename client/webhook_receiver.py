@@ -11,19 +11,27 @@ The A2A server sends push notifications as HTTP POST requests to the URL
 registered via tasks/pushNotificationConfig/set. The notification body is the
 full Task JSON. The token is sent in the X-A2A-Notification-Token header.
 
+Request counts and the task states received are exported at GET /metrics
+(see shared/metrics.py).
+
 Run:
     python client/webhook_receiver.py
 Listens on: http://localhost:9000/webhook
 """
 
 import logging
+import sys
 from datetime import datetime, timezone
+from pathlib import Path
 from typing import Optional
 
 import uvicorn
 from a2a.types import DataPart, Task
 from fastapi import FastAPI, Header, HTTPException, Request
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from shared.metrics import ServiceMetrics  # noqa: E402
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
@@ -33,6 +41,8 @@ app = FastAPI(
     title="A2A Push Notification Receiver",
     description="Section 8: Receives task completion webhooks from A2A agents.",
 )
+metrics = ServiceMetrics("webhook_receiver")
+metrics.install(app)
 
 # In-memory store of received notifications (for the tutorial demo)
 received_notifications: list[dict] = []
@@ -74,6 +84,7 @@ async def receive_push_notification(
     try:
         task = Task.model_validate(body)
         state = task.status.state.value if task.status else "unknown"
+        metrics.task_states.inc(state)
         logger.info("  Task %s reached state: %s", task.id, state)
 
         if task.artifacts:
@@ -7,9 +7,42 @@ Demonstrates:
 - Using A2AClient inside an AgentExecutor to call remote A2A agents
 - Dynamic agent discovery via fetching Agent Cards from known URLs
 - Parallel fan-out using asyncio.gather to dispatch simultaneous tasks
-- Sequential task dependency (booking handled after flight+hotel data are available)
+- Sequential task dependency (booking handled after flight+hotel data are available),
+  declared as a DAG and run by shared/workflow.py with per-step timeouts,
+  retries and timing
 - Result aggregation from heterogeneous agents (sync, streaming)
 - Exposing the orchestrator itself as an A2A server
+- Long-lived, pooled HTTP clients per downstream agent (see shared/http_pool.py)
+- Agent Cards served from a TTL + ETag cache instead of refetched per call
+  (see shared/card_cache.py)
+- Progressive streaming: each flight, hotel and forecast day is forwarded as an
+  append chunk as soon as it arrives, before the consolidated plan
+- A circuit breaker per agent: unhealthy agents are skipped immediately and the
+  plan is marked degraded (see shared/circuit_breaker.py)
+- End-to-end deadlines: the caller's budget (X-A2A-Timeout-Ms header or
+  metadata.timeout_ms) bounds every downstream call and is forwarded to the
+  agents as the remaining budget (see shared/deadline.py)
+- Several replicas per agent with hedged requests: a slow first result
+  triggers a second request to another replica (see shared/hedging.py)
+- Client-side load balancing across those replicas: round-robin,
+  least-outstanding or power-of-two-choices on EWMA latency
+  (see shared/balancer.py)
+- Per-agent sub-results cached by destination + dates with an LRU + TTL,
+  byte-bounded cache (see shared/result_cache.py)
+- Single-flight request coalescing: concurrent identical downstream calls
+  share one A2A call, its streamed chunks, its concurrency slot and its
+  circuit-breaker outcome (see shared/single_flight.py)
+- Admission control: global and per-agent concurrency limits with a bounded
+  wait queue; excess plans fail fast (HTTP 503 / failed task) with a retry
+  hint (see shared/admission.py)
+- Batch planning: a DataPart listing many destinations yields one streamed
+  "travel_plan" artifact per destination plus a "batch_summary", sharing
+  discovery, pools and concurrency limits across the batch
+- Prometheus metrics at GET /metrics, plus series collected on each scrape
+  from the executor's per-agent components (see shared/metrics.py)
+- Distributed tracing: every plan starts a trace that is forwarded to the
+  agents in the `traceparent` header; spans time card resolution, first and
+  last chunk of each call, and aggregation (GET /traces, see shared/tracing.py)
 
 Run:
     python orchestrator/travel_orchestrator.py
@@ -18,12 +51,17 @@ Endpoint: http://localhost:8010
 
 import asyncio
 import logging
-from datetime import datetime, timezone
+import os
+import sys
+from collections.abc import AsyncIterator, Awaitable, Callable, Sequence
+from contextlib import asynccontextmanager
+from functools import partial
+from pathlib import Path
 from uuid import uuid4
 
 import httpx
 import uvicorn
-from a2a.client import A2ACardResolver, A2AClient
+from a2a.client import A2AClient
 from a2a.server.agent_execution import AgentExecutor, RequestContext
 from a2a.server.apps import A2AFastAPIApplication
 from a2a.server.events import EventQueue
@@ -33,7 +71,7 @@ from a2a.types import (
     AgentCapabilities,
     AgentCard,
     AgentSkill,
-    Artifact,
+    CancelTaskRequest,
     DataPart,
     Message,
     MessageSendParams,
@@ -42,27 +80,130 @@ from a2a.types import (
     SendMessageRequest,
     SendStreamingMessageRequest,
     TaskArtifactUpdateEvent,
+    TaskIdParams,
     TaskState,
-    TaskStatus,
-    TaskStatusUpdateEvent,
     TextPart,
 )
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from shared.admission import (  # noqa: E402
+    AdmissionConfig,
+    AdmissionController,
+    AdmissionRejected,
+    reject_when_saturated,
+)
+from shared.balancer import Balancer, make_balancer  # noqa: E402
+from shared.card_cache import card_cache  # noqa: E402
+from shared.card_endpoint import serve_cached_agent_card  # noqa: E402
+from shared.circuit_breaker import BreakerState, CircuitBreaker, CircuitOpenError  # noqa: E402
+from shared.deadline import Deadline, DeadlineExceeded  # noqa: E402
+from shared.events import agent_message, artifact_event, now, status_event  # noqa: E402
+from shared.hedging import Hedger  # noqa: E402
+from shared.http_pool import AgentHTTPPool  # noqa: E402
+from shared.metrics import Counter, Gauge, ServiceMetrics  # noqa: E402
+from shared.recording import record_requests  # noqa: E402
+from shared.result_cache import ResultCache, normalize_key  # noqa: E402
+from shared.single_flight import SingleFlight  # noqa: E402
+from shared.tracing import Span, Tracer, current_span, inject  # noqa: E402
+from shared.workflow import Step, StepDegraded, StepResult, StepSkipped, Workflow  # noqa: E402
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 # ── Agent registry ────────────────────────────────────────────────────────────
-AGENT_URLS = {
-    "flight": "http://localhost:8001",
-    "hotel": "http://localhost:8002",
-    "weather": "http://localhost:8004",
+def _replica_urls(env_var: str, default: str) -> list[str]:
+    """Comma-separated replica base URLs, e.g. FLIGHT_AGENT_URLS=http://f1:8001,http://f2:8001."""
+    urls = [url.strip().rstrip("/") for url in os.getenv(env_var, "").split(",")]
+    return [url for url in urls if url] or [default]
+
+
+# Each role maps to one or more replica base URLs.
+AGENT_URLS: dict[str, list[str]] = {
+    "flight": _replica_urls("FLIGHT_AGENT_URLS", "http://localhost:8001"),
+    "hotel": _replica_urls("HOTEL_AGENT_URLS", "http://localhost:8002"),
+    "weather": _replica_urls("WEATHER_AGENT_URLS", "http://localhost:8004"),
+    "booking": _replica_urls("BOOKING_AGENT_URLS", "http://localhost:8003"),
 }
 FLIGHT_TOKEN = "flight-secret-token"
 HOTEL_API_KEY = "hotel-api-key-12345"
+AGENT_HEADERS = {
+    "flight": {"Authorization": f"Bearer {FLIGHT_TOKEN}"},
+    "hotel": {"X-Api-Key": HOTEL_API_KEY},
+    "weather": {},
+    "booking": {},
+}
+
+# Departure date used when the request does not carry one in
+# metadata {"departure_date": "YYYY-MM-DD"}.
+DEFAULT_DEPARTURE_DATE = "2026-03-15"
+
+# Open a booking with the Booking Agent once flights and hotels are known
+# (off by default; ORCHESTRATOR_BOOK=1, or per request message metadata
+# {"book": true}). The booking task is cancelled once its reference is in the
+# plan, so the Booking Agent does not keep a session waiting for answers.
+BOOK_AFTER_SEARCH = os.getenv("ORCHESTRATOR_BOOK", "0") == "1"
+
+# Workflow step policies (timeout in seconds, retries). Booking is never
+# retried — it is not idempotent.
+STEP_POLICIES: dict[str, dict] = {
+    "discover": {"timeout": 10.0, "retries": 0},
+    "flight": {"timeout": 30.0, "retries": 1},
+    "hotel": {"timeout": 15.0, "retries": 1},
+    "weather": {"timeout": 30.0, "retries": 1},
+    "booking": {"timeout": 15.0, "retries": 0},
+}
+
+# Concurrency limits (Section 10). Plans admitted at once / allowed to queue,
+# overridable with ORCHESTRATOR_MAX_CONCURRENT, _MAX_QUEUE, _MAX_QUEUE_WAIT.
+# Per-agent limits use the A2A_AGENT_* prefix, or A2A_<NAME>_AGENT_* for one
+# agent (e.g. A2A_FLIGHT_AGENT_MAX_CONCURRENT).
+ORCHESTRATOR_ADMISSION = AdmissionConfig(max_concurrent=16, max_queue=64, max_wait=5.0)
+AGENT_ADMISSION = AdmissionConfig(max_concurrent=32, max_queue=128, max_wait=5.0)
+
+# Batch planning (a DataPart with "destinations"): destinations planned at
+# once, and the most accepted per request.
+BATCH_CONCURRENCY = int(os.getenv("ORCHESTRATOR_BATCH_CONCURRENCY", "10"))
+MAX_BATCH_DESTINATIONS = int(os.getenv("ORCHESTRATOR_MAX_BATCH", "100"))
+
+# Forward partial results as they arrive (disable per request with message
+# metadata {"stream_partials": false}).
+STREAM_PARTIALS = os.getenv("ORCHESTRATOR_STREAM_PARTIALS", "1") != "0"
+
+# Spans for every plan (A2A_TRACE_EXPORT=memory|file|off, see shared/tracing.py).
+tracer = Tracer.from_env("orchestrator")
+
+# Called once per item (flight, hotel, forecast day) as soon as it is received.
+OnResult = Callable[[dict], Awaitable[None]]
+
+# A search call that can be shared by concurrent callers: it sends each item to
+# the given OnResult and runs under the given (shared) deadline.
+SharedCall = Callable[[OnResult, Deadline], Awaitable[list[dict]]]
+
+# (base URL, pooled client) for one replica of an agent.
+Replica = tuple[str, httpx.AsyncClient]
 
 
-def _now() -> str:
-    return datetime.now(timezone.utc).isoformat()
+def _http_kwargs(deadline: Deadline | None, cap: float, span: Span | None = None) -> dict:
+    """
+    Per-call timeout bounded by the deadline, plus the remaining-budget and
+    trace context headers.
+    """
+    deadline = deadline or Deadline()
+    return {"timeout": deadline.timeout(cap), "headers": inject(deadline.headers(), span)}
+
+
+async def _within_deadline(call: Callable[[], Awaitable[list[dict]]], deadline: Deadline) -> list[dict]:
+    """
+    Run `call`, reporting a failure that arrives once `deadline` is spent (e.g.
+    the HTTP read timeout it bounded) as DeadlineExceeded rather than as the
+    agent's fault.
+    """
+    try:
+        return await call()
+    except Exception as exc:
+        if deadline.expired():
+            raise DeadlineExceeded(f"deadline expired: {exc}") from exc
+        raise
 
 
 def _user_msg(text: str) -> Message:
@@ -74,107 +215,267 @@ def _user_msg(text: str) -> Message:
 
 
 # ── Section 11: Per-agent helper coroutines ───────────────────────────────────
+# Each role may have several replicas. A replica is called through the
+# long-lived pooled client for its URL (owned by TravelOrchestratorExecutor).
+# Agent Cards come from the process-wide card_cache: discovery warms it and
+# the stream_* helpers read it without another round trip.
 
-async def discover_agent(name: str, url: str, headers: dict) -> tuple[str, AgentCard | None]:
+async def discover_agent(
+    name: str, url: str, http_client: httpx.AsyncClient, deadline: Deadline | None = None
+) -> tuple[str, AgentCard | None]:
     """Fetch an Agent Card from a remote agent (Section 2 — Agent Cards)."""
-    try:
-        async with httpx.AsyncClient(headers=headers, timeout=5.0) as http_client:
-            resolver = A2ACardResolver(http_client, url)
-            card = await resolver.get_agent_card()
+    with tracer.span("resolve_card", agent=name, url=url) as span:
+        try:
+            card = await asyncio.wait_for(
+                card_cache.get(http_client, url), (deadline or Deadline()).timeout(5.0)
+            )
             return name, card
-    except Exception as exc:
-        logger.warning("Could not discover agent '%s' at %s: %s", name, url, exc)
-        return name, None
+        except Exception as exc:
+            logger.warning("Could not discover agent '%s' at %s: %s", name, url, exc)
+            span.set(error=str(exc) or type(exc).__name__)
+            return name, None
+
+
+async def _a2a_client(url: str, http_client: httpx.AsyncClient) -> A2AClient:
+    """A2AClient bound to one replica: RPCs go to `url`, not the card's advertised URL."""
+    card = await card_cache.get(http_client, url)
+    return A2AClient(httpx_client=http_client, agent_card=card, url=f"{url}/")
+
+
+async def _stream_data_parts(
+    url: str, http_client: httpx.AsyncClient, text: str, deadline: Deadline | None
+) -> AsyncIterator[dict]:
+    """Send `text` via message/stream (Section 5) and yield each DataPart payload."""
+    with tracer.span("message/stream", activate=False, url=url) as span:
+        client = await _a2a_client(url, http_client)
+        span.event("card_resolved")
+        req = SendStreamingMessageRequest(
+            id=str(uuid4()),
+            params=MessageSendParams(message=_user_msg(text)),
+        )
+        chunks = 0
+        async for resp in client.send_message_streaming(
+            req, http_kwargs=_http_kwargs(deadline, 30.0, span)
+        ):
+            result = resp.root.result
+            if isinstance(result, TaskArtifactUpdateEvent):
+                for part in result.artifact.parts:
+                    if isinstance(part.root, DataPart):
+                        chunks += 1
+                        if chunks == 1:
+                            span.event("first_chunk")
+                        yield part.root.data
+        span.event("last_chunk", chunks=chunks)
+
+
+def stream_flight_agent(
+    url: str, http_client: httpx.AsyncClient, query: str, deadline: Deadline | None = None
+) -> AsyncIterator[dict]:
+    """Stream flight dicts from one Flight Agent replica (SSE, Section 5)."""
+    return _stream_data_parts(url, http_client, query, deadline)
+
 
+def stream_weather_agent(
+    url: str, http_client: httpx.AsyncClient, city: str, deadline: Deadline | None = None
+) -> AsyncIterator[dict]:
+    """Stream daily forecast dicts from one Weather Agent replica (SSE, Section 5)."""
+    return _stream_data_parts(url, http_client, f"Weather forecast for {city}", deadline)
 
-async def call_flight_agent(query: str) -> list[dict]:
+
+async def stream_hotel_agent(
+    url: str, http_client: httpx.AsyncClient, query: str, deadline: Deadline | None = None
+) -> AsyncIterator[dict]:
     """
-    Call the Flight Agent using SSE streaming (Section 5).
-    Collects all DataPart chunks and returns a list of flight dicts.
+    Call one Hotel Agent replica synchronously (Section 3) and yield each hotel
+    from the DataPart artifact once the response is in.
     """
+    with tracer.span("message/send", activate=False, url=url) as span:
+        client = await _a2a_client(url, http_client)
+        span.event("card_resolved")
+        req = SendMessageRequest(
+            id=str(uuid4()),
+            params=MessageSendParams(message=_user_msg(query)),
+        )
+        response = await client.send_message(req, http_kwargs=_http_kwargs(deadline, 15.0, span))
+    task = response.root.result
+
+    hotels: list[dict] = []
+    if hasattr(task, "artifacts") and task.artifacts:
+        for part in task.artifacts[0].parts:
+            if isinstance(part.root, DataPart):
+                data = part.root.data
+                if isinstance(data, dict) and "hotels" in data:
+                    hotels = data["hotels"]
+                else:
+                    hotels = data if isinstance(data, list) else [data]
+                break
+    for hotel in hotels:
+        yield hotel
+
+
+def _attempts(
+    stream: Callable[..., AsyncIterator[dict]],
+    replicas: Sequence[Replica],
+    balancer: Balancer | None,
+    *args,
+) -> list[Callable[[], AsyncIterator[dict]]]:
+    """One attempt per replica, in the balancer's order and tracked by it."""
+    clients = dict(replicas)
+    urls = balancer.order(list(clients)) if balancer is not None else list(clients)
+    attempts = []
+    for url in urls:
+        attempt = partial(stream, url, clients[url], *args)
+        attempts.append(balancer.attempt(url, attempt) if balancer is not None else attempt)
+    return attempts
+
+
+async def _collect(
+    attempts: list[Callable[[], AsyncIterator[dict]]],
+    on_result: OnResult | None,
+    hedger: Hedger | None,
+) -> list[dict]:
+    """Drain the first attempt (or the hedged winner among several) into a list."""
+    if hedger is not None and len(attempts) > 1:
+        stream = hedger.stream(attempts)
+    else:
+        stream = attempts[0]()
+    span = current_span()
     results: list[dict] = []
-    try:
-        async with httpx.AsyncClient(
-            headers={"Authorization": f"Bearer {FLIGHT_TOKEN}"}, timeout=30.0
-        ) as http_client:
-            resolver = A2ACardResolver(http_client, AGENT_URLS["flight"])
-            card = await resolver.get_agent_card()
-            client = A2AClient(httpx_client=http_client, agent_card=card)
-
-            req = SendStreamingMessageRequest(
-                id=str(uuid4()),
-                params=MessageSendParams(message=_user_msg(query)),
-            )
-            async for resp in client.send_message_streaming(req):
-                result = resp.root.result
-                if isinstance(result, TaskArtifactUpdateEvent):
-                    for part in result.artifact.parts:
-                        if isinstance(part.root, DataPart):
-                            results.append(part.root.data)
-    except Exception as exc:
-        logger.warning("Flight agent call failed: %s", exc)
+    async for item in stream:
+        results.append(item)
+        if span is not None and len(results) == 1:
+            span.event("first_chunk")
+        if on_result is not None:
+            await on_result(item)
+    if span is not None:
+        span.event("last_chunk", chunks=len(results))
     return results
 
 
-async def call_hotel_agent(query: str) -> list[dict]:
+async def call_flight_agent(
+    replicas: Sequence[Replica],
+    query: str,
+    on_result: OnResult | None = None,
+    deadline: Deadline | None = None,
+    hedger: Hedger | None = None,
+    balancer: Balancer | None = None,
+) -> list[dict]:
     """
-    Call the Hotel Agent synchronously (Section 3).
-    Returns a list of hotel dicts from the DataPart artifact.
+    Call the Flight Agent using SSE streaming (Section 5).
+    Collects all DataPart chunks and returns a list of flight dicts.
+    Each flight is also passed to `on_result` the moment its chunk arrives.
+
+    With several replicas, a `balancer` picks which replica goes first and
+    tracks its in-flight count and latency. With a `hedger`, the query is
+    re-sent to the next replica if no flight arrives within the hedge delay;
+    the first replica to answer wins and the other stream is cancelled.
+    Transport and protocol errors propagate so the circuit breaker sees them.
+    The remaining `deadline` budget is forwarded in the X-A2A-Timeout-Ms header.
     """
-    try:
-        async with httpx.AsyncClient(
-            headers={"X-Api-Key": HOTEL_API_KEY}, timeout=15.0
-        ) as http_client:
-            resolver = A2ACardResolver(http_client, AGENT_URLS["hotel"])
-            card = await resolver.get_agent_card()
-            client = A2AClient(httpx_client=http_client, agent_card=card)
-
-            req = SendMessageRequest(
-                id=str(uuid4()),
-                params=MessageSendParams(message=_user_msg(query)),
-            )
-            response = await client.send_message(req)
-            task = response.root.result
+    attempts = _attempts(stream_flight_agent, replicas, balancer, query, deadline)
+    return await _collect(attempts, on_result, hedger)
 
-            if hasattr(task, "artifacts") and task.artifacts:
-                for part in task.artifacts[0].parts:
-                    if isinstance(part.root, DataPart):
-                        data = part.root.data
-                        if isinstance(data, dict) and "hotels" in data:
-                            return data["hotels"]
-                        return data if isinstance(data, list) else [data]
-    except Exception as exc:
-        logger.warning("Hotel agent call failed: %s", exc)
-    return []
+
+async def call_hotel_agent(
+    replicas: Sequence[Replica],
+    query: str,
+    on_result: OnResult | None = None,
+    deadline: Deadline | None = None,
+    hedger: Hedger | None = None,
+    balancer: Balancer | None = None,
+) -> list[dict]:
+    """
+    Call the Hotel Agent synchronously (Section 3).
+    Returns a list of hotel dicts from the DataPart artifact; each hotel is also
+    passed to `on_result` once the response is in. Replicas are balanced and
+    hedged as in call_flight_agent.
+    """
+    attempts = _attempts(stream_hotel_agent, replicas, balancer, query, deadline)
+    return await _collect(attempts, on_result, hedger)
 
 
-async def call_weather_agent(city: str) -> list[dict]:
+async def call_weather_agent(
+    replicas: Sequence[Replica],
+    city: str,
+    on_result: OnResult | None = None,
+    deadline: Deadline | None = None,
+    hedger: Hedger | None = None,
+    balancer: Balancer | None = None,
+) -> list[dict]:
     """
     Call the Weather Agent using SSE streaming (Section 5).
     Collects all daily forecast DataParts and returns them as a list.
+    Each day is also passed to `on_result` the moment its chunk arrives.
+    Replicas are balanced and hedged as in call_flight_agent.
     """
-    results: list[dict] = []
-    try:
-        async with httpx.AsyncClient(timeout=30.0) as http_client:
-            resolver = A2ACardResolver(http_client, AGENT_URLS["weather"])
-            card = await resolver.get_agent_card()
-            client = A2AClient(httpx_client=http_client, agent_card=card)
-
-            req = SendStreamingMessageRequest(
-                id=str(uuid4()),
-                params=MessageSendParams(
-                    message=_user_msg(f"Weather forecast for {city}")
-                ),
-            )
-            async for resp in client.send_message_streaming(req):
-                result = resp.root.result
-                if isinstance(result, TaskArtifactUpdateEvent):
-                    for part in result.artifact.parts:
-                        if isinstance(part.root, DataPart):
-                            results.append(part.root.data)
-    except Exception as exc:
-        logger.warning("Weather agent call failed: %s", exc)
-    return results
+    attempts = _attempts(stream_weather_agent, replicas, balancer, city, deadline)
+    return await _collect(attempts, on_result, hedger)
+
+
+async def stream_booking_agent(
+    url: str, http_client: httpx.AsyncClient, request: str, deadline: Deadline | None = None
+) -> AsyncIterator[dict]:
+    """
+    Start a booking task on one Booking Agent replica (Section 7 — Input Required)
+    and yield a single dict describing it: the agent pauses in input-required with
+    its first question. The orchestrator cancels the task once the reference is in
+    the plan (see cancel_booking_task); a client that wants to book sends `request`
+    to the Booking Agent itself.
+    """
+    with tracer.span("message/send", activate=False, url=url) as span:
+        client = await _a2a_client(url, http_client)
+        span.event("card_resolved")
+        req = SendMessageRequest(
+            id=str(uuid4()),
+            params=MessageSendParams(message=_user_msg(request)),
+        )
+        response = await client.send_message(req, http_kwargs=_http_kwargs(deadline, 15.0, span))
+    task = response.root.result
+    message = task.status.message
+    question = " ".join(
+        part.root.text for part in (message.parts if message else []) if isinstance(part.root, TextPart)
+    )
+    yield {
+        "agent_url": url,
+        "task_id": task.id,
+        "context_id": task.context_id,
+        "state": task.status.state.value,
+        "question": question,
+        "request": request,
+    }
+
+
+async def call_booking_agent(
+    replicas: Sequence[Replica],
+    request: str,
+    deadline: Deadline | None = None,
+    balancer: Balancer | None = None,
+) -> list[dict]:
+    """
+    Open a booking with the Booking Agent (Section 7).
+    Only the balancer's first replica is called: a booking is not idempotent,
+    so it is never hedged or coalesced.
+    """
+    attempts = _attempts(stream_booking_agent, replicas, balancer, request, deadline)
+    return await _collect(attempts[:1], None, None)
+
+
+async def cancel_booking_task(
+    http_client: httpx.AsyncClient, booking: dict, deadline: Deadline | None = None
+) -> str:
+    """
+    Cancel a booking task opened by call_booking_agent (Section 4 — tasks/cancel)
+    and return its new state. The Booking Agent drops the task's session.
+    """
+    url = booking["agent_url"]
+    with tracer.span("tasks/cancel", activate=False, url=url) as span:
+        client = await _a2a_client(url, http_client)
+        req = CancelTaskRequest(id=str(uuid4()), params=TaskIdParams(id=booking["task_id"]))
+        response = await client.cancel_task(req, http_kwargs=_http_kwargs(deadline, 5.0, span))
+    result = response.root
+    if not hasattr(result, "result"):
+        raise RuntimeError(result.error.message)
+    return result.result.status.state.value
 
 
 def _extract_city(user_input: str) -> str:
@@ -192,6 +493,155 @@ def _extract_city(user_input: str) -> str:
     return "Paris"
 
 
+def _batch_request(context: RequestContext) -> tuple[list[str], dict] | None:
+    """
+    Section 6 — a DataPart such as {"destinations": ["Paris", "London"],
+    "departure_date": "2026-03-15"} asks for one plan per destination.
+    Returns the de-duplicated destinations and the remaining options, or None.
+    """
+    if not context.message:
+        return None
+    for part in context.message.parts:
+        data = part.root.data if isinstance(part.root, DataPart) else None
+        if isinstance(data, dict) and isinstance(data.get("destinations"), list):
+            destinations: dict[str, str] = {}
+            for name in data["destinations"]:
+                name = " ".join(str(name).split())
+                if name:
+                    destinations.setdefault(name.casefold(), name.title())
+            options = {k: v for k, v in data.items() if k != "destinations"}
+            return list(destinations.values())[:MAX_BATCH_DESTINATIONS], options
+    return None
+
+
+async def _fail(
+    event_queue: EventQueue, task_id: str, context_id: str, text: str, metadata: dict | None = None
+) -> None:
+    """Finish the task as failed with an agent message explaining why."""
+    await event_queue.enqueue_event(
+        status_event(
+            task_id, context_id, TaskState.failed,
+            message=agent_message(text, metadata),
+            final=True,
+        )
+    )
+
+
+class _PartialResultStream:
+    """
+    Forwards downstream items as chunks of one artifact (Section 5 — Streaming).
+
+    The first item opens the artifact (append=False); later items reuse the
+    same artifact_id with append=True so clients can render them immediately.
+    Which item is the last one is only known once the call is over, so close()
+    then sends an empty chunk with last_chunk=True. reset() empties the
+    artifact (an empty chunk with append=False) before a retried call streams
+    its items again.
+    """
+
+    def __init__(
+        self, event_queue: EventQueue, task_id: str, context_id: str, name: str, description: str
+    ) -> None:
+        self.event_queue = event_queue
+        self.task_id = task_id
+        self.context_id = context_id
+        self.name = name
+        self.description = description
+        self.artifact_id = str(uuid4())
+        self.count = 0
+        self.opened = False
+        self.closed = False
+
+    async def __call__(self, item: dict) -> None:
+        await self.event_queue.enqueue_event(
+            artifact_event(
+                self.task_id, self.context_id, self.name,
+                data=item,
+                artifact_id=self.artifact_id,
+                description=self.description,
+                append=self.opened,
+                last_chunk=False,
+            )
+        )
+        self.count += 1
+        self.opened = True
+
+    async def reset(self) -> None:
+        """Drop the items streamed so far, e.g. by a failed attempt."""
+        if self.count == 0:
+            return
+        self.count = 0
+        await self.event_queue.enqueue_event(
+            artifact_event(
+                self.task_id, self.context_id, self.name,
+                parts=[],
+                artifact_id=self.artifact_id,
+                description=self.description,
+                append=False,
+                last_chunk=False,
+            )
+        )
+
+    async def close(self) -> None:
+        """Mark the artifact complete, if anything was streamed into it."""
+        if not self.opened or self.closed:
+            return
+        self.closed = True
+        await self.event_queue.enqueue_event(
+            artifact_event(
+                self.task_id, self.context_id, self.name,
+                parts=[],
+                artifact_id=self.artifact_id,
+                append=True,
+                last_chunk=True,
+            )
+        )
+
+
+class _OrchestrationLog:
+    """
+    Appends progress lines to one "orchestration_log" text artifact.
+
+    The final line is sent with last=True; close() ends the artifact instead
+    when a plan stops before reaching it.
+    """
+
+    def __init__(self, event_queue: EventQueue, task_id: str, context_id: str) -> None:
+        self.event_queue = event_queue
+        self.task_id = task_id
+        self.context_id = context_id
+        self.artifact_id = str(uuid4())
+        self.count = 0
+        self.closed = False
+
+    async def __call__(self, text: str, *, last: bool = False) -> None:
+        await self.event_queue.enqueue_event(
+            artifact_event(
+                self.task_id, self.context_id, "orchestration_log",
+                text=text,
+                artifact_id=self.artifact_id,
+                append=self.count > 0,
+                last_chunk=last,
+            )
+        )
+        self.count += 1
+        self.closed = last
+
+    async def close(self) -> None:
+        if self.count == 0 or self.closed:
+            return
+        self.closed = True
+        await self.event_queue.enqueue_event(
+            artifact_event(
+                self.task_id, self.context_id, "orchestration_log",
+                parts=[],
+                artifact_id=self.artifact_id,
+                append=True,
+                last_chunk=True,
+            )
+        )
+
+
 # ── Agent Executor ────────────────────────────────────────────────────────────
 class TravelOrchestratorExecutor(AgentExecutor):
     """
@@ -200,130 +650,527 @@ class TravelOrchestratorExecutor(AgentExecutor):
     1. Receives a natural-language travel request.
     2. Discovers all specialist agents by fetching their Agent Cards.
     3. Dispatches flight, hotel, and weather queries in parallel.
-    4. Aggregates results into a unified travel plan.
-    5. Emits the plan as a streaming artifact.
-    """
+    4. Streams each flight, hotel and forecast day as it arrives
+       (partial "flights" / "hotels" / "weather_forecast" artifacts).
+    5. Optionally, once flights and hotels are in, opens a booking with the
+       Booking Agent and cancels it again once the plan holds its reference.
+    6. Aggregates results into a unified travel plan.
+    7. Emits the plan as the final "travel_plan" artifact.
 
-    async def execute(self, context: RequestContext, event_queue: EventQueue) -> None:
-        task_id = context.task_id
-        context_id = context.context_id
+    Steps 2-5 are declared as a DAG (shared/workflow.py): discover ->
+    {flight, hotel, weather}; {flight, hotel} -> booking. Each step has a
+    timeout and retry budget (STEP_POLICIES) and its timing is appended to
+    the "orchestration_log" artifact.
 
-        # Section 4: submitted
-        await event_queue.enqueue_event(
-            TaskStatusUpdateEvent(
-                task_id=task_id,
-                context_id=context_id,
-                status=TaskStatus(state=TaskState.submitted, timestamp=_now()),
-                final=False,
+    The executor owns one pooled httpx.AsyncClient per replica URL, plus one
+    CircuitBreaker, Hedger, Balancer and SingleFlight group per agent role,
+    and a ResultCache shared by all roles. `startup()` / `shutdown()`
+    are wired to the app lifespan in create_app().
+    """
+
+    def __init__(
+        self,
+        http_pool: AgentHTTPPool | None = None,
+        stream_partials: bool = STREAM_PARTIALS,
+        result_cache: ResultCache | None = None,
+        book: bool = BOOK_AFTER_SEARCH,
+        admission: AdmissionController | None = None,
+    ) -> None:
+        self.http_pool = http_pool or AgentHTTPPool()
+        self.stream_partials = stream_partials
+        self.book = book
+        self.breakers = {name: CircuitBreaker(name) for name in AGENT_URLS}
+        self.hedgers = {name: Hedger(name) for name in AGENT_URLS}
+        self.balancers = {name: make_balancer(urls) for name, urls in AGENT_URLS.items()}
+        self.result_cache = result_cache or ResultCache.from_env()
+        self.single_flights = {name: SingleFlight(name) for name in AGENT_URLS}
+        self.admission = admission or AdmissionController(
+            "orchestrator", AdmissionConfig.from_env("ORCHESTRATOR", ORCHESTRATOR_ADMISSION)
+        )
+        agent_default = AdmissionConfig.from_env("A2A_AGENT", AGENT_ADMISSION)
+        self.agent_limits = {
+            name: AdmissionController(
+                name, AdmissionConfig.from_env(f"A2A_{name.upper()}_AGENT", agent_default)
             )
+            for name in AGENT_URLS
+        }
+        for name, urls in AGENT_URLS.items():
+            for url in urls:
+                self.http_pool.register(url, AGENT_HEADERS[name])
+
+    def _replicas(self, name: str) -> list[Replica]:
+        return [(url, self.http_pool.client(url)) for url in AGENT_URLS[name]]
+
+    async def startup(self) -> None:
+        for name in AGENT_URLS:
+            self._replicas(name)
+        logger.info(
+            "Opened pooled clients for %s",
+            ", ".join(f"{name} x{len(urls)}" for name, urls in AGENT_URLS.items()),
         )
 
-        user_input = context.get_user_input().strip() or "Plan a trip to Paris"
-        city = _extract_city(user_input)
-        logger.info("Orchestrator received: '%s' (city=%s)", user_input, city)
+    async def shutdown(self) -> None:
+        await self.http_pool.aclose()
 
-        # Section 4: working
-        await event_queue.enqueue_event(
-            TaskStatusUpdateEvent(
-                task_id=task_id,
-                context_id=context_id,
-                status=TaskStatus(state=TaskState.working, timestamp=_now()),
-                final=False,
+    def pool_metrics(self) -> dict[str, dict[str, dict]]:
+        """Connection reuse per agent role and replica URL."""
+        stats = self.http_pool.stats()
+        return {
+            name: {url: stats[url] for url in urls if url in stats}
+            for name, urls in AGENT_URLS.items()
+        }
+
+    def breaker_metrics(self) -> dict[str, dict]:
+        return {name: breaker.metrics() for name, breaker in self.breakers.items()}
+
+    def hedge_metrics(self) -> dict[str, dict]:
+        return {name: hedger.metrics() for name, hedger in self.hedgers.items()}
+
+    def balancer_metrics(self) -> dict[str, dict]:
+        return {name: balancer.metrics() for name, balancer in self.balancers.items()}
+
+    def cache_metrics(self) -> dict:
+        return self.result_cache.metrics()
+
+    def single_flight_metrics(self) -> dict[str, dict]:
+        return {name: group.metrics() for name, group in self.single_flights.items()}
+
+    def admission_metrics(self) -> dict:
+        return {
+            "orchestrator": self.admission.metrics(),
+            "agents": {name: limit.metrics() for name, limit in self.agent_limits.items()},
+        }
+
+    def collect_metrics(self) -> list[Counter | Gauge]:
+        """Metric families for GET /metrics, built from the *_metrics() dicts on every scrape."""
+        breaker_state = Gauge(
+            "a2a_circuit_breaker_state",
+            "1 for the breaker's current state, 0 for the others.",
+            ("agent", "state"),
+        )
+        breaker_calls = Counter(
+            "a2a_circuit_breaker_calls_total", "Calls let through, by outcome.", ("agent", "outcome")
+        )
+        breaker_opened = Counter(
+            "a2a_circuit_breaker_opened_total", "Times the breaker tripped open.", ("agent",)
+        )
+        breaker_rejected = Counter(
+            "a2a_circuit_breaker_rejected_total",
+            "Calls short-circuited without touching the network.",
+            ("agent",),
+        )
+        for name, breaker in self.breaker_metrics().items():
+            for state in BreakerState:
+                breaker_state.set(name, state.value, value=int(breaker["state"] == state.value))
+            breaker_calls.inc(name, "success", amount=breaker["successes"])
+            breaker_calls.inc(name, "failure", amount=breaker["failures"])
+            breaker_opened.inc(name, amount=breaker["times_opened"])
+            breaker_rejected.inc(name, amount=breaker["short_circuits"])
+
+        pool_requests = Counter(
+            "a2a_pool_requests_total", "Requests sent through the pooled client.", ("agent", "url")
+        )
+        pool_connections = Counter(
+            "a2a_pool_connections_opened_total",
+            "TCP connections opened by the pooled client.",
+            ("agent", "url"),
+        )
+        for name, replicas in self.pool_metrics().items():
+            for url, pool in replicas.items():
+                pool_requests.inc(name, url, amount=pool["requests"])
+                pool_connections.inc(name, url, amount=pool["connections_opened"])
+
+        hedge_counters = {
+            stat: Counter(metric, help, ("agent",))
+            for stat, metric, help in (
+                ("requests", "a2a_hedge_requests_total",
+                 "Calls run through the hedger (more than one replica)."),
+                ("hedges_sent", "a2a_hedges_sent_total", "Hedge requests sent to a second replica."),
+                ("hedge_wins", "a2a_hedge_wins_total", "Calls won by the hedge request."),
+                ("failovers", "a2a_hedge_failovers_total",
+                 "Attempts sent to another replica after the earlier ones failed."),
             )
+        }
+        hedge_delay = Gauge(
+            "a2a_hedge_delay_seconds", "Current delay before a hedge request is sent.", ("agent",)
         )
+        for name, hedger in self.hedge_metrics().items():
+            for stat, counter in hedge_counters.items():
+                counter.inc(name, amount=hedger[stat])
+            hedge_delay.set(name, value=hedger["delay_s"])
 
-        # ── Step 1: Discover agents in parallel (Section 2 — Agent Cards) ──────
-        await event_queue.enqueue_event(
-            TaskArtifactUpdateEvent(
-                task_id=task_id,
-                context_id=context_id,
-                artifact=Artifact(
-                    artifact_id=str(uuid4()),
-                    name="orchestration_log",
-                    parts=[Part(root=TextPart(
-                        text=f"[1/4] Discovering specialist agents for trip to {city}..."
-                    ))],
-                ),
-                append=False,
-                last_chunk=False,
+        balancer_strategy = Gauge(
+            "a2a_balancer_strategy", "1 for the agent's load-balancing strategy.", ("agent", "strategy")
+        )
+        replica_requests = Counter(
+            "a2a_balancer_requests_total", "Attempts sent to the replica.", ("agent", "url")
+        )
+        replica_failures = Counter(
+            "a2a_balancer_failures_total", "Attempts to the replica that failed.", ("agent", "url")
+        )
+        replica_outstanding = Gauge(
+            "a2a_balancer_outstanding", "Attempts to the replica in flight.", ("agent", "url")
+        )
+        replica_latency = Gauge(
+            "a2a_balancer_latency_ewma_seconds",
+            "EWMA of the replica's latency, as the balancer sees it.",
+            ("agent", "url"),
+        )
+        for name, balancer in self.balancer_metrics().items():
+            balancer_strategy.set(name, balancer["strategy"], value=1)
+            for url, replica in balancer["replicas"].items():
+                replica_requests.inc(name, url, amount=replica["requests"])
+                replica_failures.inc(name, url, amount=replica["failures"])
+                replica_outstanding.set(name, url, value=replica["outstanding"])
+                if replica["ewma_s"] is not None:
+                    replica_latency.set(name, url, value=replica["ewma_s"])
+
+        admission = self.admission_metrics()
+        limiters = {"orchestrator": admission["orchestrator"], **admission["agents"]}
+        admission_gauges = {
+            stat: Gauge(metric, help, ("limiter",))
+            for stat, metric, help in (
+                ("active", "a2a_admission_active", "Calls holding a concurrency slot."),
+                ("waiting", "a2a_admission_waiting", "Calls queued for a slot."),
+                ("max_concurrent", "a2a_admission_max_concurrent", "Concurrency limit."),
+                ("max_queue", "a2a_admission_max_queue", "Longest allowed wait queue."),
             )
+        }
+        admitted = Counter(
+            "a2a_admission_admitted_total", "Calls given a concurrency slot.", ("limiter",)
+        )
+        rejected = Counter(
+            "a2a_admission_rejected_total",
+            "Calls turned away: queue full, waited too long for a slot or deadline already passed.",
+            ("limiter", "reason"),
+        )
+        for name, limiter in limiters.items():
+            for stat, gauge in admission_gauges.items():
+                gauge.set(name, value=limiter[stat])
+            admitted.inc(name, amount=limiter["admitted"])
+            rejected.inc(name, "queue_full", amount=limiter["rejected_queue_full"])
+            rejected.inc(name, "wait_exceeded", amount=limiter["rejected_wait_exceeded"])
+            rejected.inc(name, "deadline_exceeded", amount=limiter["rejected_deadline_exceeded"])
+
+        cache = self.cache_metrics()
+        cache_counters = []
+        for stat, help in (
+            ("hits", "Result cache lookups served from the cache."),
+            ("misses", "Result cache lookups that went to the agent."),
+            ("evictions", "Entries evicted to stay within the byte budget."),
+            ("expirations", "Entries dropped once their TTL had passed."),
+        ):
+            counter = Counter(f"a2a_result_cache_{stat}_total", help)
+            counter.inc(amount=cache[stat])
+            cache_counters.append(counter)
+        cache_entries = Gauge("a2a_result_cache_entries", "Entries in the result cache.")
+        cache_entries.set(value=cache["entries"])
+        cache_bytes = Gauge("a2a_result_cache_size_bytes", "JSON size of the cached results.")
+        cache_bytes.set(value=cache["size_bytes"])
+
+        sf_calls = Counter(
+            "a2a_single_flight_calls_total", "Shared downstream calls started.", ("agent",)
+        )
+        sf_coalesced = Counter(
+            "a2a_single_flight_coalesced_total", "Calls that joined one already in flight.", ("agent",)
         )
+        sf_inflight = Gauge("a2a_single_flight_inflight", "Shared calls in flight.", ("agent",))
+        for name, group in self.single_flight_metrics().items():
+            sf_calls.inc(name, amount=group["calls"])
+            sf_coalesced.inc(name, amount=group["coalesced"])
+            sf_inflight.set(name, value=group["inflight"])
+        return [
+            breaker_state, breaker_calls, breaker_opened, breaker_rejected,
+            pool_requests, pool_connections,
+            *hedge_counters.values(), hedge_delay,
+            balancer_strategy, replica_requests, replica_failures, replica_outstanding, replica_latency,
+            *admission_gauges.values(), admitted, rejected,
+            *cache_counters, cache_entries, cache_bytes,
+            sf_calls, sf_coalesced, sf_inflight,
+        ]
+
+    async def _guarded(
+        self, name: str, call: Callable[[], Awaitable[list[dict]]], deadline: Deadline
+    ) -> list[dict]:
+        """One downstream call within the agent's concurrency limit and through its breaker."""
+        async with self.agent_limits[name].slot(deadline):
+            return await self.breakers[name].call(partial(_within_deadline, call, deadline))
 
+    async def _call_agent(
+        self,
+        name: str,
+        call: Callable[[], Awaitable[list[dict]]] | SharedCall,
+        deadline: Deadline | None = None,
+        key: str | None = None,
+        on_result: OnResult | None = None,
+    ) -> tuple[list[dict], str]:
+        """
+        Section 10 — Run one downstream call within the agent's concurrency
+        limit and through its circuit breaker.
+
+        With a `key`, `call` is a SharedCall and concurrent calls with the
+        same key are coalesced above the limit and the breaker: they share one
+        downstream call, which takes one slot and records one breaker outcome.
+        Each caller receives every item through its own `on_result` and stops
+        waiting at its own deadline; the shared call runs until the latest of
+        its callers' deadlines and is cancelled once all of them have gone.
+
+        Never raises: returns the results and a status of "ok", "failed",
+        "circuit_open" (short-circuited without touching the network),
+        "overloaded" (no concurrency slot for this agent; not counted against
+        its breaker) or "deadline_exceeded" (the caller's budget ran out, or
+        the call failed after it had, e.g. on an HTTP timeout bounded by it;
+        not counted against the agent's breaker, and not worth retrying).
+        """
+        deadline = deadline or Deadline()
+        try:
+            if key is not None:
+                return await self.single_flights[name].call(
+                    key,
+                    lambda publish, shared: self._guarded(name, partial(call, publish, shared), shared),
+                    on_result,
+                    deadline,
+                ), "ok"
+            async with self.agent_limits[name].slot(deadline):
+                return await asyncio.wait_for(
+                    self.breakers[name].call(partial(_within_deadline, call, deadline)),
+                    deadline.remaining(),
+                ), "ok"
+        except AdmissionRejected as exc:
+            logger.warning("Skipping %s agent: %s", name, exc)
+            return [], "overloaded" if exc.retry_after is not None else "deadline_exceeded"
+        except (TimeoutError, DeadlineExceeded):
+            logger.warning("%s agent call abandoned: deadline exceeded", name.title())
+            return [], "deadline_exceeded"
+        except CircuitOpenError as exc:
+            logger.warning("Skipping %s agent: %s", name, exc)
+            return [], "circuit_open"
+        except Exception as exc:
+            logger.warning("%s agent call failed: %s", name.title(), exc)
+            return [], "failed"
+
+    async def _cached_call(
+        self,
+        name: str,
+        key: str,
+        call: SharedCall,
+        on_result: OnResult | None = None,
+        deadline: Deadline | None = None,
+    ) -> tuple[list[dict], str]:
+        """
+        `_call_agent`, coalesced by `key`, behind the result cache.
+
+        A hit replays the cached items through `on_result` and returns status
+        "cached" without any network I/O; only "ok" results are stored.
+        """
+        with tracer.span(f"call {name}", agent=name, key=key) as span:
+            cached = self.result_cache.get(name, key)
+            if cached is not None:
+                logger.info("%s result cache hit for %r", name.title(), key)
+                if on_result is not None:
+                    for item in cached:
+                        await on_result(item)
+                span.set(status="cached", results=len(cached))
+                return cached, "cached"
+            results, status = await self._call_agent(name, call, deadline, key, on_result)
+            if status == "ok":
+                self.result_cache.put(name, key, results)
+            span.set(status=status, results=len(results))
+            return results, status
+
+    async def _release_booking(self, booking: dict, deadline: Deadline) -> None:
+        """
+        Cancel the booking task once the plan holds its reference.
+
+        Nobody answers the Booking Agent's questions through the orchestrator,
+        so the task would otherwise wait in input-required for good, keeping a
+        session on the agent. Best effort: a failed cancel is only logged.
+        """
+        try:
+            booking["state"] = await cancel_booking_task(
+                self.http_pool.client(booking["agent_url"]), booking, deadline
+            )
+        except Exception as exc:
+            logger.warning("Could not cancel booking task %s: %s", booking["task_id"], exc)
+
+    async def execute(self, context: RequestContext, event_queue: EventQueue) -> None:
+        """
+        Section 10 — Admission control: at most `max_concurrent` plans run at
+        once and a bounded number wait for a slot. Anything beyond that fails
+        fast with a retry hint instead of piling onto the downstream agents.
+        """
+        deadline = Deadline.from_context(context)
+        span = current_span()
+        try:
+            async with self.admission.slot(deadline):
+                if span is not None:
+                    span.event("admitted")
+                await self._plan(context, event_queue, deadline)
+        except AdmissionRejected as exc:
+            logger.warning("Rejecting plan request: %s", exc)
+            if span is not None:
+                span.set(rejected=exc.reason)
+            if exc.retry_after is None:
+                await _fail(
+                    event_queue, context.task_id, context.context_id,
+                    "Deadline exceeded before the plan was started.",
+                )
+                return
+            await _fail(
+                event_queue, context.task_id, context.context_id,
+                f"Orchestrator busy ({exc.reason}); retry in {exc.retry_after:.0f}s.",
+                {"retry_after_s": exc.retry_after},
+            )
+
+    # ── Workflow building blocks (Section 11) ─────────────────────────────────
+    async def _discover(self, deadline: Deadline) -> dict[str, AgentCard | None]:
+        """Section 2: probe every replica; agents behind an open breaker are skipped."""
         discover_tasks = [
-            discover_agent("flight", AGENT_URLS["flight"], {"Authorization": f"Bearer {FLIGHT_TOKEN}"}),
-            discover_agent("hotel", AGENT_URLS["hotel"], {"X-Api-Key": HOTEL_API_KEY}),
-            discover_agent("weather", AGENT_URLS["weather"], {}),
+            discover_agent(name, url, client, deadline)
+            for name in AGENT_URLS
+            if self.breakers[name].state is not BreakerState.open
+            for url, client in self._replicas(name)
         ]
-        discovery_results = await asyncio.gather(*discover_tasks, return_exceptions=True)
-        discovered = {}
-        for res in discovery_results:
+        discovered: dict[str, AgentCard | None] = {}
+        with tracer.span("discover", replicas=len(discover_tasks)):
+            responses = await asyncio.gather(*discover_tasks, return_exceptions=True)
+        for res in responses:
             if isinstance(res, tuple):
                 name, card = res
-                discovered[name] = card
-                status = f"✓ {card.name}" if card else "✗ unreachable"
-                logger.info("Agent '%s': %s", name, status)
+                discovered[name] = discovered.get(name) or card
+        for name, card in discovered.items():
+            status = f"✓ {card.name}" if card else "✗ unreachable"
+            logger.info("Agent '%s': %s", name, status)
+        return discovered
 
-        # ── Step 2: Parallel fan-out to all specialist agents ──────────────────
-        await event_queue.enqueue_event(
-            TaskArtifactUpdateEvent(
-                task_id=task_id,
-                context_id=context_id,
-                artifact=Artifact(
-                    artifact_id=str(uuid4()),
-                    name="orchestration_log",
-                    parts=[Part(root=TextPart(
-                        text="[2/4] Dispatching parallel requests: flights, hotels, weather..."
-                    ))],
-                ),
-                append=True,
-                last_chunk=False,
+    def _destination_steps(
+        self,
+        city: str,
+        departure_date: str,
+        deadline: Deadline,
+        discover: Callable[[dict], Awaitable[dict]],
+        partials: tuple[OnResult | None, OnResult | None, OnResult | None] = (None, None, None),
+        book: bool = False,
+    ) -> list[Step]:
+        """
+        The DAG for one destination: discover -> {flight, hotel, weather};
+        {flight, hotel} -> booking.
+        """
+        on_flight, on_hotel, on_weather = partials
+
+        def agent_step(
+            name: str, key: str, call: SharedCall, on_result: OnResult | None
+        ) -> Callable[[dict], Awaitable[tuple[list[dict], str]]]:
+            attempts = 0
+
+            async def run(_inputs: dict) -> tuple[list[dict], str]:
+                nonlocal attempts
+                attempts += 1
+                if attempts > 1 and isinstance(on_result, _PartialResultStream):
+                    # The retry streams its items again; the plan keeps only its results.
+                    await on_result.reset()
+                results, status = await self._cached_call(name, key, call, on_result, deadline)
+                if status == "failed":
+                    raise RuntimeError(f"{name} agent call failed")  # let the workflow retry
+                if status not in ("ok", "cached"):
+                    # Short-circuited, shed or out of budget: retrying now would not help.
+                    raise StepDegraded(f"{name} agent call {status.replace('_', ' ')}", (results, status))
+                return results, status
+            return run
+
+        async def booking(inputs: dict) -> list[dict]:
+            # Section 7: open a booking for the cheapest flight + hotel once both are known.
+            flights, _ = inputs["flight"]
+            hotels, _ = inputs["hotel"]
+            if not book:
+                raise StepSkipped("booking not requested")
+            if not (flights and hotels):
+                raise StepSkipped("no flight or hotel to book")
+            flight = min(flights, key=lambda f: f.get("price_usd", float("inf")))
+            hotel = min(hotels, key=lambda h: h.get("price_per_night_usd", float("inf")))
+            request = (
+                f"Book flight {flight.get('iata_code', flight.get('flight_id'))} "
+                f"to {city} on {departure_date} and {hotel.get('name')}"
             )
-        )
+            with tracer.span("call booking", agent="booking") as span:
+                results, status = await self._call_agent("booking", lambda: call_booking_agent(
+                    self._replicas("booking"), request, deadline, self.balancers["booking"],
+                ), deadline)
+                span.set(status=status)
+            if status != "ok":
+                raise RuntimeError(f"booking agent call {status.replace('_', ' ')}")
+            for opened in results:
+                await self._release_booking(opened, deadline)
+            return results
 
-        flight_results, hotel_results, weather_results = await asyncio.gather(
-            call_flight_agent(f"Find flights from New York to {city} on 2026-03-15"),
-            call_hotel_agent(f"Hotels in {city}"),
-            call_weather_agent(city),
-            return_exceptions=True,
-        )
+        return [
+            Step("discover", discover, **STEP_POLICIES["discover"]),
+            Step("flight", agent_step(
+                "flight", normalize_key(city, departure_date), lambda publish, shared: call_flight_agent(
+                    self._replicas("flight"),
+                    f"Find flights from New York to {city} on {departure_date}",
+                    publish,
+                    shared,
+                    self.hedgers["flight"], self.balancers["flight"],
+                ), on_flight,
+            ), after=("discover",), **STEP_POLICIES["flight"]),
+            Step("hotel", agent_step(
+                "hotel", normalize_key(city, departure_date), lambda publish, shared: call_hotel_agent(
+                    self._replicas("hotel"), f"Hotels in {city}", publish, shared,
+                    self.hedgers["hotel"], self.balancers["hotel"],
+                ), on_hotel,
+            ), after=("discover",), **STEP_POLICIES["hotel"]),
+            Step("weather", agent_step(
+                "weather", normalize_key(city), lambda publish, shared: call_weather_agent(
+                    self._replicas("weather"), city, publish, shared,
+                    self.hedgers["weather"], self.balancers["weather"],
+                ), on_weather,
+            ), after=("discover",), **STEP_POLICIES["weather"]),
+            Step("booking", booking, after=("flight", "hotel"), **STEP_POLICIES["booking"]),
+        ]
 
-        # Normalise exception results to empty lists
-        if isinstance(flight_results, Exception):
-            logger.warning("Flight agent error: %s", flight_results)
-            flight_results = []
-        if isinstance(hotel_results, Exception):
-            logger.warning("Hotel agent error: %s", hotel_results)
-            hotel_results = []
-        if isinstance(weather_results, Exception):
-            logger.warning("Weather agent error: %s", weather_results)
-            weather_results = []
+    async def _plan_destination(
+        self,
+        city: str,
+        user_input: str,
+        departure_date: str,
+        deadline: Deadline,
+        discover: Callable[[dict], Awaitable[dict]],
+        partials: tuple[OnResult | None, OnResult | None, OnResult | None] = (None, None, None),
+        book: bool = False,
+        on_step: Callable[[StepResult], Awaitable[None]] | None = None,
+    ) -> dict:
+        """Run the destination's workflow and aggregate it into a travel plan dict."""
+        with tracer.span("plan_destination", destination=city) as span:
+            steps = self._destination_steps(city, departure_date, deadline, discover, partials, book)
+            outcome = await Workflow(steps).run(on_step)
+            with tracer.span("aggregate", destination=city):
+                plan = self._aggregate(city, user_input, outcome)
+            plan["trace_id"] = span.trace_id
+            return plan
 
-        # ── Step 3: Aggregate results ──────────────────────────────────────────
-        await event_queue.enqueue_event(
-            TaskArtifactUpdateEvent(
-                task_id=task_id,
-                context_id=context_id,
-                artifact=Artifact(
-                    artifact_id=str(uuid4()),
-                    name="orchestration_log",
-                    parts=[Part(root=TextPart(
-                        text=(
-                            f"[3/4] Aggregating results: "
-                            f"{len(flight_results)} flights, "
-                            f"{len(hotel_results)} hotels, "
-                            f"{len(weather_results)} weather days."
-                        )
-                    ))],
-                ),
-                append=True,
-                last_chunk=False,
+    @staticmethod
+    def _aggregate(city: str, user_input: str, outcome: dict[str, StepResult]) -> dict:
+        """The travel plan dict for one destination's finished workflow."""
+        discovered = outcome["discover"].value or {}
+        agent_results: dict[str, list[dict]] = {}
+        agent_status: dict[str, str] = {}
+        for name in ("flight", "hotel", "weather"):
+            step = outcome[name]
+            agent_results[name], agent_status[name] = (
+                step.value if step.value is not None else ([], step.status.value)
             )
+        flight_results = agent_results["flight"]
+        hotel_results = agent_results["hotel"]
+        weather_results = agent_results["weather"]
+        degraded = sorted(
+            name for name, status in agent_status.items() if status not in ("ok", "cached")
         )
-
-        travel_plan = {
+        booking_step = outcome["booking"]
+        return {
             "destination": city,
             "original_request": user_input,
-            "generated_at": _now(),
+            "generated_at": now(),
             "agents_used": list(discovered.keys()),
             "summary": (
                 f"Found {len(flight_results)} flight(s), "
@@ -333,19 +1180,118 @@ class TravelOrchestratorExecutor(AgentExecutor):
             "flights": flight_results,
             "hotels": hotel_results,
             "weather_forecast": weather_results,
+            "booking": booking_step.value[0] if booking_step.ok and booking_step.value else None,
+            "degraded": bool(degraded),
+            "agent_status": agent_status,
+            "workflow": {name: step.as_dict() for name, step in outcome.items()},
         }
 
+    async def _plan(
+        self, context: RequestContext, event_queue: EventQueue, deadline: Deadline
+    ) -> None:
+        task_id = context.task_id
+        context_id = context.context_id
+
+        # Section 4: submitted
+        await event_queue.enqueue_event(status_event(task_id, context_id, TaskState.submitted))
+
+        user_input = context.get_user_input().strip() or "Plan a trip to Paris"
+        city = _extract_city(user_input)
+        metadata = (context.message.metadata if context.message else None) or {}
+        stream_partials = bool(metadata.get("stream_partials", self.stream_partials))
+        departure_date = str(metadata.get("departure_date") or DEFAULT_DEPARTURE_DATE)
+        book = bool(metadata.get("book", self.book))
+        batch = _batch_request(context)
+        log = _OrchestrationLog(event_queue, task_id, context_id)
+        logger.info("Orchestrator received: '%s' (city=%s)", user_input, city)
+
+        # Section 4: working
+        await event_queue.enqueue_event(status_event(task_id, context_id, TaskState.working))
+
+        if batch is not None:
+            destinations, options = batch
+            await self._plan_batch(
+                destinations,
+                str(options.get("departure_date") or departure_date),
+                deadline,
+                event_queue,
+                task_id,
+                context_id,
+                log,
+            )
+            return
+
+        # ── Step 1: Declare the workflow (Section 11) ──────────────────────────
+        await log(f"[1/4] Discovering specialist agents for trip to {city}...")
+
+        partials = (None, None, None)
+        if stream_partials:
+            partials = tuple(
+                _PartialResultStream(
+                    event_queue, task_id, context_id, name, f"{label} for {city} (partial, streamed)"
+                )
+                for name, label in (
+                    ("flights", "Flights"),
+                    ("hotels", "Hotels"),
+                    ("weather_forecast", "Weather forecast"),
+                )
+            )
+
+        streams = dict(zip(("flight", "hotel", "weather"), partials))
+
+        # ── Step 2: Run it — each step starts as soon as its inputs are ready ──
+        async def on_step(result: StepResult) -> None:
+            retries = f", {result.attempts} attempts" if result.attempts > 1 else ""
+            reason = f" ({result.error})" if result.error else ""
+            await log(
+                f"  - {result.name}: {result.status.value} in "
+                f"{result.duration * 1000:.0f} ms{retries}{reason}"
+            )
+            if result.name == "discover":
+                await log("[2/4] Dispatching parallel requests: flights, hotels, weather...")
+            stream = streams.get(result.name)
+            if stream is not None:
+                await stream.close()  # the agent's items are all in
+
+        travel_plan = await self._plan_destination(
+            city,
+            user_input,
+            departure_date,
+            deadline,
+            lambda _inputs: self._discover(deadline),
+            partials,
+            book,
+            on_step,
+        )
+
+        # Section 10: the caller has given up — stop here instead of building a plan.
+        if deadline.expired():
+            logger.warning("Deadline exceeded while planning trip to %s", city)
+            await log.close()
+            await _fail(
+                event_queue, task_id, context_id,
+                f"Deadline exceeded before the plan for {city} was ready.",
+            )
+            return
+
+        # ── Step 3: Aggregate results ──────────────────────────────────────────
+        degraded = [name for name, status in travel_plan["agent_status"].items()
+                    if status not in ("ok", "cached")]
+        await log(
+            f"[3/4] Aggregating results: "
+            f"{len(travel_plan['flights'])} flights, "
+            f"{len(travel_plan['hotels'])} hotels, "
+            f"{len(travel_plan['weather_forecast'])} weather days."
+            + (f" Degraded: {', '.join(degraded)}." if degraded else ""),
+            last=True,
+        )
+
         # ── Step 4: Emit final travel plan artifact ────────────────────────────
         await event_queue.enqueue_event(
-            TaskArtifactUpdateEvent(
-                task_id=task_id,
-                context_id=context_id,
-                artifact=Artifact(
-                    artifact_id=str(uuid4()),
-                    name="travel_plan",
-                    description=f"Complete travel plan for {city}",
-                    parts=[Part(root=DataPart(data=travel_plan))],
-                ),
+            artifact_event(
+                task_id, context_id, "travel_plan",
+                data=travel_plan,
+                description=f"Complete travel plan for {city}",
                 append=False,
                 last_chunk=True,
             )
@@ -355,22 +1301,105 @@ class TravelOrchestratorExecutor(AgentExecutor):
 
         # Section 4: completed
         await event_queue.enqueue_event(
-            TaskStatusUpdateEvent(
-                task_id=task_id,
-                context_id=context_id,
-                status=TaskStatus(state=TaskState.completed, timestamp=_now()),
-                final=True,
+            status_event(task_id, context_id, TaskState.completed, final=True)
+        )
+
+    async def _plan_batch(
+        self,
+        destinations: list[str],
+        departure_date: str,
+        deadline: Deadline,
+        event_queue: EventQueue,
+        task_id: str,
+        context_id: str,
+        log: "_OrchestrationLog",
+    ) -> None:
+        """
+        Plan many destinations in one task: one "travel_plan" artifact per
+        destination, streamed as each completes, then a "batch_summary".
+
+        Discovery runs once for the whole batch; pooled clients, the result
+        cache, request coalescing and per-agent concurrency limits are shared
+        by every destination. No bookings are opened for a batch.
+        """
+        count = len(destinations)
+        logger.info("Batch request for %d destinations", count)
+        await log(f"[1/3] Discovering specialist agents for {count} destinations...")
+        discovered = await self._discover(deadline)
+
+        async def shared_discovery(_inputs: dict) -> dict[str, AgentCard | None]:
+            return discovered
+
+        await log(
+            f"[2/3] Planning {count} destinations, up to {BATCH_CONCURRENCY} at a time..."
+        )
+        fan_out = asyncio.Semaphore(BATCH_CONCURRENCY)
+        summaries: dict[str, dict] = {}
+
+        async def plan_one(index: int, city: str) -> None:
+            async with fan_out:
+                plan = await self._plan_destination(
+                    city, f"Plan a trip to {city}", departure_date, deadline, shared_discovery
+                )
+            await event_queue.enqueue_event(
+                artifact_event(
+                    task_id, context_id, "travel_plan",
+                    data=plan,
+                    description=f"Travel plan for {city} ({index + 1}/{count})",
+                    metadata={"destination": city, "batch_index": index},
+                    append=False,
+                    last_chunk=True,
+                )
+            )
+            summaries[city] = {
+                "destination": city,
+                "summary": plan["summary"],
+                "cheapest_flight_usd": min(
+                    (f["price_usd"] for f in plan["flights"] if "price_usd" in f), default=None
+                ),
+                "cheapest_hotel_per_night_usd": min(
+                    (h["price_per_night_usd"] for h in plan["hotels"] if "price_per_night_usd" in h),
+                    default=None,
+                ),
+                "degraded": plan["degraded"],
+            }
+            await log(f"  - {city}: {plan['summary']}")
+
+        await asyncio.gather(*(plan_one(i, city) for i, city in enumerate(destinations)))
+
+        if deadline.expired():
+            logger.warning("Deadline exceeded while planning %d destinations", count)
+            await log.close()
+            await _fail(
+                event_queue, task_id, context_id,
+                f"Deadline exceeded after {len(summaries)} of {count} destination plans.",
+            )
+            return
+
+        await log(f"[3/3] Completed {count} destination plans.", last=True)
+        await event_queue.enqueue_event(
+            artifact_event(
+                task_id, context_id, "batch_summary",
+                data={
+                    "departure_date": departure_date,
+                    "generated_at": now(),
+                    "destinations": [summaries[city] for city in destinations],
+                },
+                description=f"Comparison of {count} destinations",
+                append=False,
+                last_chunk=True,
             )
         )
+        logger.info("Batch of %d travel plans generated", count)
+
+        # Section 4: completed
+        await event_queue.enqueue_event(
+            status_event(task_id, context_id, TaskState.completed, final=True)
+        )
 
     async def cancel(self, context: RequestContext, event_queue: EventQueue) -> None:
         await event_queue.enqueue_event(
-            TaskStatusUpdateEvent(
-                task_id=context.task_id,
-                context_id=context.context_id,
-                status=TaskStatus(state=TaskState.canceled, timestamp=_now()),
-                final=True,
-            )
+            status_event(context.task_id, context.context_id, TaskState.canceled, final=True)
         )
 
 
@@ -411,11 +1440,30 @@ def build_agent_card() -> AgentCard:
 
 def create_app():
     agent_card = build_agent_card()
+    executor = TravelOrchestratorExecutor()
+    metrics = ServiceMetrics("orchestrator")
+
+    @asynccontextmanager
+    async def lifespan(_app):
+        await executor.startup()
+        yield
+        await executor.shutdown()
+        tracer.close()
+
     handler = DefaultRequestHandler(
-        agent_executor=TravelOrchestratorExecutor(),
+        agent_executor=metrics.instrument(tracer.instrument(executor)),
         task_store=InMemoryTaskStore(),
     )
-    return A2AFastAPIApplication(agent_card=agent_card, http_handler=handler).build()
+    app = A2AFastAPIApplication(agent_card=agent_card, http_handler=handler).build(
+        lifespan=lifespan
+    )
+    serve_cached_agent_card(app, agent_card)
+    reject_when_saturated(app, executor.admission)
+    metrics.install(app)
+    metrics.register_collector(executor.collect_metrics)
+    tracer.install(app)
+    record_requests(app, "orchestrator")
+    return app
 
 
 app = create_app()
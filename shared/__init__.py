@@ -0,0 +1,9 @@
+"""
+shared/
+=======
+Infrastructure shared by the agents, the orchestrator and the client.
+
+Entry-point scripts (``python agents/flight_agent.py`` etc.) put the repository
+root on ``sys.path`` so that ``from shared.<module> import ...`` works no
+matter which directory the script is started from.
+"""
@@ -0,0 +1,191 @@
+"""
+shared/admission.py
+===================
+Bounded concurrency and admission control (Section 10 — Error Handling).
+
+Demonstrates:
+- Limiting how many units of work run at once with a semaphore
+- A bounded admission queue: callers beyond the limit wait, but only up to
+  `max_queue` of them and only for `max_wait` seconds (or the caller's
+  remaining deadline, if shorter)
+- Rejecting immediately with `AdmissionRejected` and a retry hint when the
+  queue is full, so the server sheds load instead of collapsing
+- Rejecting work whose caller's deadline has already passed, without a retry
+  hint: retrying it cannot help
+- A FastAPI middleware that answers `503 Service Unavailable` with
+  `Retry-After` for new messages while the queue is already full
+
+The retry hint is the average time a slot is held, scaled by how many
+callers are ahead, rounded up to whole seconds.
+
+Configuration (environment variables, all optional; PREFIX is chosen by the
+caller, e.g. ORCHESTRATOR or A2A_AGENT):
+    {PREFIX}_MAX_CONCURRENT   slots running at once
+    {PREFIX}_MAX_QUEUE        callers allowed to wait for a slot
+    {PREFIX}_MAX_QUEUE_WAIT   seconds a caller may wait
+"""
+
+import asyncio
+import json
+import logging
+import math
+import os
+import time
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+from shared.deadline import Deadline
+
+logger = logging.getLogger(__name__)
+
+
+class AdmissionRejected(Exception):
+    """
+    Raised instead of admitting work when the limit and its queue are
+    exhausted, or when the caller's deadline has already passed (then
+    `retry_after` is None).
+    """
+
+    def __init__(self, name: str, reason: str, retry_after: float | None) -> None:
+        hint = "" if retry_after is None else f" (retry in {retry_after:.0f}s)"
+        super().__init__(f"'{name}' rejected work: {reason}{hint}")
+        self.name = name
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+@dataclass(frozen=True)
+class AdmissionConfig:
+    max_concurrent: int = 16
+    max_queue: int = 64
+    max_wait: float = 5.0
+
+    @classmethod
+    def from_env(cls, prefix: str, default: "AdmissionConfig | None" = None) -> "AdmissionConfig":
+        default = default or cls()
+        return cls(
+            max_concurrent=int(os.getenv(f"{prefix}_MAX_CONCURRENT", default.max_concurrent)),
+            max_queue=int(os.getenv(f"{prefix}_MAX_QUEUE", default.max_queue)),
+            max_wait=float(os.getenv(f"{prefix}_MAX_QUEUE_WAIT", default.max_wait)),
+        )
+
+
+class AdmissionController:
+    """A semaphore with a bounded, time-limited wait queue."""
+
+    def __init__(self, name: str, config: AdmissionConfig | None = None) -> None:
+        self.name = name
+        self.config = config or AdmissionConfig()
+        self._slots = asyncio.Semaphore(self.config.max_concurrent)
+        self._hold_ewma: float | None = None
+        self.active = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.rejected_full = 0
+        self.rejected_wait = 0
+        self.rejected_deadline = 0
+
+    @property
+    def saturated(self) -> bool:
+        """True when a new caller would be rejected without waiting."""
+        return self.active >= self.config.max_concurrent and self.waiting >= self.config.max_queue
+
+    def retry_after(self) -> float:
+        hold = self._hold_ewma or 1.0
+        ahead = self.waiting + 1
+        return float(max(1, math.ceil(hold * ahead / max(1, self.config.max_concurrent))))
+
+    @asynccontextmanager
+    async def slot(self, deadline: Deadline | None = None) -> AsyncIterator[None]:
+        """Hold one slot for the duration of the block, or raise AdmissionRejected."""
+        await self._acquire(deadline)
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self.active -= 1
+            self._slots.release()
+            held = time.monotonic() - started
+            if self._hold_ewma is None:
+                self._hold_ewma = held
+            else:
+                self._hold_ewma += 0.2 * (held - self._hold_ewma)
+
+    def metrics(self) -> dict:
+        return {
+            "active": self.active,
+            "waiting": self.waiting,
+            "admitted": self.admitted,
+            "rejected_queue_full": self.rejected_full,
+            "rejected_wait_exceeded": self.rejected_wait,
+            "rejected_deadline_exceeded": self.rejected_deadline,
+            "max_concurrent": self.config.max_concurrent,
+            "max_queue": self.config.max_queue,
+        }
+
+    # ── Internals ─────────────────────────────────────────────────────────────
+    async def _acquire(self, deadline: Deadline | None) -> None:
+        if deadline is not None and deadline.expired():
+            # Nobody is waiting for the result; no slot or retry will change that.
+            self.rejected_deadline += 1
+            raise AdmissionRejected(self.name, "deadline exceeded", None)
+        if self._slots.locked():
+            if self.waiting >= self.config.max_queue:
+                self.rejected_full += 1
+                raise AdmissionRejected(self.name, "queue full", self.retry_after())
+            wait = (deadline or Deadline()).timeout(self.config.max_wait)
+            self.waiting += 1
+            try:
+                await asyncio.wait_for(self._slots.acquire(), wait)
+            except TimeoutError:
+                self.rejected_wait += 1
+                raise AdmissionRejected(
+                    self.name, f"no slot within {wait:.1f}s", self.retry_after()
+                ) from None
+            finally:
+                self.waiting -= 1
+        else:
+            await self._slots.acquire()
+        self.active += 1
+        self.admitted += 1
+
+
+def reject_when_saturated(
+    app: FastAPI,
+    controller: AdmissionController,
+    methods: tuple[str, ...] = ("message/send", "message/stream"),
+) -> None:
+    """
+    Answer new JSON-RPC `methods` with 503 + Retry-After while `controller`
+    is saturated. Other calls (tasks/get, tasks/cancel, ...) still go through.
+    """
+
+    @app.middleware("http")
+    async def _shed_load(request: Request, call_next):
+        if request.method == "POST" and controller.saturated:
+            try:
+                payload = json.loads(await request.body())
+            except ValueError:
+                payload = None
+            if isinstance(payload, dict) and payload.get("method") in methods:
+                controller.rejected_full += 1
+                retry_after = controller.retry_after()
+                logger.warning("Shedding %s: %s is saturated", payload["method"], controller.name)
+                return JSONResponse(
+                    status_code=503,
+                    headers={"Retry-After": str(int(retry_after))},
+                    content={
+                        "jsonrpc": "2.0",
+                        "id": payload.get("id"),
+                        "error": {
+                            "code": -32000,
+                            "message": "Server overloaded, retry later",
+                            "data": {"retry_after_s": retry_after},
+                        },
+                    },
+                )
+        return await call_next(request)
@@ -0,0 +1,188 @@
+"""
+shared/artifact_stream.py
+=========================
+Streams a sequence of results as chunks of one artifact, coalescing results
+into batched chunks according to a policy.
+
+Demonstrates:
+- One artifact_id per stream: the first chunk opens the artifact
+  (append=False), every later chunk appends to it (append=True), and the
+  chunk holding the last result carries last_chunk=True
+- A batching policy per agent, like a producer's batch.size / linger.ms:
+    max_items   results per chunk (1 = one chunk per result, the default)
+    max_bytes   JSON size of a chunk's results, flushed once reached
+    max_linger  how long the first result of a partial batch may wait before
+                the batch goes out anyway, so a slow producer still streams
+- Batched chunks are lists of DataParts, one per result, so clients that
+  read `artifact.parts` handle one result per chunk and many alike
+- Fewer TaskArtifactUpdateEvents: the per-event cost (pydantic models, the
+  task manager's artifact append, JSON-RPC envelope, SSE framing) is paid
+  once per batch instead of once per result (see benchmarks/chunking.py)
+
+Usage:
+    async with ArtifactStream(event_queue, task_id, context_id, "flight_results",
+                              ChunkPolicy.from_env("FLIGHT_AGENT")) as stream:
+        for flight, is_last in results:
+            await stream.add(flight, last=is_last)
+
+Configuration (environment variables, all optional; PREFIX is chosen by the
+agent, e.g. FLIGHT_AGENT):
+    {PREFIX}_CHUNK_MAX_ITEMS   results per chunk            (default 1)
+    {PREFIX}_CHUNK_MAX_BYTES   JSON bytes per chunk, 0 = no limit (default 0)
+    {PREFIX}_CHUNK_LINGER_MS   longest wait for a partial batch, 0 = until it
+                               is full or the last result arrives (default 0)
+"""
+
+import asyncio
+import json
+import os
+from dataclasses import dataclass
+from typing import Any
+from uuid import uuid4
+
+from a2a.server.events import EventQueue
+
+from shared.events import artifact_event, data_part
+
+
+@dataclass(frozen=True)
+class ChunkPolicy:
+    max_items: int = 1
+    max_bytes: int = 0
+    max_linger: float = 0.0  # seconds; 0 = no time limit
+
+    def __post_init__(self) -> None:
+        if self.max_items < 1:
+            raise ValueError("max_items must be at least 1")
+        if self.max_bytes < 0 or self.max_linger < 0:
+            raise ValueError("max_bytes and max_linger must not be negative")
+
+    @classmethod
+    def from_env(cls, prefix: str, default: "ChunkPolicy | None" = None) -> "ChunkPolicy":
+        default = default or cls()
+
+        def env(name: str, fallback, cast=int):
+            value = os.getenv(f"{prefix}_{name}")
+            return fallback if value is None or value == "" else cast(value)
+
+        return cls(
+            max_items=env("CHUNK_MAX_ITEMS", default.max_items),
+            max_bytes=env("CHUNK_MAX_BYTES", default.max_bytes),
+            max_linger=env("CHUNK_LINGER_MS", default.max_linger * 1000, float) / 1000,
+        )
+
+    @property
+    def batches(self) -> bool:
+        """True when a chunk can hold more than one result."""
+        return self.max_items > 1
+
+    def describe(self) -> str:
+        if not self.batches:
+            return "one result per chunk"
+        limits = [f"{self.max_items} results"]
+        if self.max_bytes:
+            limits.append(f"{self.max_bytes} bytes")
+        if self.max_linger:
+            limits.append(f"{self.max_linger * 1000:g} ms linger")
+        return "up to " + ", ".join(limits) + " per chunk"
+
+
+class ArtifactStream:
+    """
+    Results of one task, emitted as chunks of a single artifact.
+
+    add() buffers a result and sends the batch once the policy says so; the
+    result passed with last=True always goes out, closing the artifact.
+    With max_linger set, a timer sends a partial batch while the producer is
+    still working on the next result.
+    """
+
+    def __init__(
+        self,
+        event_queue: EventQueue,
+        task_id: str,
+        context_id: str,
+        name: str,
+        policy: ChunkPolicy | None = None,
+        *,
+        description: str | None = None,
+    ) -> None:
+        self.event_queue = event_queue
+        self.task_id = task_id
+        self.context_id = context_id
+        self.name = name
+        self.policy = policy or ChunkPolicy()
+        self.description = description
+        self.artifact_id = str(uuid4())
+        self.chunks = 0
+        self.items = 0
+        self._buffer: list[dict[str, Any]] = []
+        self._bytes = 0
+        self._last = False
+        # Only the linger timer flushes concurrently with add(); without it no lock is needed.
+        self._lock = asyncio.Lock() if self.policy.max_linger else None
+        self._timer: asyncio.TimerHandle | None = None
+        self._pending: asyncio.Task | None = None
+
+    async def __aenter__(self) -> "ArtifactStream":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        # Results still buffered when the producer fails or is cancelled are dropped.
+        self._cancel_timer()
+        if self._pending is not None and not self._pending.done():
+            self._pending.cancel()
+
+    async def add(self, item: dict[str, Any], *, last: bool = False) -> None:
+        policy = self.policy
+        self._buffer.append(item)
+        if last:
+            self._last = True
+        elif policy.max_bytes:
+            self._bytes += len(json.dumps(item, separators=(",", ":")))
+        if (
+            last
+            or len(self._buffer) >= policy.max_items
+            or (policy.max_bytes and self._bytes >= policy.max_bytes)
+        ):
+            self._cancel_timer()
+            await self._flush()
+        elif policy.max_linger and self._timer is None:
+            loop = asyncio.get_running_loop()
+            self._timer = loop.call_later(policy.max_linger, self._linger_expired)
+
+    # ── Internals ─────────────────────────────────────────────────────────────
+    def _linger_expired(self) -> None:
+        self._timer = None
+        self._pending = asyncio.ensure_future(self._flush())
+
+    def _cancel_timer(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+    async def _flush(self) -> None:
+        if self._lock is None:
+            await self._send()
+            return
+        # Batches are taken under the lock, so chunks leave in the order their
+        # results arrived even when the linger timer and add() race.
+        async with self._lock:
+            await self._send()
+
+    async def _send(self) -> None:
+        if not self._buffer:
+            return
+        batch, self._buffer, self._bytes = self._buffer, [], 0
+        await self.event_queue.enqueue_event(
+            artifact_event(
+                self.task_id, self.context_id, self.name,
+                parts=[data_part(item) for item in batch],
+                artifact_id=self.artifact_id,
+                description=self.description,
+                append=self.chunks > 0,   # first chunk opens the artifact
+                last_chunk=self._last,    # the chunk holding the last result
+            )
+        )
+        self.chunks += 1
+        self.items += len(batch)
@@ -0,0 +1,189 @@
+"""
+shared/balancer.py
+==================
+Client-side load balancing across replicas of the same agent.
+
+Demonstrates:
+- Tracking, in-process, each replica's in-flight request count and an EWMA
+  of its time-to-first-result
+- Three interchangeable strategies for ordering replicas:
+    round_robin        rotate the starting replica on every call
+    least_outstanding  fewest in-flight requests first (EWMA breaks ties)
+    p2c_ewma           power of two choices: sample two replicas at random
+                       and prefer the one with the lower EWMA x (in-flight + 1)
+- Penalising failures so an erroring replica drifts to the back of the order
+
+`order()` returns every replica, best first: the first entry gets the request
+and the rest are the hedge / failover candidates (see shared/hedging.py).
+
+Configuration (environment variables, all optional):
+    A2A_BALANCER                  default p2c_ewma
+    A2A_BALANCER_EWMA_ALPHA       default 0.3  (weight of the newest sample)
+    A2A_BALANCER_FAILURE_PENALTY  default 5.0  (seconds recorded for a failure)
+"""
+
+import itertools
+import os
+import random
+import time
+from collections.abc import AsyncIterator, Callable, Sequence
+from dataclasses import dataclass
+from typing import TypeVar
+
+T = TypeVar("T")
+
+
+@dataclass
+class ReplicaStats:
+    url: str
+    outstanding: int = 0
+    ewma: float | None = None
+    requests: int = 0
+    failures: int = 0
+
+    def cost(self) -> float:
+        # Unmeasured replicas cost nothing, so they are tried early.
+        return (self.ewma or 0.0) * (self.outstanding + 1)
+
+    def as_dict(self) -> dict:
+        return {
+            "outstanding": self.outstanding,
+            "ewma_s": None if self.ewma is None else round(self.ewma, 4),
+            "requests": self.requests,
+            "failures": self.failures,
+        }
+
+
+@dataclass(frozen=True)
+class BalancerConfig:
+    strategy: str = "p2c_ewma"
+    alpha: float = 0.3
+    failure_penalty: float = 5.0
+
+    @classmethod
+    def from_env(cls) -> "BalancerConfig":
+        return cls(
+            strategy=os.getenv("A2A_BALANCER", cls.strategy),
+            alpha=float(os.getenv("A2A_BALANCER_EWMA_ALPHA", cls.alpha)),
+            failure_penalty=float(os.getenv("A2A_BALANCER_FAILURE_PENALTY", cls.failure_penalty)),
+        )
+
+
+class Balancer:
+    """Base class: per-replica bookkeeping; subclasses only decide the order."""
+
+    strategy = ""
+
+    def __init__(self, urls: Sequence[str], config: BalancerConfig | None = None) -> None:
+        self.config = config or BalancerConfig.from_env()
+        self.replicas = {url: ReplicaStats(url) for url in urls}
+
+    def order(self, urls: Sequence[str] | None = None) -> list[str]:
+        """Replica URLs, best first."""
+        raise NotImplementedError
+
+    def attempt(self, url: str, factory: Callable[[], AsyncIterator[T]]) -> Callable[[], AsyncIterator[T]]:
+        """Wrap an attempt factory so its stream is tracked against `url`."""
+        return lambda: self.track(url, factory())
+
+    async def track(self, url: str, stream: AsyncIterator[T]) -> AsyncIterator[T]:
+        """Yield from `stream`, counting it as in flight and timing its first result."""
+        stats = self.replicas.setdefault(url, ReplicaStats(url))
+        stats.requests += 1
+        stats.outstanding += 1
+        started = time.monotonic()
+        observed = False
+        try:
+            async for item in stream:
+                if not observed:
+                    self._observe(stats, time.monotonic() - started)
+                    observed = True
+                yield item
+        except Exception:
+            stats.failures += 1
+            self._observe(stats, self.config.failure_penalty)
+            observed = True
+            raise
+        except BaseException:
+            # Cancelled or closed early, e.g. a hedged loser: its short elapsed
+            # time says nothing about the replica's latency.
+            observed = True
+            raise
+        finally:
+            stats.outstanding -= 1
+            if not observed:
+                # Empty stream: the elapsed time is still a sample.
+                self._observe(stats, time.monotonic() - started)
+
+    def metrics(self) -> dict:
+        return {
+            "strategy": self.strategy,
+            "replicas": {url: stats.as_dict() for url, stats in self.replicas.items()},
+        }
+
+    # ── Internals ─────────────────────────────────────────────────────────────
+    def _stats(self, urls: Sequence[str] | None) -> list[ReplicaStats]:
+        if urls is None:
+            return list(self.replicas.values())
+        return [self.replicas.setdefault(url, ReplicaStats(url)) for url in urls]
+
+    def _observe(self, stats: ReplicaStats, seconds: float) -> None:
+        if stats.ewma is None:
+            stats.ewma = seconds
+        else:
+            stats.ewma += self.config.alpha * (seconds - stats.ewma)
+
+
+class RoundRobinBalancer(Balancer):
+    strategy = "round_robin"
+
+    def __init__(self, urls: Sequence[str], config: BalancerConfig | None = None) -> None:
+        super().__init__(urls, config)
+        self._counter = itertools.count()
+
+    def order(self, urls: Sequence[str] | None = None) -> list[str]:
+        stats = self._stats(urls)
+        if not stats:
+            return []
+        start = next(self._counter) % len(stats)
+        return [s.url for s in stats[start:] + stats[:start]]
+
+
+class LeastOutstandingBalancer(Balancer):
+    strategy = "least_outstanding"
+
+    def order(self, urls: Sequence[str] | None = None) -> list[str]:
+        stats = self._stats(urls)
+        random.shuffle(stats)  # equal replicas share the load
+        stats.sort(key=lambda s: (s.outstanding, s.ewma or 0.0))
+        return [s.url for s in stats]
+
+
+class PowerOfTwoBalancer(Balancer):
+    strategy = "p2c_ewma"
+
+    def order(self, urls: Sequence[str] | None = None) -> list[str]:
+        stats = self._stats(urls)
+        if len(stats) < 2:
+            return [s.url for s in stats]
+        a, b = random.sample(stats, 2)
+        best = a if a.cost() <= b.cost() else b
+        rest = sorted((s for s in stats if s is not best), key=ReplicaStats.cost)
+        return [best.url] + [s.url for s in rest]
+
+
+BALANCERS: dict[str, type[Balancer]] = {
+    cls.strategy: cls for cls in (RoundRobinBalancer, LeastOutstandingBalancer, PowerOfTwoBalancer)
+}
+
+
+def make_balancer(urls: Sequence[str], config: BalancerConfig | None = None) -> Balancer:
+    """Build the balancer named by `config.strategy` (A2A_BALANCER)."""
+    config = config or BalancerConfig.from_env()
+    try:
+        cls = BALANCERS[config.strategy]
+    except KeyError:
+        raise ValueError(
+            f"Unknown balancer '{config.strategy}' (choose from {', '.join(BALANCERS)})"
+        ) from None
+    return cls(urls, config)
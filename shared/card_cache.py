@@ -0,0 +1,207 @@
+"""
+shared/card_cache.py
+====================
+Process-wide Agent Card cache (Section 2 — Agent Cards).
+
+Demonstrates:
+- Caching AgentCard objects per agent base URL with a TTL
+- Honouring the server's `Cache-Control: max-age` when it sends one
+- Conditional revalidation with ETag / If-None-Match (304 keeps the cached card)
+- Refresh-ahead: a background refresh starts before the entry expires
+- Stale-while-revalidate: an expired card is still served (within `max_stale`)
+  while a single background request fetches the new one
+- Coalescing concurrent cold fetches for the same URL into one request
+- Inline refresh for callers whose HTTP clients are short-lived
+  (background_refresh=False): nothing outlives the `get()` that needs it, so
+  no refresh runs on a client that is already closed
+
+Configuration (environment variables, all optional):
+    A2A_CARD_TTL            default 300 (seconds, used when no max-age is sent)
+    A2A_CARD_MAX_STALE      default 3600 (seconds a stale card may be served)
+    A2A_CARD_REFRESH_AHEAD  default 0.8 (fraction of TTL after which to refresh)
+
+Usage:
+    from shared.card_cache import card_cache
+    card = await card_cache.get(http_client, "http://localhost:8001")
+"""
+
+import asyncio
+import logging
+import os
+import re
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+
+import httpx
+from a2a.types import AgentCard
+from a2a.utils.constants import AGENT_CARD_WELL_KNOWN_PATH
+
+logger = logging.getLogger(__name__)
+
+_MAX_AGE_RE = re.compile(r"max-age\s*=\s*(\d+)")
+
+
+def _max_age(cache_control: str | None) -> float | None:
+    if not cache_control or "no-cache" in cache_control:
+        return None
+    match = _MAX_AGE_RE.search(cache_control)
+    return float(match.group(1)) if match else None
+
+
+@dataclass
+class _CardEntry:
+    card: AgentCard
+    etag: str | None
+    fetched_at: float
+    ttl: float
+
+
+@dataclass
+class CardCacheStats:
+    hits: int = 0
+    stale_hits: int = 0
+    misses: int = 0
+    fetches: int = 0
+    revalidated: int = 0
+    refresh_errors: int = 0
+
+    def as_dict(self) -> dict:
+        return dict(self.__dict__)
+
+
+class AgentCardCache:
+    """
+    Agent Card cache keyed by agent base URL.
+
+    `get()` never blocks on the network while a usable (fresh or acceptably
+    stale) card is cached; it only awaits a fetch on a cold or fully expired
+    entry, and concurrent cold callers share that single fetch.
+    """
+
+    def __init__(
+        self,
+        ttl: float = 300.0,
+        max_stale: float = 3600.0,
+        refresh_ahead: float = 0.8,
+        timeout: float = 5.0,
+        card_path: str = AGENT_CARD_WELL_KNOWN_PATH,
+        clock: Callable[[], float] = time.monotonic,
+        background_refresh: bool = True,
+    ) -> None:
+        self.ttl = ttl
+        self.max_stale = max_stale
+        self.refresh_ahead = refresh_ahead
+        self.timeout = timeout
+        self.card_path = card_path
+        self.background_refresh = background_refresh
+        self.stats = CardCacheStats()
+        self._clock = clock
+        self._entries: dict[str, _CardEntry] = {}
+        self._inflight: dict[str, asyncio.Task] = {}
+
+    @classmethod
+    def from_env(cls, background_refresh: bool = True) -> "AgentCardCache":
+        return cls(
+            ttl=float(os.getenv("A2A_CARD_TTL", "300")),
+            max_stale=float(os.getenv("A2A_CARD_MAX_STALE", "3600")),
+            refresh_ahead=float(os.getenv("A2A_CARD_REFRESH_AHEAD", "0.8")),
+            background_refresh=background_refresh,
+        )
+
+    async def get(self, http_client: httpx.AsyncClient, base_url: str) -> AgentCard:
+        """Return the Agent Card for `base_url`, fetching it only when necessary."""
+        key = base_url.rstrip("/")
+        entry = self._entries.get(key)
+        if entry is not None:
+            age = self._clock() - entry.fetched_at
+            if age < entry.ttl:
+                self.stats.hits += 1
+                if self.background_refresh and age >= entry.ttl * self.refresh_ahead:
+                    self._refresh_in_background(key, http_client)
+                return entry.card
+            if age < entry.ttl + self.max_stale:
+                if not self.background_refresh:
+                    return await self._refresh_inline(key, http_client, entry)
+                self.stats.stale_hits += 1
+                self._refresh_in_background(key, http_client)
+                return entry.card
+
+        self.stats.misses += 1
+        return await asyncio.shield(self._start_fetch(key, http_client))
+
+    def invalidate(self, base_url: str) -> None:
+        self._entries.pop(base_url.rstrip("/"), None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    # ── Internals ─────────────────────────────────────────────────────────────
+    def _start_fetch(self, key: str, http_client: httpx.AsyncClient) -> asyncio.Task:
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.create_task(self._fetch(key, http_client))
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._fetch_done(key, done))
+        return task
+
+    def _fetch_done(self, key: str, task: asyncio.Task) -> None:
+        self._inflight.pop(key, None)
+        if not task.cancelled():
+            # Mark the error retrieved: get() shields the fetch, so a cancelled
+            # caller may have been its only reader.
+            task.exception()
+
+    async def _refresh_inline(
+        self, key: str, http_client: httpx.AsyncClient, entry: _CardEntry
+    ) -> AgentCard:
+        """Refetch an expired card now, serving the stale one if that fails."""
+        try:
+            return await asyncio.shield(self._start_fetch(key, http_client))
+        except Exception as exc:
+            self.stats.stale_hits += 1
+            self.stats.refresh_errors += 1
+            logger.warning("Agent Card refresh failed, serving the stale card: %s", exc)
+            return entry.card
+
+    def _refresh_in_background(self, key: str, http_client: httpx.AsyncClient) -> None:
+        if key in self._inflight or http_client.is_closed:
+            return
+        task = self._start_fetch(key, http_client)
+        task.add_done_callback(self._log_refresh_error)
+
+    def _log_refresh_error(self, task: asyncio.Task) -> None:
+        if task.cancelled() or task.exception() is None:
+            return
+        self.stats.refresh_errors += 1
+        logger.warning("Background Agent Card refresh failed: %s", task.exception())
+
+    async def _fetch(self, key: str, http_client: httpx.AsyncClient) -> AgentCard:
+        entry = self._entries.get(key)
+        headers = {"If-None-Match": entry.etag} if entry and entry.etag else {}
+        response = await http_client.get(
+            f"{key}{self.card_path}", headers=headers, timeout=self.timeout
+        )
+        ttl = _max_age(response.headers.get("cache-control"))
+        ttl = self.ttl if ttl is None else ttl
+
+        if response.status_code == 304 and entry is not None:
+            self.stats.revalidated += 1
+            entry.fetched_at = self._clock()
+            entry.ttl = ttl
+            return entry.card
+
+        response.raise_for_status()
+        card = AgentCard.model_validate(response.json())
+        self.stats.fetches += 1
+        self._entries[key] = _CardEntry(
+            card=card,
+            etag=response.headers.get("etag"),
+            fetched_at=self._clock(),
+            ttl=ttl,
+        )
+        return card
+
+
+# Process-wide default instance (the orchestrator's; client/main.py refreshes inline).
+card_cache = AgentCardCache.from_env()
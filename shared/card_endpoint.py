@@ -0,0 +1,76 @@
+"""
+shared/card_endpoint.py
+=======================
+Pre-serialized Agent Card endpoint with HTTP caching (Section 2 — Agent Cards).
+
+Demonstrates:
+- Serializing the AgentCard to JSON bytes once, when the app is built
+- A strong ETag (content hash) and `Cache-Control: public, max-age=N`
+- Answering `If-None-Match` with `304 Not Modified` (no body)
+- HEAD support so health checks can probe the card cheaply
+
+Both the current (`/.well-known/agent-card.json`) and the legacy
+(`/.well-known/agent.json`) paths are served. The routes are placed ahead of
+the SDK's own card handler, which re-serializes the card on every request.
+
+Configuration (environment variable, optional):
+    A2A_CARD_MAX_AGE   default 300 (seconds)
+"""
+
+import hashlib
+import json
+import os
+
+from a2a.types import AgentCard
+from a2a.utils.constants import (
+    AGENT_CARD_WELL_KNOWN_PATH,
+    PREV_AGENT_CARD_WELL_KNOWN_PATH,
+)
+from fastapi import FastAPI, Request, Response
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    """Weak comparison as required for If-None-Match (RFC 9110 §13.1.2)."""
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+class CachedAgentCard:
+    """An AgentCard rendered once to bytes, plus the headers that describe it."""
+
+    def __init__(self, agent_card: AgentCard, max_age: int | None = None) -> None:
+        if max_age is None:
+            max_age = int(os.getenv("A2A_CARD_MAX_AGE", "300"))
+        self.body = json.dumps(
+            agent_card.model_dump(mode="json", exclude_none=True, by_alias=True),
+            ensure_ascii=False,
+            separators=(",", ":"),
+        ).encode("utf-8")
+        self.etag = f'"{hashlib.sha256(self.body).hexdigest()[:32]}"'
+        self.headers = {
+            "ETag": self.etag,
+            "Cache-Control": f"public, max-age={max_age}",
+        }
+
+    async def handle(self, request: Request) -> Response:
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match and _etag_matches(if_none_match, self.etag):
+            return Response(status_code=304, headers=self.headers)
+        body = b"" if request.method == "HEAD" else self.body
+        headers = {**self.headers, "Content-Length": str(len(self.body))}
+        return Response(content=body, media_type="application/json", headers=headers)
+
+
+def serve_cached_agent_card(
+    app: FastAPI, agent_card: AgentCard, max_age: int | None = None
+) -> CachedAgentCard:
+    """Register the cached card routes on `app`, ahead of any existing card route."""
+    cached = CachedAgentCard(agent_card, max_age)
+    for path in (AGENT_CARD_WELL_KNOWN_PATH, PREV_AGENT_CARD_WELL_KNOWN_PATH):
+        app.add_api_route(path, cached.handle, methods=["GET", "HEAD"], include_in_schema=False)
+        # Starlette matches routes in order, so move ours in front of the SDK's.
+        app.router.routes.insert(0, app.router.routes.pop())
+    return cached
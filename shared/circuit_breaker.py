@@ -0,0 +1,183 @@
+"""
+shared/circuit_breaker.py
+=========================
+Per-agent circuit breaker for outbound A2A calls (Section 10 — Error Handling).
+
+Demonstrates:
+- closed -> open when the failure rate over a sliding window of recent calls
+  crosses a threshold
+- open: calls are rejected immediately with CircuitOpenError (no network I/O)
+- open -> half-open after a cool-down; a limited number of trial calls decide
+  whether to close again (success) or re-open (failure)
+- Counters and current state exported via `metrics()`
+- Calls stopped by the caller's deadline (DeadlineExceeded) or cancelled are
+  not counted as failures: they say nothing about the agent's health
+
+Configuration (environment variables, all optional):
+    A2A_BREAKER_WINDOW         default 20   (most recent calls considered)
+    A2A_BREAKER_MIN_CALLS      default 5    (calls needed before it can trip)
+    A2A_BREAKER_FAILURE_RATE   default 0.5  (failure ratio that opens it)
+    A2A_BREAKER_COOLDOWN       default 30   (seconds spent open)
+    A2A_BREAKER_HALF_OPEN_MAX  default 1    (concurrent trial calls)
+"""
+
+import logging
+import os
+import time
+from collections import deque
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from enum import Enum
+from typing import TypeVar
+
+from shared.deadline import DeadlineExceeded
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class BreakerState(str, Enum):
+    closed = "closed"
+    open = "open"
+    half_open = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a downstream agent whose breaker is open."""
+
+    def __init__(self, name: str, retry_after: float) -> None:
+        super().__init__(f"circuit for '{name}' is open (retry in {retry_after:.1f}s)")
+        self.name = name
+        self.retry_after = retry_after
+
+
+@dataclass(frozen=True)
+class BreakerConfig:
+    window: int = 20
+    min_calls: int = 5
+    failure_rate: float = 0.5
+    cooldown: float = 30.0
+    half_open_max_calls: int = 1
+
+    @classmethod
+    def from_env(cls) -> "BreakerConfig":
+        return cls(
+            window=int(os.getenv("A2A_BREAKER_WINDOW", cls.window)),
+            min_calls=int(os.getenv("A2A_BREAKER_MIN_CALLS", cls.min_calls)),
+            failure_rate=float(os.getenv("A2A_BREAKER_FAILURE_RATE", cls.failure_rate)),
+            cooldown=float(os.getenv("A2A_BREAKER_COOLDOWN", cls.cooldown)),
+            half_open_max_calls=int(os.getenv("A2A_BREAKER_HALF_OPEN_MAX", cls.half_open_max_calls)),
+        )
+
+
+class CircuitBreaker:
+    """Failure-rate circuit breaker guarding one downstream agent."""
+
+    def __init__(
+        self,
+        name: str,
+        config: BreakerConfig | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.name = name
+        self.config = config or BreakerConfig.from_env()
+        self._clock = clock
+        self._state = BreakerState.closed
+        self._outcomes: deque[bool] = deque(maxlen=self.config.window)
+        self._opened_at = 0.0
+        self._half_open_inflight = 0
+        self.successes = 0
+        self.failures = 0
+        self.short_circuits = 0
+        self.times_opened = 0
+
+    @property
+    def state(self) -> BreakerState:
+        if (
+            self._state is BreakerState.open
+            and self._clock() - self._opened_at >= self.config.cooldown
+        ):
+            self._transition(BreakerState.half_open)
+        return self._state
+
+    def allow(self) -> bool:
+        """Reserve permission for one call; False means short-circuit it."""
+        state = self.state
+        if state is BreakerState.closed:
+            return True
+        if state is BreakerState.half_open and self._half_open_inflight < self.config.half_open_max_calls:
+            self._half_open_inflight += 1
+            return True
+        self.short_circuits += 1
+        return False
+
+    def record_success(self) -> None:
+        self.successes += 1
+        if self._state is BreakerState.half_open:
+            self._half_open_inflight = max(0, self._half_open_inflight - 1)
+            self._outcomes.clear()
+            self._transition(BreakerState.closed)
+            return
+        self._outcomes.append(True)
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self._state is BreakerState.half_open:
+            self._half_open_inflight = max(0, self._half_open_inflight - 1)
+            self._trip()
+            return
+        self._outcomes.append(False)
+        if len(self._outcomes) >= self.config.min_calls:
+            failure_rate = self._outcomes.count(False) / len(self._outcomes)
+            if failure_rate >= self.config.failure_rate:
+                self._trip()
+
+    async def call(self, fn: Callable[[], Awaitable[T]]) -> T:
+        """Run `fn` if the breaker allows it, recording the outcome."""
+        if not self.allow():
+            retry_after = self.config.cooldown - (self._clock() - self._opened_at)
+            raise CircuitOpenError(self.name, max(0.0, retry_after))
+        try:
+            result = await fn()
+        except DeadlineExceeded:
+            self._release_trial()
+            raise
+        except Exception:
+            self.record_failure()
+            raise
+        except BaseException:
+            # Cancellation says nothing about the agent's health.
+            self._release_trial()
+            raise
+        self.record_success()
+        return result
+
+    def metrics(self) -> dict:
+        return {
+            "state": self.state.value,
+            "successes": self.successes,
+            "failures": self.failures,
+            "short_circuits": self.short_circuits,
+            "times_opened": self.times_opened,
+        }
+
+    # ── Internals ─────────────────────────────────────────────────────────────
+    def _release_trial(self) -> None:
+        """Give back a half-open trial slot without recording an outcome."""
+        if self._state is BreakerState.half_open:
+            self._half_open_inflight = max(0, self._half_open_inflight - 1)
+
+    def _trip(self) -> None:
+        self._opened_at = self._clock()
+        self._outcomes.clear()
+        self.times_opened += 1
+        self._transition(BreakerState.open)
+
+    def _transition(self, new_state: BreakerState) -> None:
+        if new_state is self._state:
+            return
+        logger.warning("Circuit '%s': %s -> %s", self.name, self._state.value, new_state.value)
+        self._state = new_state
+        if new_state is not BreakerState.half_open:
+            self._half_open_inflight = 0
@@ -0,0 +1,361 @@
+"""
+shared/connections.py
+=====================
+Multi-leg itineraries over the flight inventory: a top-K connection search on
+a time-expanded route graph.
+
+Demonstrates:
+- A time-expanded graph: every flight segment is a node, linked to the later
+  departures from its arrival airport that respect the minimum connection
+  time (MCT) and the maximum layover. Departures per airport are sorted by
+  time, so a node's successors are one bisect away
+- Best-first (A*) search ranked by price, duration or number of stops, with
+  admissible lower bounds per airport: complete itineraries leave the heap
+  already in rank order and can be streamed as they are found
+- Pruning that keeps a 2-stop search on a large network in milliseconds:
+    hop limit      an airport more legs from the destination than the stops
+                   left is never entered (legs-to-destination per airport)
+    no revisits    an itinerary never passes through the same airport twice
+    bound          once K itineraries are known, partial ones whose lower
+                   bound is worse than the K-th are dropped
+    K expansions   each (segment, legs) node is expanded at most K times
+    budget         at most MAX_EXPANSIONS nodes per search; the search
+                   then reports itself truncated
+
+Usage:
+    routes = RouteGraph(segments, ConnectionRules.from_env("FLIGHT_AGENT"))
+    for itinerary in routes.connections("JFK", "CDG", "2026-03-15", limit=5):
+        ...
+
+Configuration (environment variables, all optional; PREFIX is chosen by the
+caller, e.g. FLIGHT_AGENT):
+    {PREFIX}_MIN_CONNECTION_MINUTES   minimum connection time   (default 60)
+    {PREFIX}_MAX_CONNECTION_HOURS     longest layover           (default 12)
+    {PREFIX}_MAX_STOPS                most stops per itinerary  (default 2)
+    {PREFIX}_MAX_EXPANSIONS           search budget in nodes    (default 20000)
+"""
+
+import heapq
+import math
+import os
+from bisect import bisect_left, bisect_right, insort
+from collections import defaultdict, deque
+from collections.abc import Callable, Iterable, Iterator
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from itertools import chain
+
+SORT_KEYS = ("price", "duration", "stops")
+
+
+@dataclass(frozen=True)
+class ConnectionRules:
+    min_connection_minutes: float = 60.0
+    max_connection_hours: float = 12.0
+    max_stops: int = 2
+    max_expansions: int = 20_000
+
+    def __post_init__(self) -> None:
+        if self.min_connection_minutes < 0:
+            raise ValueError("min_connection_minutes must be >= 0")
+        if self.max_connection_hours * 60 < self.min_connection_minutes:
+            raise ValueError("max_connection_hours must cover the minimum connection time")
+        if self.max_stops < 0 or self.max_expansions < 1:
+            raise ValueError("max_stops must be >= 0 and max_expansions >= 1")
+
+    @classmethod
+    def from_env(cls, prefix: str, default: "ConnectionRules | None" = None) -> "ConnectionRules":
+        default = default or cls()
+        return cls(
+            min_connection_minutes=float(
+                os.getenv(f"{prefix}_MIN_CONNECTION_MINUTES", default.min_connection_minutes)
+            ),
+            max_connection_hours=float(
+                os.getenv(f"{prefix}_MAX_CONNECTION_HOURS", default.max_connection_hours)
+            ),
+            max_stops=int(os.getenv(f"{prefix}_MAX_STOPS", default.max_stops)),
+            max_expansions=int(os.getenv(f"{prefix}_MAX_EXPANSIONS", default.max_expansions)),
+        )
+
+
+class _Route:
+    """Departures on one (origin, next airport) route, sorted by time."""
+
+    __slots__ = ("indexes", "times", "cheapest", "quickest")
+
+    def __init__(self, indexes: list[int], dep: list[int], arr: list[int], price: list[float]) -> None:
+        indexes.sort(key=dep.__getitem__)
+        self.indexes = indexes
+        self.times = [dep[i] for i in indexes]
+        self.cheapest = min(price[i] for i in indexes)
+        self.quickest = min(arr[i] - dep[i] for i in indexes)
+
+
+class ConnectionSearch:
+    """One search's itineraries, best first; iterating runs the search."""
+
+    def __init__(self, graph: "RouteGraph", *query) -> None:
+        self.found = 0
+        self.expanded = 0
+        self.truncated = False
+        self._steps = graph._search(self, *query)
+
+    def __iter__(self) -> "ConnectionSearch":
+        return self
+
+    def __next__(self) -> dict:
+        itinerary = next(self._steps)
+        self.found += 1
+        return itinerary
+
+
+class RouteGraph:
+    """Flight segments as a time-expanded graph for connection searches."""
+
+    def __init__(self, segments: Iterable[dict], rules: ConnectionRules | None = None) -> None:
+        self.rules = rules or ConnectionRules()
+        self._segments = list(segments)
+        epoch = _epoch_parser()
+        self._dep = [epoch(s["departure"]) for s in self._segments]
+        self._arr = [epoch(s["arrival"]) for s in self._segments]
+        self._price = [float(s.get("price_usd", math.inf)) for s in self._segments]
+        self._dest = [s["destination"] for s in self._segments]
+
+        by_route: dict[str, dict[str, list[int]]] = defaultdict(lambda: defaultdict(list))
+        for i, segment in enumerate(self._segments):
+            by_route[segment["origin"]][self._dest[i]].append(i)
+        # airport -> next airport -> that route's departures, sorted by time
+        self._out: dict[str, dict[str, _Route]] = {
+            airport: {nxt: _Route(indexes, self._dep, self._arr, self._price) for nxt, indexes in routes.items()}
+            for airport, routes in by_route.items()
+        }
+        self._min_out_price = {
+            airport: min(route.cheapest for route in routes.values()) for airport, routes in self._out.items()
+        }
+        self._min_out_seconds = {
+            airport: min(route.quickest for route in routes.values()) for airport, routes in self._out.items()
+        }
+
+        self._min_in_price: dict[str, float] = {}
+        self._min_in_seconds: dict[str, int] = {}
+        self._inbound: dict[str, set[str]] = defaultdict(set)
+        for i, segment in enumerate(self._segments):
+            airport = self._dest[i]
+            self._inbound[airport].add(segment["origin"])
+            self._min_in_price[airport] = min(self._min_in_price.get(airport, math.inf), self._price[i])
+            self._min_in_seconds[airport] = min(
+                self._min_in_seconds.get(airport, math.inf), self._arr[i] - self._dep[i]
+            )
+        self._hops: dict[tuple[str, int], dict[str, int]] = {}
+
+        self.searches = 0
+        self.expanded = 0
+        self.truncated = 0
+
+    def connections(
+        self,
+        origin: str,
+        destination: str,
+        date: str | None = None,
+        *,
+        sort: str = "price",
+        limit: int = 10,
+        max_stops: int | None = None,
+        max_price: float | None = None,
+        where: Callable[[dict], bool] | None = None,
+    ) -> ConnectionSearch:
+        """
+        Up to `limit` itineraries from `origin` to `destination` (first leg
+        on `date`, or any day), best first by `sort`. Direct flights count as
+        itineraries with no stops. `max_price` caps the total fare and
+        `where` filters the segments an itinerary may use (e.g. by cabin).
+        """
+        if sort not in SORT_KEYS:
+            raise ValueError(f"sort must be one of {', '.join(SORT_KEYS)}")
+        stops = self.rules.max_stops if max_stops is None else min(max_stops, self.rules.max_stops)
+        return ConnectionSearch(
+            self, origin, destination, date, sort, max(limit, 0), stops + 1,
+            math.inf if max_price is None else max_price, where,
+        )
+
+    def metrics(self) -> dict:
+        return {
+            "segments": len(self._segments),
+            "airports": len(self._out),
+            "searches": self.searches,
+            "expanded_per_search": round(self.expanded / self.searches, 1) if self.searches else 0,
+            "truncated": self.truncated,
+        }
+
+    # ── Internals ─────────────────────────────────────────────────────────────
+    def _search(self, search: ConnectionSearch, *query) -> Iterator[dict]:
+        try:
+            yield from self._best_first(search, *query)
+        finally:  # also when the caller stops iterating early
+            self.searches += 1
+            self.expanded += search.expanded
+            self.truncated += search.truncated
+
+    def _best_first(
+        self, search: ConnectionSearch, origin: str, destination: str,
+        date: str | None, sort: str, limit: int, max_legs: int,
+        max_price: float, where: Callable[[dict], bool] | None,
+    ) -> Iterator[dict]:
+        hops = self._hops_to(destination, max_legs)
+        if limit == 0 or origin == destination or origin not in hops or origin not in self._out:
+            return
+        dep, arr, price, dest = self._dep, self._arr, self._price, self._dest
+        segments = self._segments
+        mct = int(self.rules.min_connection_minutes * 60)
+        max_wait = int(self.rules.max_connection_hours * 3600)
+        min_out_price, min_out_seconds = self._min_out_price, self._min_out_seconds
+        last_price = self._min_in_price[destination]
+        last_seconds = self._min_in_seconds[destination]
+
+        estimates: dict[tuple[str, bool], tuple[float, float]] = {}
+
+        def estimate(at: str, legs: int) -> tuple[float, float]:
+            """Least (price, seconds) still to spend from `at`: one direct leg, or two or more."""
+            more_than_one = legs + 2 <= max_legs
+            known = estimates.get((at, more_than_one))
+            if known is None:
+                direct = self._out[at].get(destination)
+                cost = direct.cheapest if direct else math.inf
+                seconds = direct.quickest if direct else math.inf
+                if more_than_one:
+                    cost = min(cost, min_out_price[at] + last_price)
+                    seconds = min(seconds, min_out_seconds[at] + mct + last_seconds)
+                known = estimates[(at, more_than_one)] = (cost, seconds)
+            return known
+
+        def bound(legs: int, paid: float, first: int, arrival: int, at: str) -> tuple:
+            """Lower bound on any itinerary extending this one (exact when complete)."""
+            if at == destination:
+                cost, seconds, more = paid, arrival - first, 0
+            else:
+                rest_price, rest_seconds = estimate(at, legs)
+                cost, seconds, more = paid + rest_price, arrival - first + rest_seconds, hops[at]
+            if sort == "price":
+                return (cost, seconds)
+            if sort == "duration":
+                return (seconds, cost)
+            return (legs + more, cost)
+
+        heap: list[tuple] = []
+        best: list[tuple] = []  # bounds of the `limit` best complete itineraries pushed
+        counter = 0
+
+        def extend(
+            at: str, ready: int, until: int, legs: int, paid: float,
+            first: int | None, path: tuple[int, ...],
+        ) -> None:
+            """Push each departure from `at` between `ready` and `until` that can still pay off."""
+            nonlocal counter
+            routes = self._out.get(at)
+            if routes is None:
+                return
+            seen = {origin, *(dest[k] for k in path)}
+            # The destination's route first: its itineraries tighten `best` early.
+            for nxt in chain((destination,), routes):
+                if nxt in seen:
+                    continue
+                seen.add(nxt)
+                route = routes.get(nxt)
+                if route is None or nxt not in hops or legs + 1 + hops[nxt] > max_legs:
+                    continue
+                start = ready if first is None else first
+                optimistic = bound(legs + 1, paid + route.cheapest, start, ready + route.quickest, nxt)
+                if len(best) == limit and optimistic > best[-1]:
+                    continue  # nothing on this route can make the top `limit`
+                times = route.times
+                for j in route.indexes[bisect_left(times, ready):bisect_right(times, until)]:
+                    if paid + price[j] > max_price or (where is not None and not where(segments[j])):
+                        continue
+                    leg_first = dep[j] if first is None else first
+                    key = bound(legs + 1, paid + price[j], leg_first, arr[j], nxt)
+                    if len(best) == limit and key > best[-1]:
+                        continue
+                    if nxt == destination:
+                        insort(best, key)
+                        del best[limit:]
+                    counter += 1
+                    heapq.heappush(heap, (key, counter, legs + 1, paid + price[j], leg_first, j, path + (j,)))
+
+        if date is not None:
+            day = int(datetime.fromisoformat(date).replace(tzinfo=timezone.utc).timestamp())
+            extend(origin, day, day + 86_399, 0, 0.0, None, ())
+        else:
+            extend(origin, 0, 2**62, 0, 0.0, None, ())
+
+        expansions: dict[tuple[int, int], int] = defaultdict(int)
+        found = 0
+        while heap:
+            _, _, legs, paid, first, i, path = heapq.heappop(heap)
+            if dest[i] == destination:
+                found += 1
+                yield self._itinerary(path, found)
+                if found == limit:
+                    return
+                continue
+            if legs == max_legs or expansions[i, legs] >= limit:
+                continue
+            expansions[i, legs] += 1
+            search.expanded += 1
+            if search.expanded > self.rules.max_expansions:
+                search.truncated = True
+                return
+            extend(dest[i], arr[i] + mct, arr[i] + max_wait, legs, paid, first, path)
+
+    def _hops_to(self, destination: str, max_legs: int) -> dict[str, int]:
+        """Fewest legs from each airport to `destination`, for airports within `max_legs`."""
+        hops = self._hops.get((destination, max_legs))
+        if hops is None:
+            hops = {destination: 0}
+            queue = deque([destination])
+            while queue:
+                airport = queue.popleft()
+                if hops[airport] == max_legs:
+                    continue
+                for previous in self._inbound.get(airport, ()):
+                    if previous not in hops:
+                        hops[previous] = hops[airport] + 1
+                        queue.append(previous)
+            self._hops[(destination, max_legs)] = hops
+        return hops
+
+    def _itinerary(self, path: tuple[int, ...], rank: int) -> dict:
+        legs = [self._segments[i] for i in path]
+        first, last = path[0], path[-1]
+        return {
+            "itinerary_id": "-".join(leg["flight_id"] for leg in legs),
+            "rank": rank,
+            "origin": legs[0]["origin"],
+            "destination": legs[-1]["destination"],
+            "departure": legs[0]["departure"],
+            "arrival": legs[-1]["arrival"],
+            "stops": len(legs) - 1,
+            "via": [leg["destination"] for leg in legs[:-1]],
+            "duration_h": round((self._arr[last] - self._dep[first]) / 3600, 2),
+            "price_usd": sum(leg["price_usd"] for leg in legs),
+            "connections": [
+                {"airport": self._dest[a], "minutes": (self._dep[b] - self._arr[a]) // 60}
+                for a, b in zip(path, path[1:])
+            ],
+            "legs": legs,
+        }
+
+
+def _epoch_parser():
+    """ISO-8601 -> epoch seconds, memoized (inventories repeat timestamps a lot)."""
+    cache: dict[str, int] = {}
+
+    def epoch(text: str) -> int:
+        seconds = cache.get(text)
+        if seconds is None:
+            moment = datetime.fromisoformat(text.replace("Z", "+00:00"))
+            if moment.tzinfo is None:
+                moment = moment.replace(tzinfo=timezone.utc)
+            seconds = cache[text] = int(moment.timestamp())
+        return seconds
+
+    return epoch
@@ -0,0 +1,96 @@
+"""
+shared/deadline.py
+==================
+Request deadlines propagated across the agent mesh.
+
+Demonstrates:
+- Accepting a time budget from the caller, either as the `X-A2A-Timeout-Ms`
+  header or as `{"timeout_ms": N}` in the message metadata
+- Converting it to a local monotonic deadline on arrival (relative budgets are
+  immune to clock skew between hosts)
+- Forwarding the *remaining* budget on every downstream A2A call
+- Letting executors stop work once the budget is gone (`DeadlineExceeded`)
+
+Usage (orchestrator):
+    deadline = Deadline.from_context(context)
+    http_kwargs = {"timeout": deadline.timeout(30.0), "headers": deadline.headers()}
+
+Usage (agent):
+    deadline = Deadline.from_context(context)
+    await deadline.sleep(0.5)   # raises DeadlineExceeded if the budget runs out
+"""
+
+import asyncio
+import time
+
+from a2a.server.agent_execution import RequestContext
+
+DEADLINE_HEADER = "X-A2A-Timeout-Ms"
+DEADLINE_METADATA_KEY = "timeout_ms"
+
+
+class DeadlineExceeded(Exception):
+    """The caller's time budget ran out before the work finished."""
+
+
+class Deadline:
+    """A point on the monotonic clock after which work should stop (None = unbounded)."""
+
+    __slots__ = ("expires_at",)
+
+    def __init__(self, expires_at: float | None = None) -> None:
+        self.expires_at = expires_at
+
+    @classmethod
+    def after(cls, seconds: float | None) -> "Deadline":
+        return cls(None if seconds is None else time.monotonic() + seconds)
+
+    @classmethod
+    def from_context(cls, context: RequestContext) -> "Deadline":
+        """Read the budget from the request header, falling back to message metadata."""
+        budget_ms = None
+        if context.call_context:
+            headers = context.call_context.state.get("headers", {})
+            budget_ms = headers.get(DEADLINE_HEADER.lower())
+        if budget_ms is None and context.message and context.message.metadata:
+            budget_ms = context.message.metadata.get(DEADLINE_METADATA_KEY)
+        try:
+            return cls.after(float(budget_ms) / 1000.0) if budget_ms is not None else cls()
+        except (TypeError, ValueError):
+            return cls()
+
+    @property
+    def bounded(self) -> bool:
+        return self.expires_at is not None
+
+    def remaining(self) -> float | None:
+        if self.expires_at is None:
+            return None
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self) -> bool:
+        return self.expires_at is not None and time.monotonic() >= self.expires_at
+
+    def timeout(self, cap: float) -> float:
+        """The smaller of `cap` and the remaining budget, for use as an I/O timeout."""
+        remaining = self.remaining()
+        return cap if remaining is None else min(cap, remaining)
+
+    def headers(self) -> dict[str, str]:
+        """Headers that forward the remaining budget to a downstream agent."""
+        remaining = self.remaining()
+        if remaining is None:
+            return {}
+        return {DEADLINE_HEADER: str(int(remaining * 1000))}
+
+    async def sleep(self, seconds: float) -> None:
+        """asyncio.sleep that raises DeadlineExceeded instead of overrunning the budget."""
+        remaining = self.remaining()
+        if remaining is not None and remaining < seconds:
+            await asyncio.sleep(remaining)
+            raise DeadlineExceeded(f"deadline expired during {seconds:.3f}s of work")
+        await asyncio.sleep(seconds)
+
+    def check(self) -> None:
+        if self.expired():
+            raise DeadlineExceeded("deadline expired")
@@ -0,0 +1,180 @@
+"""
+shared/events.py
+================
+One place to build the A2A events every executor emits, cheaply.
+
+Demonstrates:
+- A coarse clock: `now()` re-formats the ISO-8601 timestamp at most once per
+  A2A_CLOCK_RESOLUTION_MS instead of calling datetime.now().isoformat() for
+  every event
+- Pre-built status templates: message-less TaskStatus objects (submitted,
+  working, completed, ...) are built once per clock tick and shared by every
+  event in that tick
+- Artifacts and messages built with one direct constructor call each, leaving
+  unset optional fields out, so artifact_event() costs what building the event
+  by hand does; the saving per task comes from the status events. Pydantic's
+  model_construct() skips validation but resolves every field's alias in
+  Python, which makes it slower than validating for these (camelCase-aliased)
+  models
+
+Shared TaskStatus objects carry no message, so the SDK's task manager (which
+only clears `status.message` when there is one) never mutates them. Statuses
+with a message are built per event.
+
+Usage:
+    await event_queue.enqueue_event(status_event(task_id, context_id, TaskState.working))
+    await event_queue.enqueue_event(
+        status_event(task_id, context_id, TaskState.failed, "Unauthorized", final=True)
+    )
+    await event_queue.enqueue_event(
+        artifact_event(task_id, context_id, "flight_results", data=flight, append=True)
+    )
+
+Configuration (environment variables, all optional):
+    A2A_CLOCK_RESOLUTION_MS   default 1 (0 formats a fresh timestamp every call)
+"""
+
+import math
+import os
+import time
+from datetime import datetime, timezone
+from typing import Any
+from uuid import uuid4
+
+from a2a.types import (
+    Artifact,
+    DataPart,
+    Message,
+    Part,
+    Role,
+    TaskArtifactUpdateEvent,
+    TaskState,
+    TaskStatus,
+    TaskStatusUpdateEvent,
+    TextPart,
+)
+
+
+class CoarseClock:
+    """ISO-8601 UTC timestamps, re-formatted at most once per `resolution` seconds."""
+
+    __slots__ = ("resolution", "_expires", "_text", "_ticks")
+
+    def __init__(self, resolution: float = 0.001) -> None:
+        self.resolution = resolution
+        self._expires = -math.inf
+        self._text = ""
+        self._ticks = 0
+
+    @classmethod
+    def from_env(cls) -> "CoarseClock":
+        return cls(float(os.getenv("A2A_CLOCK_RESOLUTION_MS", "1")) / 1000.0)
+
+    @property
+    def tick(self) -> int:
+        """Changes whenever now() starts returning a new timestamp."""
+        return self._ticks
+
+    def now(self) -> str:
+        wall = time.time()
+        if wall >= self._expires or self.resolution <= 0:
+            if self.resolution > 0:
+                start = wall - wall % self.resolution  # start of this tick
+                self._expires = start + self.resolution
+            else:
+                start = wall
+            self._text = datetime.fromtimestamp(start, timezone.utc).isoformat(timespec="microseconds")
+            self._ticks += 1
+        return self._text
+
+
+clock = CoarseClock.from_env()
+
+
+def now() -> str:
+    return clock.now()
+
+
+# ── Factories ─────────────────────────────────────────────────────────────────
+_status_templates: dict[TaskState, TaskStatus] = {}
+_templates_tick = -1
+
+
+def task_status(state: TaskState, message: Message | None = None) -> TaskStatus:
+    """A TaskStatus stamped with the coarse clock; message-less ones are shared."""
+    global _templates_tick
+    timestamp = clock.now()
+    if message is not None:
+        return TaskStatus(state=state, timestamp=timestamp, message=message)
+    if _templates_tick != clock.tick:
+        _status_templates.clear()
+        _templates_tick = clock.tick
+    status = _status_templates.get(state)
+    if status is None:
+        status = _status_templates[state] = TaskStatus(state=state, timestamp=timestamp)
+    return status
+
+
+def text_part(text: str) -> Part:
+    return Part(root=TextPart(text=text))
+
+
+def data_part(data: dict[str, Any]) -> Part:
+    return Part(root=DataPart(data=data))
+
+
+def agent_message(text: str, metadata: dict[str, Any] | None = None) -> Message:
+    """An agent Message containing a single TextPart."""
+    return Message(
+        message_id=str(uuid4()), role=Role.agent, parts=[text_part(text)], metadata=metadata
+    )
+
+
+def status_event(
+    task_id: str,
+    context_id: str,
+    state: TaskState,
+    text: str | None = None,
+    *,
+    message: Message | None = None,
+    final: bool = False,
+) -> TaskStatusUpdateEvent:
+    """A status update; `text` becomes an agent message on the status."""
+    if text is not None:
+        message = agent_message(text)
+    return TaskStatusUpdateEvent(
+        task_id=task_id,
+        context_id=context_id,
+        status=task_status(state, message),
+        final=final,
+    )
+
+
+def artifact_event(
+    task_id: str,
+    context_id: str,
+    name: str,
+    *,
+    data: dict[str, Any] | None = None,
+    text: str | None = None,
+    parts: list[Part] | None = None,
+    artifact_id: str | None = None,
+    description: str | None = None,
+    metadata: dict[str, Any] | None = None,
+    append: bool | None = None,
+    last_chunk: bool | None = None,
+) -> TaskArtifactUpdateEvent:
+    """An artifact update carrying `parts`, or a single DataPart / TextPart."""
+    if parts is None:
+        parts = [Part(root=DataPart(data=data) if data is not None else TextPart(text=text or ""))]
+    artifact_id = artifact_id or str(uuid4())
+    if description is None and metadata is None:
+        # Passing None for the optional fields costs validation; leave them out.
+        artifact = Artifact(artifact_id=artifact_id, name=name, parts=parts)
+    else:
+        artifact = Artifact(
+            artifact_id=artifact_id, name=name, parts=parts, description=description, metadata=metadata
+        )
+    return TaskArtifactUpdateEvent(
+        task_id=task_id, context_id=context_id, artifact=artifact, append=append, last_chunk=last_chunk
+    )
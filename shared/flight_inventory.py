@@ -0,0 +1,298 @@
+"""
+shared/flight_inventory.py
+==========================
+An in-memory flight inventory indexed for route + date searches.
+
+Demonstrates:
+- A hash index keyed by (origin, destination, departure date), so a search
+  touches only the segments of one route on one day instead of the whole table
+- Secondary sorted arrays per key — by price and by departure time — so
+  "cheapest first, under $X" and "departing between 09:00 and 12:00" are a
+  binary search plus a scan that stops after `limit` matches
+- Date-less searches merging the route's per-day arrays lazily (heapq.merge)
+- Sharded inventories (one index per source file) searched as one: each
+  shard yields its matches best first and a k-way heap merge pulls only as
+  many as the caller consumes, so the first result costs one step per shard
+- Loading inventory from JSON / JSONL, or generating a deterministic synthetic
+  one for benchmarks (benchmarks/inventory.py)
+
+Segments are dicts shaped like the Flight Agent's sample data; `departure` is
+an ISO-8601 UTC timestamp ("2026-03-15T08:00:00Z"), whose first ten
+characters are the date key. Times given to `search()` are compared as
+strings, so a prefix such as "2026-03-15T09:00" works as a bound.
+
+Usage:
+    inventory = FlightInventory(load_inventory("synthetic:100000"))
+    inventory.search("JFK", "CDG", "2026-03-15", limit=10, max_price=900)
+
+    inventory = ShardedInventory(map(FlightInventory, load_shards("ba.jsonl,af.jsonl")))
+"""
+
+import heapq
+import json
+import random
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from collections.abc import Iterable, Iterator
+from datetime import datetime, timedelta, timezone
+from itertools import islice
+from pathlib import Path
+
+SORT_KEYS = ("price", "departure")
+
+# Synthetic inventory: (IATA code, airline) pairs and a fixed set of airports.
+_AIRLINES = (
+    ("AA", "American Airlines"), ("AF", "Air France"), ("BA", "British Airways"),
+    ("DL", "Delta Air Lines"), ("EK", "Emirates"), ("JL", "Japan Airlines"),
+    ("LH", "Lufthansa"), ("NH", "ANA"), ("QF", "Qantas"), ("SQ", "Singapore Airlines"),
+    ("UA", "United Airlines"), ("VS", "Virgin Atlantic"),
+)
+_AIRPORTS = (
+    "AMS", "ATL", "BCN", "BOS", "CDG", "DFW", "DXB", "FCO", "FRA", "HKG",
+    "HND", "IST", "JFK", "LAX", "LHR", "MAD", "MEX", "MIA", "MUC", "NRT",
+    "ORD", "SEA", "SFO", "SIN", "SYD", "YYZ",
+)
+
+
+def _price(segment: dict) -> float:
+    return segment.get("price_usd", float("inf"))
+
+
+def _departure(segment: dict) -> str:
+    return segment["departure"]
+
+
+class _Bucket:
+    """One (origin, destination, date) key: its segments sorted two ways."""
+
+    __slots__ = ("by_price", "prices", "by_departure", "departures")
+
+    def __init__(self, segments: list[dict]) -> None:
+        self.by_price = sorted(segments, key=_price)
+        self.prices = array("d", map(_price, self.by_price))
+        self.by_departure = sorted(segments, key=_departure)
+        self.departures = [segment["departure"] for segment in self.by_departure]
+
+    def scan(
+        self, sort: str, max_price: float | None, after: str | None, before: str | None
+    ) -> Iterator[dict]:
+        if sort == "price":
+            stop = len(self.prices) if max_price is None else bisect_right(self.prices, max_price)
+            segments = self.by_price
+            for i in range(stop):
+                departure = segments[i]["departure"]
+                if (after is None or departure >= after) and (before is None or departure < before):
+                    yield segments[i]
+        else:
+            start = 0 if after is None else bisect_left(self.departures, after)
+            stop = len(self.departures) if before is None else bisect_left(self.departures, before)
+            segments = self.by_departure
+            for i in range(start, stop):
+                if max_price is None or _price(segments[i]) <= max_price:
+                    yield segments[i]
+
+
+class FlightInventory:
+    """Flight segments indexed by (origin, destination, date)."""
+
+    def __init__(self, segments: Iterable[dict]) -> None:
+        grouped: dict[tuple[str, str, str], list[dict]] = defaultdict(list)
+        for segment in segments:
+            key = (segment["origin"], segment["destination"], segment["departure"][:10])
+            grouped[key].append(segment)
+        self._buckets = {key: _Bucket(group) for key, group in grouped.items()}
+        dates: dict[tuple[str, str], list[str]] = defaultdict(list)
+        for origin, destination, date in self._buckets:
+            dates[(origin, destination)].append(date)
+        self._dates = {route: sorted(days) for route, days in dates.items()}
+        self.airports = frozenset(airport for route in self._dates for airport in route)
+        self._count = sum(len(group) for group in grouped.values())
+
+    def __len__(self) -> int:
+        return self._count
+
+    def search(
+        self,
+        origin: str,
+        destination: str,
+        date: str | None = None,
+        *,
+        sort: str = "price",
+        limit: int | None = None,
+        max_price: float | None = None,
+        depart_after: str | None = None,
+        depart_before: str | None = None,
+    ) -> list[dict]:
+        """
+        Segments from `origin` to `destination` (on `date`, or any day),
+        cheapest or earliest first, at most `limit` of them.
+        """
+        return list(islice(
+            self.iter_search(
+                origin, destination, date, sort=sort, max_price=max_price,
+                depart_after=depart_after, depart_before=depart_before,
+            ),
+            limit,
+        ))
+
+    def iter_search(
+        self,
+        origin: str,
+        destination: str,
+        date: str | None = None,
+        *,
+        sort: str = "price",
+        max_price: float | None = None,
+        depart_after: str | None = None,
+        depart_before: str | None = None,
+    ) -> Iterator[dict]:
+        """Lazy form of search(): segments are produced as they are found."""
+        if sort not in SORT_KEYS:
+            raise ValueError(f"sort must be one of {', '.join(SORT_KEYS)}")
+        if date is not None:
+            days = [date]
+        else:
+            days = self._dates.get((origin, destination), [])
+        buckets = [
+            bucket for day in days
+            if (bucket := self._buckets.get((origin, destination, day))) is not None
+        ]
+        scans = [bucket.scan(sort, max_price, depart_after, depart_before) for bucket in buckets]
+        if len(scans) == 1:
+            return scans[0]
+        if sort == "departure":
+            # Days are sorted and a day's departures all share its date prefix.
+            return (segment for scan in scans for segment in scan)
+        return heapq.merge(*scans, key=_price)
+
+    def routes(self) -> list[tuple[str, str]]:
+        return sorted(self._dates)
+
+    def stats(self) -> dict:
+        sizes = [len(bucket.prices) for bucket in self._buckets.values()]
+        return {
+            "segments": self._count,
+            "routes": len(self._dates),
+            "keys": len(self._buckets),
+            "largest_key": max(sizes, default=0),
+        }
+
+
+class ShardedInventory:
+    """Several FlightInventory shards searched as one, best first across all of them."""
+
+    def __init__(self, shards: Iterable[FlightInventory]) -> None:
+        self.shards = list(shards)
+        self.airports = frozenset().union(*(shard.airports for shard in self.shards))
+
+    def __len__(self) -> int:
+        return sum(len(shard) for shard in self.shards)
+
+    def search(
+        self,
+        origin: str,
+        destination: str,
+        date: str | None = None,
+        *,
+        sort: str = "price",
+        limit: int | None = None,
+        max_price: float | None = None,
+        depart_after: str | None = None,
+        depart_before: str | None = None,
+    ) -> list[dict]:
+        """FlightInventory.search() over every shard."""
+        return list(islice(
+            self.iter_search(
+                origin, destination, date, sort=sort, max_price=max_price,
+                depart_after=depart_after, depart_before=depart_before,
+            ),
+            limit,
+        ))
+
+    def iter_search(
+        self,
+        origin: str,
+        destination: str,
+        date: str | None = None,
+        *,
+        sort: str = "price",
+        max_price: float | None = None,
+        depart_after: str | None = None,
+        depart_before: str | None = None,
+    ) -> Iterator[dict]:
+        """
+        Each shard's lazy search, merged on a heap: a result is produced once
+        it beats the next candidate of every other shard.
+        """
+        scans = [
+            shard.iter_search(
+                origin, destination, date, sort=sort, max_price=max_price,
+                depart_after=depart_after, depart_before=depart_before,
+            )
+            for shard in self.shards
+        ]
+        return heapq.merge(*scans, key=_price if sort == "price" else _departure)
+
+    def routes(self) -> list[tuple[str, str]]:
+        return sorted({route for shard in self.shards for route in shard.routes()})
+
+    def stats(self) -> dict:
+        stats = [shard.stats() for shard in self.shards]
+        return {
+            "segments": sum(s["segments"] for s in stats),
+            "routes": len(self.routes()),
+            "keys": sum(s["keys"] for s in stats),
+            "largest_key": max((s["largest_key"] for s in stats), default=0),
+            "shards": len(self.shards),
+        }
+
+
+# ── Loading ───────────────────────────────────────────────────────────────────
+def load_shards(sources: str) -> list[list[dict]]:
+    """The segments of each source in a comma-separated list (see load_inventory)."""
+    return [load_inventory(source.strip()) for source in sources.split(",")]
+
+
+def load_inventory(source: str) -> list[dict]:
+    """
+    Segments from `source`: "synthetic:N[:SEED]", a .jsonl file (one segment
+    per line), or a .json file holding a list (or {"flights": [...]}).
+    """
+    if source.startswith("synthetic:"):
+        _, count, *seed = source.split(":")
+        return generate_inventory(int(count), seed=int(seed[0]) if seed else 0)
+    path = Path(source)
+    if path.suffix == ".jsonl":
+        with path.open(encoding="utf-8") as lines:
+            return [json.loads(line) for line in lines if line.strip()]
+    data = json.loads(path.read_text(encoding="utf-8"))
+    return data["flights"] if isinstance(data, dict) else data
+
+
+def generate_inventory(
+    count: int, seed: int = 0, start: str = "2026-03-15", days: int = 30
+) -> list[dict]:
+    """`count` deterministic synthetic segments between a fixed set of airports."""
+    rng = random.Random(seed)
+    first_day = datetime.fromisoformat(start).replace(tzinfo=timezone.utc)
+    segments = []
+    for n in range(count):
+        origin, destination = rng.sample(_AIRPORTS, 2)
+        code, airline = rng.choice(_AIRLINES)
+        departure = first_day + timedelta(days=rng.randrange(days), minutes=5 * rng.randrange(288))
+        duration_h = round(rng.uniform(1.0, 16.0) * 4) / 4
+        segments.append({
+            "flight_id": f"SYN{n:07d}",
+            "airline": airline,
+            "iata_code": f"{code}{rng.randrange(1, 9999)}",
+            "origin": origin,
+            "destination": destination,
+            "departure": departure.strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "arrival": (departure + timedelta(hours=duration_h)).strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "duration_h": duration_h,
+            "price_usd": round(80 + duration_h * rng.uniform(40, 120)),
+            "seats_available": rng.randrange(0, 40),
+            "class": "economy",
+        })
+    return segments
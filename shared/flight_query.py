@@ -0,0 +1,411 @@
+"""
+shared/flight_query.py
+======================
+Flight search requests as typed queries: a text / DataPart parser, filter
+plans compiled against the inventory index, and an LRU cache of parsed text.
+
+Demonstrates:
+- Parsing free text such as "Find business flights from New York to London
+  between 2026-03-15 and 2026-03-17 under $900" into a FlightQuery: city to
+  IATA resolution, dates and date ranges, cabin class, price cap, stops,
+  ranking, time of day and result count
+- The same FlightQuery from a DataPart with explicit fields, so programmatic
+  callers skip text parsing
+- Compiling a query once into a FilterPlan: which index keys to read (one
+  per day), which conditions the index answers with a binary search (price
+  cap, departure window) and which remain a residual per-segment predicate
+  (cabin, time of day across every day)
+- An LRU cache keyed by the normalized text: repeated phrasing costs one dict
+  lookup, and each cached query keeps its compiled plan
+
+Relative dates ("tomorrow", "next week") are not resolved: the tutorial's
+inventory is fixed in time, so such queries search every day.
+
+Usage:
+    parser = QueryParser(airports=inventory.airports)
+    query = parser.parse("Cheapest flights from NYC to London on 2026-03-15 under $800")
+    for flight in query.plan.run(inventory):
+        ...
+
+Configuration (environment variables, all optional; PREFIX is chosen by the
+caller, e.g. FLIGHT_AGENT):
+    {PREFIX}_QUERY_CACHE_SIZE   parsed queries kept (default 1024; 0 disables)
+"""
+
+import heapq
+import os
+import re
+from collections import OrderedDict
+from collections.abc import Callable, Iterable, Iterator
+from dataclasses import asdict, dataclass
+from datetime import date, datetime, timedelta
+from functools import cached_property
+from itertools import chain, islice
+
+from shared.flight_inventory import FlightInventory, ShardedInventory
+
+CABINS = ("economy", "premium_economy", "business", "first")
+SORT_KEYS = ("price", "duration", "stops", "departure")
+MAX_DAYS = 31  # longest date range searched day by day
+
+# City names understood in text and DataParts, mapped to the airport searched.
+# Three-letter codes present in the inventory are accepted as they are.
+CITY_AIRPORTS = {
+    "new york": "JFK", "nyc": "JFK", "london": "LHR", "paris": "CDG", "par": "CDG",
+    "tokyo": "HND", "sydney": "SYD", "rome": "FCO", "amsterdam": "AMS",
+    "frankfurt": "FRA", "madrid": "MAD", "dubai": "DXB", "singapore": "SIN",
+    "hong kong": "HKG", "los angeles": "LAX", "san francisco": "SFO", "chicago": "ORD",
+}
+DEFAULT_ORIGIN = "JFK"  # "flights to Paris" departs from New York
+
+DAY_PARTS = {"morning": ("00:00", "12:00"), "afternoon": ("12:00", "18:00"), "evening": ("18:00", "24:00")}
+
+
+@dataclass(frozen=True)
+class FlightQuery:
+    origin: str | None = None
+    destination: str | None = None
+    date_from: str | None = None        # ISO dates, inclusive; None searches every day
+    date_to: str | None = None
+    cabin: str | None = None
+    max_price: float | None = None
+    max_stops: int | None = None        # None: the search's default; 0: direct only
+    connections: bool = False
+    sort: str = "price"
+    depart_after: str | None = None     # "HH:MM" on each day searched
+    depart_before: str | None = None
+    limit: int | None = None
+
+    def __post_init__(self) -> None:
+        if self.sort not in SORT_KEYS:
+            raise ValueError(f"sort must be one of {', '.join(SORT_KEYS)}")
+        if self.cabin is not None and self.cabin not in CABINS:
+            raise ValueError(f"cabin must be one of {', '.join(CABINS)}")
+        if self.date_from and self.date_to and self.date_from > self.date_to:
+            raise ValueError("date_from is after date_to")
+        if self.max_price is not None and self.max_price < 0:
+            raise ValueError("max_price must be >= 0")
+        if self.max_stops is not None and self.max_stops < 0:
+            raise ValueError("max_stops must be >= 0")
+        if self.limit is not None and self.limit < 1:
+            raise ValueError("limit must be >= 1")
+
+    @property
+    def date(self) -> str | None:
+        """The one day searched, or None for a range or every day."""
+        return self.date_from if self.date_from == self.date_to else None
+
+    @cached_property
+    def plan(self) -> "FilterPlan":
+        """Compiled on first use and kept with the (cached) query."""
+        return FilterPlan(self)
+
+    def as_dict(self) -> dict:
+        return {name: value for name, value in asdict(self).items() if value is not None and value is not False}
+
+
+class FilterPlan:
+    """How one FlightQuery reads a FlightInventory, decided once."""
+
+    def __init__(self, query: FlightQuery) -> None:
+        self.query = query
+        self.days = _days(query.date_from, query.date_to)  # None: every day
+        self.order = "departure" if query.sort == "departure" else "price"
+        self.resort = query.sort == "duration"  # the index has no duration order
+        self.window = (query.depart_after, query.depart_before)
+        checks: list[Callable[[dict], bool]] = []
+        if query.cabin is not None:
+            checks.append(lambda segment, cabin=query.cabin: segment.get("class", "economy") == cabin)
+        if self.days is None and (query.depart_after or query.depart_before):
+            # Without a day the index cannot bound the time of day: check it per segment.
+            after, before = query.depart_after or "00:00", query.depart_before or "24:00"
+            checks.append(lambda segment: after <= segment["departure"][11:16] < before)
+        self.predicate = _all(checks)
+
+    def run(
+        self, inventory: FlightInventory | ShardedInventory, limit: int | None = None
+    ) -> Iterator[dict]:
+        """The first `limit` matching segments (or all of them) in the query's order."""
+        query = self.query
+        after, before = self.window
+        if self.days is None:
+            scans = [inventory.iter_search(
+                query.origin, query.destination, sort=self.order, max_price=query.max_price
+            )]
+        else:
+            scans = [
+                inventory.iter_search(
+                    query.origin, query.destination, day,
+                    sort=self.order, max_price=query.max_price,
+                    depart_after=f"{day}T{after}" if after else None,
+                    depart_before=f"{day}T{before}" if before else None,
+                )
+                for day in self.days
+            ]
+        if len(scans) == 1:
+            results = scans[0]
+        elif self.order == "departure":
+            results = chain.from_iterable(scans)  # days in order
+        else:
+            results = heapq.merge(*scans, key=_price)
+        if self.predicate is not None:
+            results = filter(self.predicate, results)
+        if self.resort:
+            # Top-K on a heap of `limit` entries instead of sorting every match.
+            if limit is None:
+                return iter(sorted(results, key=_duration))
+            return iter(heapq.nsmallest(limit, results, key=_duration))
+        return results if limit is None else islice(results, limit)
+
+    def describe(self) -> str:
+        query = self.query
+        if self.days is None:
+            when = "every day"
+        elif len(self.days) == 1:
+            when = self.days[0]
+        else:
+            when = f"{self.days[0]}..{self.days[-1]} ({len(self.days)} keys)"
+        index = [f"by {self.order}"]
+        if query.max_price is not None:
+            index.append(f"price <= {query.max_price:g}")
+        if self.days is not None and any(self.window):
+            index.append(f"departure {self.window[0] or '00:00'}-{self.window[1] or '24:00'}")
+        residual = []
+        if query.cabin:
+            residual.append(f"class == {query.cabin}")
+        if self.days is None and any(self.window):
+            residual.append("time of day")
+        if self.resort:
+            residual.append("sort by duration")
+        text = f"{query.origin}-{query.destination} {when}, index: {', '.join(index)}"
+        return text + (f"; then: {', '.join(residual)}" if residual else "")
+
+
+class QueryParser:
+    """Text or DataPart fields -> FlightQuery, with an LRU cache of parsed text."""
+
+    def __init__(
+        self,
+        airports: Iterable[str] = (),
+        places: dict[str, str] | None = None,
+        default_origin: str = DEFAULT_ORIGIN,
+        cache_size: int = 1024,
+        default_year: int | None = None,
+    ) -> None:
+        self.airports = frozenset(airports)
+        self.places = CITY_AIRPORTS if places is None else places
+        self.default_origin = default_origin
+        self.cache_size = cache_size
+        self.default_year = default_year or date.today().year
+        self._cache: OrderedDict[str, FlightQuery] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @classmethod
+    def from_env(cls, prefix: str, airports: Iterable[str] = (), **kwargs) -> "QueryParser":
+        return cls(airports, cache_size=int(os.getenv(f"{prefix}_QUERY_CACHE_SIZE", "1024")), **kwargs)
+
+    def parse(self, text: str) -> FlightQuery:
+        """FlightQuery for free text; raises ValueError for an impossible one (e.g. 2026-02-30)."""
+        key = " ".join(text.lower().split())
+        query = self._cache.get(key)
+        if query is not None:
+            self._cache.move_to_end(key)
+            self.hits += 1
+            return query
+        self.misses += 1
+        query = self._parse_text(key)
+        if self.cache_size > 0:
+            self._cache[key] = query
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+                self.evictions += 1
+        return query
+
+    def from_data(self, data: dict) -> FlightQuery:
+        """
+        FlightQuery from explicit fields: origin, destination (city or IATA),
+        date or date_from / date_to, cabin, max_price, max_stops, connections,
+        sort, depart_after, depart_before, limit.
+        """
+        destination = data.get("destination")
+        origin = data.get("origin")
+        resolved_destination = self.resolve(destination) if destination else None
+        if destination and resolved_destination is None:
+            raise ValueError(f"unknown destination {destination!r}")
+        resolved_origin = self.resolve(origin) if origin else self.default_origin
+        if resolved_origin is None:
+            raise ValueError(f"unknown origin {origin!r}")
+        date_from = data.get("date_from", data.get("date"))
+        date_to = data.get("date_to", date_from)
+        for value in (date_from, date_to):
+            if value is not None:
+                date.fromisoformat(value)
+        max_stops = data.get("max_stops")
+        cabin = data.get("cabin")
+        return FlightQuery(
+            origin=resolved_origin,
+            destination=resolved_destination,
+            date_from=date_from,
+            date_to=date_to,
+            cabin=_CABIN_NAMES.get(cabin.lower(), cabin.lower()) if cabin else None,
+            max_price=None if data.get("max_price") is None else float(data["max_price"]),
+            max_stops=None if max_stops is None else int(max_stops),
+            connections=bool(data.get("connections", bool(max_stops))),
+            sort=data.get("sort", "price"),
+            depart_after=data.get("depart_after"),
+            depart_before=data.get("depart_before"),
+            limit=None if data.get("limit") is None else int(data["limit"]),
+        )
+
+    def resolve(self, name: str) -> str | None:
+        """Airport code for a city name or a known IATA code."""
+        key = " ".join(name.lower().split())
+        if key in self.places:
+            return self.places[key]
+        return key.upper() if key.upper() in self.airports else None
+
+    def metrics(self) -> dict:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": len(self._cache),
+        }
+
+    # ── Internals ─────────────────────────────────────────────────────────────
+    def _parse_text(self, text: str) -> FlightQuery:
+        fields: dict = {}
+        # Dates first: "2026-03-15 to 2026-03-17" must not look like a route.
+        days = []
+        for pattern, convert in ((_ISO_DATE, _iso), (_MONTH_DAY, self._month_day), (_DAY_MONTH, self._day_month)):
+            days.extend(convert(match) for match in pattern.finditer(text))
+            text = pattern.sub(" \0 ", text)  # NUL marks where a date was
+        text = _DATE_RANGE.sub(" ", text).replace("\0", " ")
+        if days:
+            fields["date_from"], fields["date_to"] = min(days), max(days)
+
+        if match := _PRICE.search(text) or _DOLLARS.search(text):
+            fields["max_price"] = float(match.group(1).replace(",", ""))
+            text = text[:match.start()] + " " + text[match.end():]
+        if match := _CABIN.search(text):
+            fields["cabin"] = _CABIN_NAMES[match.group(1)]
+        if _DIRECT.search(text):
+            fields["max_stops"] = 0
+        elif match := _STOP_COUNT.search(text):
+            count = match.group(1)
+            fields["max_stops"] = _NUMBERS[count] if count in _NUMBERS else int(count)
+            text = text[:match.start()] + " " + text[match.end():]
+        fields["connections"] = fields.get("max_stops") != 0 and (
+            fields.get("max_stops", 0) > 0 or _CONNECTING.search(text) is not None
+        )
+        if _FEWEST.search(text):
+            fields["sort"] = "stops"
+        elif _FASTEST.search(text):
+            fields["sort"] = "duration"
+        elif _EARLIEST.search(text):
+            fields["sort"] = "departure"
+        if match := _DAY_PART.search(text):
+            fields["depart_after"], fields["depart_before"] = DAY_PARTS[match.group(1)]
+        if match := _LIMIT.search(text):
+            fields["limit"] = int(match.group(1) or match.group(2))
+            text = text[:match.start()] + " " + text[match.end():]
+
+        fields["origin"], fields["destination"] = self._route(text)
+        return FlightQuery(**fields)
+
+    def _route(self, text: str) -> tuple[str | None, str | None]:
+        if match := _CODE_PAIR.search(text):
+            origin, destination = self.resolve(match.group(1)), self.resolve(match.group(2))
+            if origin and destination:
+                return origin, destination
+        before, found, after = text.partition(" to ")
+        if not found:
+            return None, None
+        origin = self._place(_WORD.findall(before), from_end=True) or self.default_origin
+        return origin, self._place(_WORD.findall(after), from_end=False)
+
+    def _place(self, words: list[str], from_end: bool) -> str | None:
+        """The longest known place at the end (or start) of `words`."""
+        for size in (3, 2, 1):
+            if len(words) >= size:
+                code = self.resolve(" ".join(words[-size:] if from_end else words[:size]))
+                if code is not None:
+                    return code
+        return None
+
+    def _month_day(self, match: re.Match) -> str:
+        return _named(match.group(1), match.group(2), match.group(3), self.default_year)
+
+    def _day_month(self, match: re.Match) -> str:
+        return _named(match.group(2), match.group(1), match.group(3), self.default_year)
+
+
+# ── Grammar ───────────────────────────────────────────────────────────────────
+_MONTHS = ("jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec")
+_MONTH = r"(jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)[a-z]*\.?"
+_ISO_DATE = re.compile(r"\b(\d{4}-\d{2}-\d{2})\b")
+_MONTH_DAY = re.compile(rf"\b{_MONTH}\s+(\d{{1,2}})(?:st|nd|rd|th)?(?:,?\s+(\d{{4}}))?\b")
+_DAY_MONTH = re.compile(rf"\b(\d{{1,2}})(?:st|nd|rd|th)?\s+(?:of\s+)?{_MONTH}(?:,?\s+(\d{{4}}))?\b")
+_DATE_RANGE = re.compile(r"(?:\b(?:between|from)\s+)?\0\s*(?:to|and|through|until|-)\s*\0")
+_PRICE = re.compile(
+    r"\b(?:under|below|less than|cheaper than|max(?:imum)?|up to|at most|budget(?: of)?)\s*\$?\s*"
+    r"(\d[\d,]*(?:\.\d+)?)(?!\s*-?\s*stops?\b)(?![\d,.])\s*(?:usd|dollars)?"
+)
+_DOLLARS = re.compile(r"\$\s*(\d[\d,]*(?:\.\d+)?)")
+_CABIN = re.compile(r"\b(premium economy|economy|coach|business|first class)\b")
+_CABIN_NAMES = {
+    "premium economy": "premium_economy", "economy": "economy", "coach": "economy",
+    "business": "business", "first class": "first", "first": "first",
+    "premium_economy": "premium_economy",
+}
+_DIRECT = re.compile(r"\b(?:non-?stop|direct)\b")
+_STOP_COUNT = re.compile(r"\b(?:(?:up to|at most|max(?:imum)?|with)\s+)?(\d|no|one|two|three)[ -]stops?\b")
+_NUMBERS = {"no": 0, "one": 1, "two": 2, "three": 3}
+_CONNECTING = re.compile(r"\b(?:connect\w*|stops?|stopovers?|via|layovers?|multi-leg|itinerar\w*)\b")
+_FEWEST = re.compile(r"\b(?:fewest|least)\s+(?:stops|connections)\b")
+_FASTEST = re.compile(r"\b(?:fastest|quickest|shortest)\b")
+_EARLIEST = re.compile(r"\bearliest\b")
+_DAY_PART = re.compile(r"\b(morning|afternoon|evening)\b")
+_LIMIT = re.compile(r"\btop\s+(\d+)\b|\b(\d+)\s+(?:cheapest|fastest|best|earliest|flights|options|results)\b")
+_CODE_PAIR = re.compile(r"\b([a-z]{3})\s*(?:-|>|→)\s*([a-z]{3})\b")
+_WORD = re.compile(r"[a-z0-9]+")
+
+
+def _iso(match: re.Match) -> str:
+    try:
+        return date.fromisoformat(match.group(1)).isoformat()
+    except ValueError:
+        raise ValueError(f"{match.group(1)} is not a valid date") from None
+
+
+def _named(month: str, day: str, year: str | None, default_year: int) -> str:
+    try:
+        return date(int(year) if year else default_year, _MONTHS.index(month) + 1, int(day)).isoformat()
+    except ValueError:
+        raise ValueError(f"{month} {day} is not a valid date") from None
+
+
+def _days(first: str | None, last: str | None) -> list[str] | None:
+    if first is None:
+        return None
+    start, end = datetime.fromisoformat(first), datetime.fromisoformat(last or first)
+    count = min((end - start).days + 1, MAX_DAYS)
+    return [(start + timedelta(days=n)).strftime("%Y-%m-%d") for n in range(count)]
+
+
+def _price(segment: dict) -> float:
+    return segment.get("price_usd", float("inf"))
+
+
+def _duration(segment: dict) -> float:
+    return segment.get("duration_h", float("inf"))
+
+
+def _all(checks: list[Callable[[dict], bool]]) -> Callable[[dict], bool] | None:
+    if not checks:
+        return None
+    if len(checks) == 1:
+        return checks[0]
+    return lambda segment: all(check(segment) for check in checks)
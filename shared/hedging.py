@@ -0,0 +1,177 @@
+"""
+shared/hedging.py
+=================
+Hedged requests across replicas of the same agent.
+
+Demonstrates:
+- Sending a request to one replica and, if its first result has not arrived
+  within a delay, sending the same request to a second replica
+- Taking whichever replica produces a first result first and cancelling
+  (and closing) the loser's stream
+- Deriving the hedge delay from a percentile of recently observed
+  time-to-first-result, so only the slow tail triggers extra requests
+- Failing over immediately when an attempt errors before producing a result
+
+An "attempt" is a zero-argument callable returning an async iterator of
+results (e.g. the DataParts of one SSE stream). Only the winning attempt's
+results are yielded.
+
+Configuration (environment variables, all optional):
+    A2A_HEDGE_PERCENTILE     default 95   (percentile of time-to-first-result)
+    A2A_HEDGE_MIN_DELAY      default 0.05 (seconds)
+    A2A_HEDGE_MAX_DELAY      default 2.0  (seconds)
+    A2A_HEDGE_DEFAULT_DELAY  default 1.0  (seconds, until enough samples exist)
+    A2A_HEDGE_MAX_ATTEMPTS   default 2    (primary + hedges)
+"""
+
+import asyncio
+import logging
+import math
+import os
+import time
+from collections import deque
+from collections.abc import AsyncIterator, Callable, Sequence
+from dataclasses import dataclass
+from typing import TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+Attempt = Callable[[], AsyncIterator[T]]
+
+_EMPTY = object()  # marks a winning attempt that finished without any result
+
+
+class LatencyWindow:
+    """Rolling window of latency samples with nearest-rank percentiles."""
+
+    def __init__(self, size: int = 200) -> None:
+        self._samples: deque[float] = deque(maxlen=size)
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def record(self, seconds: float) -> None:
+        self._samples.append(seconds)
+
+    def percentile(self, pct: float) -> float | None:
+        if not self._samples:
+            return None
+        ordered = sorted(self._samples)
+        rank = max(0, math.ceil(pct / 100.0 * len(ordered)) - 1)
+        return ordered[rank]
+
+
+@dataclass(frozen=True)
+class HedgePolicy:
+    percentile: float = 95.0
+    min_delay: float = 0.05
+    max_delay: float = 2.0
+    default_delay: float = 1.0
+    min_samples: int = 20
+    max_attempts: int = 2
+
+    @classmethod
+    def from_env(cls) -> "HedgePolicy":
+        return cls(
+            percentile=float(os.getenv("A2A_HEDGE_PERCENTILE", cls.percentile)),
+            min_delay=float(os.getenv("A2A_HEDGE_MIN_DELAY", cls.min_delay)),
+            max_delay=float(os.getenv("A2A_HEDGE_MAX_DELAY", cls.max_delay)),
+            default_delay=float(os.getenv("A2A_HEDGE_DEFAULT_DELAY", cls.default_delay)),
+            max_attempts=int(os.getenv("A2A_HEDGE_MAX_ATTEMPTS", cls.max_attempts)),
+        )
+
+
+class Hedger:
+    """Runs attempts with hedging; one instance per agent role keeps its own latency window."""
+
+    def __init__(self, name: str, policy: HedgePolicy | None = None) -> None:
+        self.name = name
+        self.policy = policy or HedgePolicy.from_env()
+        self.first_result_latency = LatencyWindow()
+        self.requests = 0
+        self.hedges_sent = 0
+        self.hedge_wins = 0
+        self.failovers = 0
+
+    def delay(self) -> float:
+        """Current hedge delay: the configured percentile, clamped to [min, max]."""
+        if len(self.first_result_latency) < self.policy.min_samples:
+            return self.policy.default_delay
+        observed = self.first_result_latency.percentile(self.policy.percentile)
+        return min(self.policy.max_delay, max(self.policy.min_delay, observed))
+
+    def metrics(self) -> dict:
+        return {
+            "requests": self.requests,
+            "hedges_sent": self.hedges_sent,
+            "hedge_wins": self.hedge_wins,
+            "failovers": self.failovers,
+            "delay_s": round(self.delay(), 4),
+        }
+
+    async def stream(self, attempts: Sequence[Attempt]) -> AsyncIterator[T]:
+        """Yield the results of whichever attempt produces a first result first."""
+        self.requests += 1
+        max_attempts = min(len(attempts), self.policy.max_attempts)
+        iterators: list[AsyncIterator[T]] = []
+        launched_at: list[float] = []
+        pending: dict[asyncio.Task, int] = {}
+
+        def launch() -> None:
+            iterator = aiter(attempts[len(iterators)]())
+            iterators.append(iterator)
+            launched_at.append(time.monotonic())
+            pending[asyncio.create_task(anext(iterator))] = len(iterators) - 1
+
+        launch()
+        winner: int | None = None
+        hedged = False
+        first = _EMPTY
+        last_error: BaseException | None = None
+        try:
+            while winner is None:
+                can_hedge = len(iterators) < max_attempts
+                done, _ = await asyncio.wait(
+                    pending,
+                    timeout=self.delay() if can_hedge else None,
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+                if not done:
+                    logger.info("Hedging %s: no first result after %.3fs", self.name, self.delay())
+                    self.hedges_sent += 1
+                    hedged = True
+                    launch()
+                    continue
+                for task in done:
+                    index = pending.pop(task)
+                    error = task.exception()
+                    if error is None or isinstance(error, StopAsyncIteration):
+                        winner = index
+                        first = task.result() if error is None else _EMPTY
+                        break
+                    last_error = error
+                    logger.warning("%s attempt %d failed: %s", self.name, index + 1, error)
+                if winner is None and not pending:
+                    if len(iterators) >= len(attempts):
+                        raise last_error
+                    self.failovers += 1
+                    launch()
+        finally:
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+            for index, iterator in enumerate(iterators):
+                if index != winner and hasattr(iterator, "aclose"):
+                    await iterator.aclose()
+
+        self.first_result_latency.record(time.monotonic() - launched_at[winner])
+        if hedged and winner > 0:
+            self.hedge_wins += 1
+        if first is _EMPTY:
+            return
+        yield first
+        async for item in iterators[winner]:
+            yield item
+
@@ -0,0 +1,170 @@
+"""
+shared/http_pool.py
+===================
+Long-lived, pooled HTTP clients for outbound A2A calls.
+
+Demonstrates:
+- One httpx.AsyncClient (and therefore one connection pool) per remote agent,
+  reused across every request instead of a fresh TCP/TLS handshake per call
+- Configurable pool limits, keep-alive expiry and HTTP/2 (when `h2` is installed)
+- Connection reuse counters collected from httpcore trace events
+
+Configuration (environment variables, all optional):
+    A2A_POOL_MAX_CONNECTIONS            default 100
+    A2A_POOL_MAX_KEEPALIVE_CONNECTIONS  default 20
+    A2A_POOL_KEEPALIVE_EXPIRY           default 30.0 (seconds)
+    A2A_POOL_HTTP2                      default 1 (ignored if `h2` is missing)
+"""
+
+import importlib.util
+import logging
+import os
+from dataclasses import dataclass, field
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+_H2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+
+def _env_flag(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() not in ("0", "false", "no", "off", "")
+
+
+@dataclass(frozen=True)
+class PoolConfig:
+    """Connection pool settings applied to every client in an AgentHTTPPool."""
+
+    max_connections: int = 100
+    max_keepalive_connections: int = 20
+    keepalive_expiry: float = 30.0
+    http2: bool = True
+    timeout: float = 30.0
+
+    @classmethod
+    def from_env(cls) -> "PoolConfig":
+        return cls(
+            max_connections=int(os.getenv("A2A_POOL_MAX_CONNECTIONS", cls.max_connections)),
+            max_keepalive_connections=int(
+                os.getenv("A2A_POOL_MAX_KEEPALIVE_CONNECTIONS", cls.max_keepalive_connections)
+            ),
+            keepalive_expiry=float(os.getenv("A2A_POOL_KEEPALIVE_EXPIRY", cls.keepalive_expiry)),
+            http2=_env_flag("A2A_POOL_HTTP2", cls.http2),
+        )
+
+    def limits(self) -> httpx.Limits:
+        return httpx.Limits(
+            max_connections=self.max_connections,
+            max_keepalive_connections=self.max_keepalive_connections,
+            keepalive_expiry=self.keepalive_expiry,
+        )
+
+
+@dataclass
+class PoolStats:
+    """Per-client counters. `reuse_rate` is the share of requests that did not open a connection."""
+
+    requests: int = 0
+    connections_opened: int = 0
+
+    @property
+    def reuse_rate(self) -> float:
+        if not self.requests:
+            return 0.0
+        return max(0.0, 1.0 - self.connections_opened / self.requests)
+
+    def as_dict(self) -> dict:
+        return {
+            "requests": self.requests,
+            "connections_opened": self.connections_opened,
+            "reuse_rate": round(self.reuse_rate, 4),
+        }
+
+
+class _CountingTransport(httpx.AsyncHTTPTransport):
+    """AsyncHTTPTransport that counts requests and newly opened TCP connections."""
+
+    def __init__(self, stats: PoolStats, **kwargs) -> None:
+        super().__init__(**kwargs)
+        self._stats = stats
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        self._stats.requests += 1
+        upstream_trace = request.extensions.get("trace")
+
+        async def trace(event_name: str, info: dict) -> None:
+            if event_name == "connection.connect_tcp.complete":
+                self._stats.connections_opened += 1
+            if upstream_trace is not None:
+                await upstream_trace(event_name, info)
+
+        request.extensions = {**request.extensions, "trace": trace}
+        return await super().handle_async_request(request)
+
+
+@dataclass
+class _PooledClient:
+    client: httpx.AsyncClient
+    stats: PoolStats = field(default_factory=PoolStats)
+
+
+class AgentHTTPPool:
+    """
+    Registry of long-lived httpx.AsyncClient instances keyed by agent base URL.
+
+    Clients are created on first use (or eagerly via `register`) and live until
+    `aclose()` is called, typically from the owning app's shutdown hook.
+    Default headers (auth) are bound to the client at registration time.
+    """
+
+    def __init__(
+        self,
+        config: PoolConfig | None = None,
+        transports: dict[str, httpx.AsyncBaseTransport] | None = None,
+    ) -> None:
+        self.config = config or PoolConfig.from_env()
+        # Fixed transports by base URL, e.g. httpx.ASGITransport to call an
+        # agent in-process (benchmarks/executors.py).
+        self._transports = {url.rstrip("/"): t for url, t in (transports or {}).items()}
+        self._headers: dict[str, dict] = {}
+        self._clients: dict[str, _PooledClient] = {}
+
+    def register(self, base_url: str, headers: dict | None = None) -> None:
+        """Declare an agent and the default headers its client should send."""
+        key = base_url.rstrip("/")
+        self._headers[key] = dict(headers or {})
+        if key in self._clients:
+            self._clients[key].client.headers.update(self._headers[key])
+
+    def client(self, base_url: str) -> httpx.AsyncClient:
+        """Return the shared client for `base_url`, creating it on first use."""
+        key = base_url.rstrip("/")
+        pooled = self._clients.get(key)
+        if pooled is None or pooled.client.is_closed:
+            stats = PoolStats()
+            http2 = self.config.http2 and _H2_AVAILABLE
+            transport = self._transports.get(key) or _CountingTransport(
+                stats, limits=self.config.limits(), http2=http2
+            )
+            client = httpx.AsyncClient(
+                headers=self._headers.get(key, {}),
+                timeout=self.config.timeout,
+                transport=transport,
+            )
+            pooled = self._clients[key] = _PooledClient(client=client, stats=stats)
+            logger.debug("Opened pooled client for %s (http2=%s)", key, http2)
+        return pooled.client
+
+    def stats(self) -> dict[str, dict]:
+        """Connection reuse counters per agent base URL."""
+        return {url: pooled.stats.as_dict() for url, pooled in self._clients.items()}
+
+    async def aclose(self) -> None:
+        for url, pooled in self._clients.items():
+            logger.info("Closing pooled client for %s: %s", url, pooled.stats.as_dict())
+            await pooled.client.aclose()
+        self._clients.clear()
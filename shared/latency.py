@@ -0,0 +1,106 @@
+"""
+shared/latency.py
+=================
+Latency recording for the benchmark and replay tools.
+
+Demonstrates:
+- An HDR-style histogram: log-spaced buckets with a fixed relative error
+  (1% by default) from 1 µs up, so memory stays constant however many
+  requests are recorded and percentiles stay accurate in the tail
+- Exact count, min, max and mean alongside bucketed percentiles
+- Merging histograms (e.g. per-worker into per-target)
+- Percentile tables for the terminal and plain dicts for JSON reports
+
+Usage:
+    hist = LatencyHistogram()
+    hist.record(0.0123)                  # seconds
+    hist.percentile(99)                  # seconds (upper edge of its bucket)
+    print(format_table({"flight": hist.summary()}))
+"""
+
+import math
+from collections.abc import Mapping
+
+PERCENTILES = (50.0, 90.0, 99.0, 99.9)
+
+
+class LatencyHistogram:
+    """Log-bucketed latency histogram (seconds in, seconds out)."""
+
+    def __init__(self, precision: float = 0.01, lowest: float = 1e-6) -> None:
+        self.precision = precision
+        self.lowest = lowest
+        self._log_base = math.log1p(precision)
+        self._counts: dict[int, int] = {}
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = 0.0
+
+    def record(self, seconds: float) -> None:
+        seconds = max(seconds, 0.0)
+        index = 0 if seconds <= self.lowest else math.ceil(
+            math.log(seconds / self.lowest) / self._log_base
+        )
+        self._counts[index] = self._counts.get(index, 0) + 1
+        self.count += 1
+        self.total += seconds
+        self.min = min(self.min, seconds)
+        self.max = max(self.max, seconds)
+
+    def merge(self, other: "LatencyHistogram") -> None:
+        if (other.precision, other.lowest) != (self.precision, self.lowest):
+            raise ValueError("cannot merge histograms with different bucket layouts")
+        for index, count in other._counts.items():
+            self._counts[index] = self._counts.get(index, 0) + count
+        self.count += other.count
+        self.total += other.total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    def percentile(self, pct: float) -> float | None:
+        """Nearest-rank percentile, reported as its bucket's upper edge (capped at max)."""
+        if not self.count:
+            return None
+        rank = max(1, math.ceil(pct / 100.0 * self.count))
+        seen = 0
+        for index in sorted(self._counts):
+            seen += self._counts[index]
+            if seen >= rank:
+                return min(self.lowest * (1 + self.precision) ** index, self.max)
+        return self.max
+
+    @property
+    def mean(self) -> float | None:
+        return self.total / self.count if self.count else None
+
+    def summary(self, percentiles: tuple[float, ...] = PERCENTILES) -> dict:
+        """Count plus min / mean / percentiles / max in milliseconds."""
+        def ms(value: float | None) -> float | None:
+            return None if value is None else round(value * 1000, 3)
+
+        return {
+            "count": self.count,
+            "min_ms": ms(self.min if self.count else None),
+            "mean_ms": ms(self.mean),
+            **{f"p{pct:g}_ms": ms(self.percentile(pct)) for pct in percentiles},
+            "max_ms": ms(self.max if self.count else None),
+        }
+
+
+def format_table(rows: Mapping[str, dict], title: str = "") -> str:
+    """Render `{label: summary()}` as an aligned percentile table."""
+    if not rows:
+        return f"{title}\n  (no samples)" if title else "(no samples)"
+    columns = list(next(iter(rows.values())))
+    width = max(len(label) for label in rows)
+    header = f"  {'':<{width}}  " + "  ".join(f"{c.removesuffix('_ms'):>9}" for c in columns)
+    lines = [title, header] if title else [header]
+    for label, summary in rows.items():
+        cells = []
+        for column in columns:
+            value = summary.get(column)
+            cells.append(f"{'-' if value is None else value:>9}" if not isinstance(value, float)
+                         else f"{value:>9.2f}")
+        lines.append(f"  {label:<{width}}  " + "  ".join(cells))
+    return "\n".join(lines)
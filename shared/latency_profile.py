@@ -0,0 +1,267 @@
+"""
+shared/latency_profile.py
+=========================
+Simulated work for the mock agents: configurable latency distributions and
+fault injection, so the same agent code serves zero-latency benchmarks and
+production-like soak tests.
+
+Demonstrates:
+- Latency profiles per agent, chosen from the environment:
+    fixed      every step takes WORK_DELAY
+    uniform    uniform between LATENCY_MIN and LATENCY_MAX
+    lognormal  median WORK_DELAY, shape LATENCY_SIGMA (a long right tail)
+    histogram  replays a recorded distribution: a latency summary
+               ({"min_ms", "p50_ms", ..., "max_ms"}, as written by
+               benchmarks/load.py, replay.py and executors.py) sampled by
+               interpolating between its percentiles, or a JSON list of
+               samples in seconds drawn from uniformly
+- Fault injection per step: failing with `InjectedFault`, or stalling for
+  FAULT_STALL_SECONDS (which the caller's deadline cuts short as usual)
+- A zero-cost path when the profile is off: `step()` returns without
+  awaiting, so benchmarks measure only the executor
+- A seedable random generator for reproducible runs
+
+A "step" is one unit of an agent's simulated work: one streamed flight, one
+forecast day, one hotel search, one booking turn.
+
+Configuration (environment variables, all optional; PREFIX is chosen by the
+agent, e.g. FLIGHT_AGENT or HOTEL_AGENT):
+    {PREFIX}_LATENCY               fixed | uniform | lognormal | histogram | off
+    {PREFIX}_WORK_DELAY            seconds: the fixed delay, or lognormal median
+    {PREFIX}_LATENCY_MIN           uniform lower bound   (default 0)
+    {PREFIX}_LATENCY_MAX           uniform upper bound   (default 2 x WORK_DELAY);
+                                   caps samples of the other profiles when set
+    {PREFIX}_LATENCY_SIGMA         lognormal shape       (default 0.5)
+    {PREFIX}_LATENCY_HISTOGRAM     path[#key.path] of the JSON to replay, e.g.
+                                   before.json#results.flight.latency
+    {PREFIX}_LATENCY_SCALE         multiplier for every sample (default 1)
+    {PREFIX}_LATENCY_SEED          seed for reproducible runs
+    {PREFIX}_FAULT_ERROR_RATE      probability a step fails     (default 0)
+    {PREFIX}_FAULT_STALL_RATE      probability a step stalls    (default 0)
+    {PREFIX}_FAULT_STALL_SECONDS   how long a stall lasts       (default 30)
+"""
+
+import asyncio
+import bisect
+import json
+import logging
+import math
+import os
+import random
+from dataclasses import dataclass, field, replace
+from pathlib import Path
+
+from shared.deadline import Deadline
+
+logger = logging.getLogger(__name__)
+
+KINDS = ("fixed", "uniform", "lognormal", "histogram", "off")
+
+
+class InjectedFault(Exception):
+    """A failure injected by the latency profile (FAULT_ERROR_RATE)."""
+
+
+@dataclass(frozen=True)
+class LatencyProfile:
+    kind: str = "fixed"
+    delay: float = 0.0
+    minimum: float = 0.0
+    maximum: float | None = None
+    sigma: float = 0.5
+    # histogram: (cumulative probability, seconds) points, or raw samples
+    quantiles: tuple[tuple[float, float], ...] = field(default=(), repr=False)
+    samples: tuple[float, ...] = field(default=(), repr=False)
+    scale: float = 1.0
+    seed: int | None = None
+    error_rate: float = 0.0
+    stall_rate: float = 0.0
+    stall_seconds: float = 30.0
+
+    def __post_init__(self) -> None:
+        if self.kind not in KINDS:
+            raise ValueError(f"unknown latency profile {self.kind!r} (expected one of {', '.join(KINDS)})")
+        if self.kind == "histogram" and not (self.quantiles or self.samples):
+            raise ValueError("histogram latency profile needs quantiles or samples")
+        if self.kind == "uniform" and (self.maximum is None or self.maximum < self.minimum):
+            raise ValueError("uniform latency profile needs LATENCY_MAX >= LATENCY_MIN")
+        for name in ("error_rate", "stall_rate"):
+            if not 0.0 <= getattr(self, name) <= 1.0:
+                raise ValueError(f"{name} must be between 0 and 1")
+
+    @classmethod
+    def off(cls) -> "LatencyProfile":
+        return cls(kind="off")
+
+    @property
+    def is_off(self) -> bool:
+        """True when steps never wait and never fail."""
+        silent = self.kind == "off" or (self.kind == "fixed" and self.delay <= 0)
+        return silent and not self.error_rate and not self.stall_rate
+
+    @classmethod
+    def from_env(cls, prefix: str, default: "LatencyProfile | None" = None) -> "LatencyProfile":
+        default = default or cls()
+
+        def env(name: str, fallback, cast=float):
+            value = os.getenv(f"{prefix}_{name}")
+            return fallback if value is None or value == "" else cast(value)
+
+        kind = env("LATENCY", default.kind, str).strip().lower()
+        delay = env("WORK_DELAY", default.delay)
+        quantiles, samples = default.quantiles, default.samples
+        source = os.getenv(f"{prefix}_LATENCY_HISTOGRAM")
+        if source:
+            quantiles, samples = load_histogram(source)
+        return replace(
+            default,
+            kind=kind,
+            delay=delay,
+            minimum=env("LATENCY_MIN", default.minimum),
+            maximum=env("LATENCY_MAX", default.maximum if kind != "uniform" else 2 * delay),
+            sigma=env("LATENCY_SIGMA", default.sigma),
+            quantiles=quantiles,
+            samples=samples,
+            scale=env("LATENCY_SCALE", default.scale),
+            seed=env("LATENCY_SEED", default.seed, int),
+            error_rate=env("FAULT_ERROR_RATE", default.error_rate),
+            stall_rate=env("FAULT_STALL_RATE", default.stall_rate),
+            stall_seconds=env("FAULT_STALL_SECONDS", default.stall_seconds),
+        )
+
+    def describe(self) -> str:
+        if self.kind == "off":
+            shape = "off"
+        elif self.kind == "fixed":
+            shape = f"fixed {self.delay:g}s"
+        elif self.kind == "uniform":
+            shape = f"uniform {self.minimum:g}-{self.maximum:g}s"
+        elif self.kind == "lognormal":
+            shape = f"lognormal median {self.delay:g}s sigma {self.sigma:g}"
+        else:
+            shape = f"histogram of {len(self.samples) or len(self.quantiles)} points"
+        if self.scale != 1.0:
+            shape += f" x{self.scale:g}"
+        if self.error_rate or self.stall_rate:
+            shape += (f", faults: {self.error_rate:.1%} errors, "
+                      f"{self.stall_rate:.1%} stalls of {self.stall_seconds:g}s")
+        return shape
+
+
+def load_histogram(source: str) -> tuple[tuple[tuple[float, float], ...], tuple[float, ...]]:
+    """
+    Read `path[#key.path]`: a latency summary dict (milliseconds) becomes
+    quantile points, a list of numbers (seconds) is kept as samples.
+    """
+    path, _, keys = source.partition("#")
+    data = json.loads(Path(path).read_text(encoding="utf-8"))
+    for key in filter(None, keys.split(".")):
+        data = data[key]
+    if isinstance(data, list):
+        samples = tuple(float(s) for s in data if isinstance(s, (int, float)) and s >= 0)
+        if not samples:
+            raise ValueError(f"{source}: no samples")
+        return (), samples
+    if not isinstance(data, dict):
+        raise ValueError(f"{source}: expected a latency summary or a list of samples")
+    points = {}
+    for name, value in data.items():
+        if value is None or not name.endswith("_ms"):
+            continue
+        label = name.removesuffix("_ms")
+        if label == "min":
+            points[0.0] = value / 1000.0
+        elif label == "max":
+            points[1.0] = value / 1000.0
+        elif label.startswith("p"):
+            try:
+                points[float(label[1:]) / 100.0] = value / 1000.0
+            except ValueError:
+                continue
+    if len(points) < 2:
+        raise ValueError(f"{source}: need at least two percentiles")
+    quantiles, highest = [], 0.0
+    for probability in sorted(points):
+        highest = max(highest, points[probability])  # bucketed summaries can dip
+        quantiles.append((probability, highest))
+    return tuple(quantiles), ()
+
+
+class SimulatedWork:
+    """Draws step latencies and faults from a LatencyProfile."""
+
+    def __init__(self, profile: LatencyProfile | None = None) -> None:
+        self.profile = profile or LatencyProfile.off()
+        self._random = random.Random(self.profile.seed)
+        self._probabilities = [p for p, _ in self.profile.quantiles]
+        self.steps = 0
+        self.errors = 0
+        self.stalls = 0
+        self.simulated_seconds = 0.0
+
+    def sample(self) -> float:
+        """One step's latency in seconds, without faults."""
+        profile = self.profile
+        if profile.kind == "off":
+            return 0.0
+        if profile.kind == "fixed":
+            seconds = profile.delay
+        elif profile.kind == "uniform":
+            seconds = self._random.uniform(profile.minimum, profile.maximum)
+        elif profile.kind == "lognormal":
+            if profile.delay <= 0:
+                return 0.0
+            seconds = self._random.lognormvariate(math.log(profile.delay), profile.sigma)
+        elif profile.samples:
+            seconds = self._random.choice(profile.samples)
+        else:
+            seconds = self._interpolate(self._random.random())
+        seconds *= profile.scale
+        if profile.maximum is not None:
+            seconds = min(seconds, profile.maximum * profile.scale)
+        return max(seconds, 0.0)
+
+    async def step(self, deadline: Deadline | None = None) -> None:
+        """
+        Spend one step's simulated latency; raises InjectedFault for an injected
+        error and DeadlineExceeded (via `deadline`) if a delay outlasts the budget.
+        """
+        self.steps += 1
+        if self.profile.is_off:
+            return
+        profile = self.profile
+        if profile.error_rate and self._random.random() < profile.error_rate:
+            self.errors += 1
+            raise InjectedFault(f"injected error (rate {profile.error_rate:g})")
+        seconds = self.sample()
+        if profile.stall_rate and self._random.random() < profile.stall_rate:
+            self.stalls += 1
+            seconds += profile.stall_seconds
+        if seconds <= 0:
+            return
+        self.simulated_seconds += seconds
+        if deadline is not None:
+            await deadline.sleep(seconds)
+        else:
+            await asyncio.sleep(seconds)
+
+    def metrics(self) -> dict:
+        return {
+            "profile": self.profile.describe(),
+            "steps": self.steps,
+            "injected_errors": self.errors,
+            "injected_stalls": self.stalls,
+            "simulated_seconds": round(self.simulated_seconds, 3),
+        }
+
+    # ── Internals ─────────────────────────────────────────────────────────────
+    def _interpolate(self, u: float) -> float:
+        """Inverse CDF, linear between the summary's percentile points."""
+        quantiles = self.profile.quantiles
+        index = bisect.bisect_left(self._probabilities, u)
+        if index == 0:
+            return quantiles[0][1]
+        if index >= len(quantiles):
+            return quantiles[-1][1]
+        (p0, s0), (p1, s1) = quantiles[index - 1], quantiles[index]
+        return s0 + (s1 - s0) * (u - p0) / (p1 - p0)
@@ -0,0 +1,286 @@
+"""
+shared/metrics.py
+=================
+Prometheus-style `/metrics` for every app in the mesh.
+
+Demonstrates:
+- Plain in-process counters, gauges and histograms (dict updates on the event
+  loop, no locks, no extra dependency) rendered in the Prometheus text format
+- A pure ASGI middleware counting HTTP requests, their latency and the SSE
+  events written to streaming responses
+- Wrapping an AgentExecutor to measure execute() duration, tasks in flight,
+  events enqueued (by type) and task-state transitions
+- Collectors: callables registered with `register_collector()` that build
+  extra families on every scrape from counters a component already keeps
+  (e.g. the orchestrator's single-flight groups and circuit breakers)
+
+Exported series:
+    a2a_http_requests_total{method,path,status}
+    a2a_http_request_duration_seconds{method,path}          (histogram)
+    a2a_sse_events_total{path}
+    a2a_execute_duration_seconds{outcome}                   (histogram)
+    a2a_tasks_in_flight
+    a2a_events_enqueued_total{type}
+    a2a_task_state_transitions_total{state}
+plus whatever the registered collectors return.
+
+Usage:
+    metrics = ServiceMetrics("flight_agent")
+    handler = DefaultRequestHandler(agent_executor=metrics.instrument(executor), ...)
+    app = A2AFastAPIApplication(...).build()
+    metrics.install(app)
+    metrics.register_collector(executor.collect_metrics)   # optional
+"""
+
+import bisect
+import time
+from collections.abc import Callable, Iterable
+
+from a2a.server.agent_execution import AgentExecutor, RequestContext
+from a2a.server.events import EventQueue
+from a2a.types import TaskStatusUpdateEvent
+from fastapi import FastAPI, Response
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: tuple[str, ...], values: tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(value)
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labelnames: Iterable[str] = ()) -> None:
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+
+    def header(self) -> list[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Iterable[str] = ()) -> None:
+        super().__init__(name, help, labelnames)
+        self.values: dict[tuple[str, ...], float] = {}
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        self.values[labels] = self.values.get(labels, 0.0) + amount
+
+    def render(self) -> list[str]:
+        return self.header() + [
+            f"{self.name}{_labels(self.labelnames, labels)} {_number(value)}"
+            for labels, value in sorted(self.values.items())
+        ]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, *labels: str, amount: float = 1.0) -> None:
+        self.inc(*labels, amount=-amount)
+
+    def set(self, *labels: str, value: float) -> None:
+        self.values[labels] = value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labelnames: Iterable[str] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ) -> None:
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [per-bucket counts..., +Inf count, sum]
+        self.values: dict[tuple[str, ...], list[float]] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        series = self.values.get(labels)
+        if series is None:
+            series = self.values[labels] = [0.0] * (len(self.buckets) + 2)
+        series[bisect.bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def render(self) -> list[str]:
+        lines = self.header()
+        for labels, series in sorted(self.values.items()):
+            cumulative = 0.0
+            for bound, count in zip((*self.buckets, float("inf")), series[:-1]):
+                cumulative += count
+                le = 'le="+Inf"' if bound == float("inf") else f'le="{_number(bound)}"'
+                lines.append(
+                    f"{self.name}_bucket{_labels(self.labelnames, labels, le)} {_number(cumulative)}"
+                )
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, labels)} {_number(series[-1])}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, labels)} {_number(cumulative)}")
+        return lines
+
+
+# Returns metric families built at scrape time, rendered after the built-in ones.
+Collector = Callable[[], Iterable[_Metric]]
+
+
+class _MetricsMiddleware:
+    """Pure ASGI middleware: request counts/latency and SSE events written."""
+
+    def __init__(self, app, metrics: "ServiceMetrics") -> None:
+        self.app = app
+        self.metrics = metrics
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        started = time.perf_counter()
+        status = 500
+        streaming = False
+
+        async def counting_send(message):
+            nonlocal status, streaming
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                for key, value in message.get("headers", ()):
+                    if key.lower() == b"content-type" and value.startswith(b"text/event-stream"):
+                        streaming = True
+            elif streaming and message["type"] == "http.response.body" and message.get("body"):
+                # Each SSE event is written as its own body chunk.
+                self.metrics.sse_events.inc(self._path(scope))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, counting_send)
+        finally:
+            path = self._path(scope)
+            self.metrics.http_requests.inc(scope["method"], path, str(status))
+            self.metrics.http_duration.observe(time.perf_counter() - started, scope["method"], path)
+
+    @staticmethod
+    def _path(scope) -> str:
+        # The matched route template keeps label cardinality bounded.
+        route = scope.get("route")
+        return getattr(route, "path", None) or "unmatched"
+
+
+class _CountingEventQueue:
+    """Proxy for EventQueue that counts events and task-state transitions."""
+
+    def __init__(self, queue: EventQueue, metrics: "ServiceMetrics") -> None:
+        self._queue = queue
+        self._metrics = metrics
+
+    async def enqueue_event(self, event) -> None:
+        self._metrics.events_enqueued.inc(type(event).__name__)
+        if isinstance(event, TaskStatusUpdateEvent):
+            self._metrics.task_states.inc(event.status.state.value)
+        await self._queue.enqueue_event(event)
+
+    def __getattr__(self, name: str):
+        return getattr(self._queue, name)
+
+
+class _InstrumentedExecutor(AgentExecutor):
+    """Delegates to the wrapped executor, timing execute() and counting its events."""
+
+    def __init__(self, executor: AgentExecutor, metrics: "ServiceMetrics") -> None:
+        self.executor = executor
+        self.metrics = metrics
+
+    async def execute(self, context: RequestContext, event_queue: EventQueue) -> None:
+        self.metrics.in_flight.inc()
+        started = time.perf_counter()
+        outcome = "error"
+        try:
+            await self.executor.execute(context, _CountingEventQueue(event_queue, self.metrics))
+            outcome = "ok"
+        except BaseException as exc:
+            if not isinstance(exc, Exception):
+                outcome = "cancelled"
+            raise
+        finally:
+            self.metrics.in_flight.dec()
+            self.metrics.execute_duration.observe(time.perf_counter() - started, outcome)
+
+    async def cancel(self, context: RequestContext, event_queue: EventQueue) -> None:
+        await self.executor.cancel(context, _CountingEventQueue(event_queue, self.metrics))
+
+
+class ServiceMetrics:
+    """The metric families for one app, plus helpers to wire them in."""
+
+    def __init__(self, service: str) -> None:
+        self.service = service
+        self.http_requests = Counter(
+            "a2a_http_requests_total", "HTTP requests handled.", ("method", "path", "status")
+        )
+        self.http_duration = Histogram(
+            "a2a_http_request_duration_seconds",
+            "HTTP request latency (until the response body is complete).",
+            ("method", "path"),
+        )
+        self.sse_events = Counter("a2a_sse_events_total", "SSE events written.", ("path",))
+        self.execute_duration = Histogram(
+            "a2a_execute_duration_seconds", "AgentExecutor.execute() duration.", ("outcome",)
+        )
+        self.in_flight = Gauge("a2a_tasks_in_flight", "execute() calls currently running.")
+        self.in_flight.set(value=0)
+        self.events_enqueued = Counter(
+            "a2a_events_enqueued_total", "Events enqueued by the executor.", ("type",)
+        )
+        self.task_states = Counter(
+            "a2a_task_state_transitions_total", "Task status updates by new state.", ("state",)
+        )
+        self.families: list[_Metric] = [
+            self.http_requests,
+            self.http_duration,
+            self.sse_events,
+            self.execute_duration,
+            self.in_flight,
+            self.events_enqueued,
+            self.task_states,
+        ]
+        self.collectors: list[Collector] = []
+
+    def instrument(self, executor: AgentExecutor) -> AgentExecutor:
+        return _InstrumentedExecutor(executor, self)
+
+    def install(self, app: FastAPI, path: str = "/metrics") -> None:
+        """Add the request-counting middleware and the `path` endpoint to `app`."""
+        app.add_middleware(_MetricsMiddleware, metrics=self)
+
+        async def metrics_endpoint() -> Response:
+            return Response(content=self.render(), media_type=CONTENT_TYPE)
+
+        app.add_api_route(path, metrics_endpoint, methods=["GET"], include_in_schema=False)
+
+    def register_collector(self, collector: Collector) -> None:
+        """Render the families `collector()` returns on every scrape."""
+        self.collectors.append(collector)
+
+    def render(self) -> str:
+        lines: list[str] = []
+        for family in self.families:
+            lines.extend(family.render())
+        for collector in self.collectors:
+            for family in collector():
+                lines.extend(family.render())
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,127 @@
+"""
+shared/recording.py
+===================
+Record incoming A2A JSON-RPC requests to a JSONL file for later replay
+(see benchmarks/replay.py).
+
+Demonstrates:
+- A pure ASGI middleware that tees the request body as the app reads it, so
+  recording never buffers or delays the request
+- Capturing the task / context id from the start of the response (JSON or
+  the first SSE event), so a replay can map follow-up `tasks/get`,
+  `tasks/cancel` and multi-turn messages onto the tasks it creates
+- Never recording credentials: headers are not stored at all; the replay
+  tool supplies each target's own auth
+
+Each line looks like:
+    {"ts": 1760000000.123, "target": "flight", "url": "http://localhost:8001/",
+     "request": {"jsonrpc": "2.0", "method": "message/stream", ...},
+     "status": 200, "duration_ms": 1512.3, "task_id": "...", "context_id": "..."}
+
+Configuration (environment variables, all optional):
+    A2A_RECORD_FILE   append requests to this file (unset: recording off)
+"""
+
+import json
+import logging
+import os
+import time
+from typing import IO
+
+from fastapi import FastAPI
+
+logger = logging.getLogger(__name__)
+
+_MAX_CAPTURE = 256 * 1024  # bytes of request / response start kept for parsing
+
+
+def _ids(head: bytes) -> tuple[str | None, str | None]:
+    """Task and context id from the first JSON object (or SSE event) of a response."""
+    for line in head.split(b"\n"):
+        line = line.strip()
+        if line.startswith(b"data:"):
+            line = line[5:].strip()
+        if not line.startswith(b"{"):
+            continue
+        try:
+            result = json.loads(line).get("result")
+        except ValueError:
+            return None, None  # larger than what was captured
+        if not isinstance(result, dict):
+            return None, None
+        task_id = result.get("taskId") or (result.get("id") if result.get("kind") == "task" else None)
+        return task_id, result.get("contextId")
+    return None, None
+
+
+class _RecordingMiddleware:
+    def __init__(self, app, target: str, file: IO[str]) -> None:
+        self.app = app
+        self.target = target
+        self.file = file
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "POST":
+            await self.app(scope, receive, send)
+            return
+        started = time.perf_counter()
+        wall = time.time()
+        body = bytearray()
+        head = bytearray()
+        status = 500
+
+        async def tee_receive():
+            message = await receive()
+            if message["type"] == "http.request" and len(body) < _MAX_CAPTURE:
+                body.extend(message.get("body", b""))
+            return message
+
+        async def tee_send(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body" and len(head) < _MAX_CAPTURE:
+                head.extend(message.get("body", b"")[:_MAX_CAPTURE])
+            await send(message)
+
+        try:
+            await self.app(scope, tee_receive, tee_send)
+        finally:
+            self._write(scope, bytes(body), bytes(head), status, wall, started)
+
+    def _write(self, scope, body: bytes, head: bytes, status: int, wall: float, started: float) -> None:
+        try:
+            request = json.loads(body)
+        except ValueError:
+            return  # not JSON-RPC
+        if not isinstance(request, dict) or "method" not in request:
+            return
+        host = dict(scope.get("headers", ())).get(b"host", b"localhost").decode()
+        task_id, context_id = _ids(head)
+        record = {
+            "ts": round(wall, 6),
+            "target": self.target,
+            "url": f"{scope.get('scheme', 'http')}://{host}{scope['path']}",
+            "request": request,
+            "status": status,
+            "duration_ms": round((time.perf_counter() - started) * 1000, 3),
+            "task_id": task_id,
+            "context_id": context_id,
+        }
+        try:
+            self.file.write(json.dumps(record, separators=(",", ":")) + "\n")
+        except OSError as exc:
+            logger.warning("Could not record request: %s", exc)
+
+
+def record_requests(app: FastAPI, target: str, path: str | None = None) -> None:
+    """
+    Append every JSON-RPC request `app` receives to `path` (default:
+    $A2A_RECORD_FILE). Does nothing when no file is configured.
+    """
+    path = path or os.getenv("A2A_RECORD_FILE")
+    if not path:
+        return
+    file = open(path, "a", encoding="utf-8", buffering=1)
+    app.add_middleware(_RecordingMiddleware, target=target, file=file)
+    logger.info("Recording %s requests to %s", target, path)
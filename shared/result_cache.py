@@ -0,0 +1,148 @@
+"""
+shared/result_cache.py
+======================
+LRU + TTL cache for downstream agent results (orchestrator).
+
+Demonstrates:
+- Caching each agent's sub-result separately under a normalized key
+  (destination + dates), so a repeated "Plan a trip to Paris" skips the
+  network entirely
+- A TTL per namespace: weather changes slowly, flight inventory quickly
+- Bounding memory in bytes (JSON-encoded size of each value) rather than by
+  entry count; least recently used entries are evicted first
+- Hit / miss / eviction / expiration counters via `metrics()`
+
+Configuration (environment variables, all optional):
+    A2A_RESULT_CACHE_MAX_BYTES   default 8388608 (8 MiB; 0 disables the cache)
+    A2A_RESULT_CACHE_TTL_FLIGHT  default 60   (seconds)
+    A2A_RESULT_CACHE_TTL_HOTEL   default 300  (seconds)
+    A2A_RESULT_CACHE_TTL_WEATHER default 1800 (seconds)
+"""
+
+import json
+import logging
+import os
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TTLS = {"flight": 60.0, "hotel": 300.0, "weather": 1800.0}
+
+
+def normalize_key(destination: str, *dates: str | None) -> str:
+    """Cache key for a destination and optional date parameters."""
+    parts = [" ".join(destination.split()).casefold()]
+    parts.extend((d or "").strip() for d in dates)
+    return "|".join(parts)
+
+
+@dataclass
+class _ResultEntry:
+    value: Any
+    size: int
+    expires_at: float
+
+
+@dataclass
+class ResultCacheStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    expirations: int = 0
+
+    def as_dict(self) -> dict:
+        return dict(self.__dict__)
+
+
+class ResultCache:
+    """Byte-bounded LRU cache with a TTL per namespace (one namespace per agent)."""
+
+    def __init__(
+        self,
+        max_bytes: int = 8 * 1024 * 1024,
+        ttls: dict[str, float] | None = None,
+        default_ttl: float = 60.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.max_bytes = max_bytes
+        self.ttls = {**DEFAULT_TTLS, **(ttls or {})}
+        self.default_ttl = default_ttl
+        self.stats = ResultCacheStats()
+        self.size_bytes = 0
+        self._clock = clock
+        self._entries: OrderedDict[tuple[str, str], _ResultEntry] = OrderedDict()
+
+    @classmethod
+    def from_env(cls) -> "ResultCache":
+        return cls(
+            max_bytes=int(os.getenv("A2A_RESULT_CACHE_MAX_BYTES", str(8 * 1024 * 1024))),
+            ttls={
+                name: float(os.getenv(f"A2A_RESULT_CACHE_TTL_{name.upper()}", ttl))
+                for name, ttl in DEFAULT_TTLS.items()
+            },
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    def get(self, namespace: str, key: str) -> Any | None:
+        """Return the cached value, or None on a miss or an expired entry."""
+        if not self.enabled:
+            return None
+        entry = self._entries.get((namespace, key))
+        if entry is None:
+            self.stats.misses += 1
+            return None
+        if self._clock() >= entry.expires_at:
+            self._remove((namespace, key))
+            self.stats.expirations += 1
+            self.stats.misses += 1
+            return None
+        self._entries.move_to_end((namespace, key))
+        self.stats.hits += 1
+        return entry.value
+
+    def put(self, namespace: str, key: str, value: Any, ttl: float | None = None) -> bool:
+        """Store `value`; returns False if it alone exceeds the byte budget."""
+        if not self.enabled:
+            return False
+        size = len(json.dumps(value, default=str, separators=(",", ":")).encode("utf-8"))
+        if size > self.max_bytes:
+            logger.info("Not caching %s result for %r: %d bytes exceeds budget", namespace, key, size)
+            return False
+        if ttl is None:
+            ttl = self.ttls.get(namespace, self.default_ttl)
+        self._remove((namespace, key))
+        self._entries[(namespace, key)] = _ResultEntry(value, size, self._clock() + ttl)
+        self.size_bytes += size
+        while self.size_bytes > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.stats.evictions += 1
+        return True
+
+    def invalidate(self, namespace: str, key: str) -> None:
+        self._remove((namespace, key))
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.size_bytes = 0
+
+    def metrics(self) -> dict:
+        return {
+            **self.stats.as_dict(),
+            "entries": len(self._entries),
+            "size_bytes": self.size_bytes,
+            "max_bytes": self.max_bytes,
+        }
+
+    # ── Internals ─────────────────────────────────────────────────────────────
+    def _remove(self, key: tuple[str, str]) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.size_bytes -= entry.size
@@ -0,0 +1,157 @@
+"""
+shared/single_flight.py
+=======================
+Request coalescing ("single-flight") for identical concurrent downstream calls.
+
+Demonstrates:
+- Collapsing N concurrent calls with the same key into one in-flight call
+- Fanning the results out to every waiter as they are produced: items are
+  buffered, so a caller that joins late first replays what was already
+  received, then follows the live call
+- Delivering the same result or error to every waiter
+- Per-waiter deadlines: each waiter stops waiting at its own deadline, while
+  the shared call runs under a deadline extended to the latest of its
+  waiters' (an unbounded waiter makes it unbounded)
+- Reference counting: the shared call is cancelled only when the last waiter
+  goes away, so one caller timing out does not break the others
+
+Only calls that overlap in time are coalesced; once a call finishes its key is
+released (results that should outlive the call belong in shared/result_cache.py).
+
+Wrap the whole downstream call, including its concurrency slot and circuit
+breaker, so that N coalesced callers take one slot and record one outcome.
+
+Usage:
+    group = SingleFlight("hotel")
+    hotels = await group.call(
+        "Hotels in Paris",
+        lambda publish, deadline: fetch_hotels("Paris", publish, deadline),
+        on_item=show_hotel,
+        deadline=deadline,
+    )
+"""
+
+import asyncio
+import logging
+from collections.abc import Awaitable, Callable
+from typing import Generic, TypeVar
+
+from shared.deadline import Deadline
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+# Receives each item of the shared call as soon as it is produced.
+Publish = Callable[[T], Awaitable[None]]
+
+
+class _Flight(Generic[T]):
+    """One shared in-flight call and the items it has produced so far."""
+
+    def __init__(self, deadline: Deadline) -> None:
+        self.items: list[T] = []
+        self.deadline = Deadline(deadline.expires_at)
+        self.waiters = 0
+        self.task: asyncio.Task | None = None
+        self.changed = asyncio.Event()
+
+    async def publish(self, item: T) -> None:
+        self.items.append(item)
+        self.notify()
+
+    def notify(self, *_args) -> None:
+        changed, self.changed = self.changed, asyncio.Event()
+        changed.set()
+
+    def join(self, deadline: Deadline) -> None:
+        """Extend the shared deadline to cover a new waiter's."""
+        if self.deadline.expires_at is None:
+            return
+        if deadline.expires_at is None:
+            self.deadline.expires_at = None
+        else:
+            self.deadline.expires_at = max(self.deadline.expires_at, deadline.expires_at)
+
+    async def follow(self, on_item: Publish | None) -> None:
+        """Replay the items received so far, then follow the live call until it finishes."""
+        index = 0
+        while True:
+            changed = self.changed
+            while index < len(self.items):
+                item = self.items[index]
+                index += 1
+                if on_item is not None:
+                    await on_item(item)
+            if self.task.done():
+                return
+            await changed.wait()
+
+
+class SingleFlight:
+    """Coalesces concurrent calls with the same key into one underlying call."""
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.calls = 0
+        self.coalesced = 0
+        self._inflight: dict[str, _Flight] = {}
+
+    def metrics(self) -> dict:
+        return {
+            "calls": self.calls,
+            "coalesced": self.coalesced,
+            "inflight": len(self._inflight),
+        }
+
+    async def call(
+        self,
+        key: str,
+        factory: Callable[[Publish, Deadline], Awaitable[R]],
+        on_item: Publish | None = None,
+        deadline: Deadline | None = None,
+    ) -> R:
+        """
+        Await the in-flight call for `key`, starting one if needed, and pass
+        each item it produces to `on_item`.
+
+        `factory(publish, shared_deadline)` starts the shared call, which
+        hands every item to `publish`. Raises TimeoutError once this waiter's
+        own `deadline` runs out; the shared call carries on for the others.
+        """
+        deadline = deadline or Deadline()
+        flight = self._inflight.get(key)
+        if flight is None:
+            flight = _Flight(deadline)
+            self._inflight[key] = flight
+            self.calls += 1
+            flight.task = asyncio.create_task(factory(flight.publish, flight.deadline))
+            flight.task.add_done_callback(lambda task: self._finished(key, flight, task))
+            flight.task.add_done_callback(flight.notify)
+        else:
+            self.coalesced += 1
+            flight.join(deadline)
+            logger.info("Coalescing %s call %r with one already in flight", self.name, key)
+
+        flight.waiters += 1
+        try:
+            await asyncio.wait_for(flight.follow(on_item), deadline.remaining())
+            return flight.task.result()
+        finally:
+            flight.waiters -= 1
+            if flight.waiters == 0 and not flight.task.done():
+                # Nobody is left to receive the results.
+                self._release(key, flight)
+                flight.task.cancel()
+
+    def _finished(self, key: str, flight: _Flight, task: asyncio.Task) -> None:
+        self._release(key, flight)
+        if not task.cancelled():
+            # Mark the error retrieved: the last waiter may have timed out
+            # just as the call failed, leaving nobody to read it.
+            task.exception()
+
+    def _release(self, key: str, flight: _Flight) -> None:
+        if self._inflight.get(key) is flight:
+            del self._inflight[key]
@@ -0,0 +1,302 @@
+"""
+shared/tracing.py
+=================
+Lightweight distributed tracing across the agent mesh.
+
+Demonstrates:
+- W3C Trace Context: the orchestrator starts a trace per plan and forwards it
+  on every downstream A2A call in the `traceparent` header
+- Each agent's executor continuing that trace, so one trace id ties the
+  orchestrator's spans to the flight, hotel, weather and booking agents' spans
+- Spans with attributes and timed events (e.g. "first_chunk", "last_chunk")
+- The current span carried in a ContextVar, so asyncio tasks spawned inside a
+  span (parallel fan-out, workflow steps) become its children automatically
+- Exporting finished spans to an in-memory collector (browsable at
+  GET /traces) or a JSON-lines file — no tracing backend required
+
+Async generators are resumed from whichever task iterates them (see
+shared/hedging.py), so they must not switch the current span: they use
+`span(..., activate=False)` and pass the span to `inject()` explicitly.
+
+Configuration (environment variables, all optional):
+    A2A_TRACE_EXPORT     memory (default), file or off
+    A2A_TRACE_FILE       default traces.jsonl (when A2A_TRACE_EXPORT=file)
+    A2A_TRACE_MAX_SPANS  default 10000 (spans kept by the in-memory collector)
+
+Usage:
+    tracer = Tracer.from_env("orchestrator")
+    with tracer.span("discover", agents=4):
+        ...
+    headers = inject({})   # {"traceparent": "00-<trace>-<span>-01"}
+    tracer.close()         # from the app's lifespan, on shutdown
+"""
+
+import json
+import logging
+import os
+import re
+import secrets
+import time
+from collections import deque
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any
+
+from a2a.server.agent_execution import AgentExecutor, RequestContext
+from a2a.server.events import EventQueue
+from a2a.types import TaskArtifactUpdateEvent, TaskStatusUpdateEvent
+from fastapi import FastAPI
+
+logger = logging.getLogger(__name__)
+
+TRACEPARENT_HEADER = "traceparent"
+_TRACEPARENT = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-[0-9a-f]{2}$")
+
+_current: ContextVar["Span | None"] = ContextVar("a2a_current_span", default=None)
+
+
+@dataclass
+class Span:
+    name: str
+    service: str
+    trace_id: str
+    span_id: str
+    parent_id: str | None = None
+    start: float = field(default_factory=time.time)
+    duration: float | None = None
+    status: str = "ok"
+    attributes: dict[str, Any] = field(default_factory=dict)
+    events: list[dict] = field(default_factory=list)
+    _started: float = field(default_factory=time.perf_counter, repr=False)
+
+    def set(self, **attributes: Any) -> None:
+        self.attributes.update(attributes)
+
+    def event(self, name: str, **attributes: Any) -> None:
+        """Record a point in time, as milliseconds since the span started."""
+        offset = round((time.perf_counter() - self._started) * 1000, 3)
+        self.events.append({"name": name, "offset_ms": offset, **attributes})
+
+    def traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-01"
+
+    def as_dict(self) -> dict:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "service": self.service,
+            "name": self.name,
+            "start": self.start,
+            "duration_ms": None if self.duration is None else round(self.duration * 1000, 3),
+            "status": self.status,
+            "attributes": self.attributes,
+            "events": self.events,
+        }
+
+
+def current_span() -> Span | None:
+    return _current.get()
+
+
+def inject(headers: dict[str, str], span: Span | None = None) -> dict[str, str]:
+    """Add the `traceparent` of `span` (default: the current span) to `headers`."""
+    span = span or _current.get()
+    if span is not None:
+        headers[TRACEPARENT_HEADER] = span.traceparent()
+    return headers
+
+
+def parse_traceparent(value: str | None) -> tuple[str, str] | None:
+    """(trace_id, parent span_id) from a traceparent header, or None if absent/invalid."""
+    match = _TRACEPARENT.match((value or "").strip().lower())
+    return (match.group(1), match.group(2)) if match else None
+
+
+def traceparent_from_context(context: RequestContext) -> str | None:
+    if context.call_context is None:
+        return None
+    return context.call_context.state.get("headers", {}).get(TRACEPARENT_HEADER)
+
+
+# ── Exporters ─────────────────────────────────────────────────────────────────
+class InMemoryExporter:
+    """Keeps the most recent `max_spans` finished spans."""
+
+    def __init__(self, max_spans: int = 10_000) -> None:
+        self._spans: deque[Span] = deque(maxlen=max_spans)
+
+    def export(self, span: Span) -> None:
+        self._spans.append(span)
+
+    def spans(self, trace_id: str | None = None) -> list[dict]:
+        return [s.as_dict() for s in self._spans if trace_id is None or s.trace_id == trace_id]
+
+    def clear(self) -> None:
+        self._spans.clear()
+
+    def close(self) -> None:
+        pass
+
+
+class FileExporter:
+    """
+    Appends each finished span to `path` as one JSON line. close() flushes and
+    closes the file; a span finished after that reopens it.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._file = None
+
+    def export(self, span: Span) -> None:
+        if self._file is None:
+            self._file = open(self.path, "a", encoding="utf-8", buffering=1)
+        self._file.write(json.dumps(span.as_dict(), default=str) + "\n")
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class NullExporter:
+    def export(self, span: Span) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+
+# ── Tracer ────────────────────────────────────────────────────────────────────
+class Tracer:
+    """Creates spans for one service and hands finished spans to its exporter."""
+
+    def __init__(self, service: str, exporter=None) -> None:
+        self.service = service
+        self.exporter = exporter if exporter is not None else InMemoryExporter()
+
+    @classmethod
+    def from_env(cls, service: str) -> "Tracer":
+        mode = os.getenv("A2A_TRACE_EXPORT", "memory").lower()
+        if mode == "off":
+            exporter = NullExporter()
+        elif mode == "file":
+            exporter = FileExporter(os.getenv("A2A_TRACE_FILE", "traces.jsonl"))
+        else:
+            exporter = InMemoryExporter(int(os.getenv("A2A_TRACE_MAX_SPANS", "10000")))
+        return cls(service, exporter)
+
+    def start_span(self, name: str, parent: Span | str | None = None, **attributes: Any) -> Span:
+        """
+        A new span that is *not* made current. `parent` is a Span, a traceparent
+        header value, or None for the current span (a new trace if there is none).
+        """
+        if parent is None:
+            parent = _current.get()
+        if isinstance(parent, Span):
+            trace_id, parent_id = parent.trace_id, parent.span_id
+        elif (remote := parse_traceparent(parent)) is not None:
+            trace_id, parent_id = remote
+        else:
+            trace_id, parent_id = secrets.token_hex(16), None
+        return Span(name, self.service, trace_id, secrets.token_hex(8), parent_id,
+                     attributes=dict(attributes))
+
+    def finish(self, span: Span, error: BaseException | None = None) -> None:
+        span.duration = time.perf_counter() - span._started
+        if error is not None:
+            span.status = "error" if isinstance(error, Exception) else "cancelled"
+            span.set(error=str(error) or type(error).__name__)
+        self.exporter.export(span)
+
+    def close(self) -> None:
+        """Flush and release the exporter; call from the owning app's shutdown."""
+        self.exporter.close()
+
+    @contextmanager
+    def span(
+        self,
+        name: str,
+        parent: Span | str | None = None,
+        activate: bool = True,
+        **attributes: Any,
+    ) -> Iterator[Span]:
+        """
+        Time the block as a new span; errors mark it and propagate. With
+        `activate`, the span is the current span (and default parent) inside
+        the block.
+        """
+        span = self.start_span(name, parent, **attributes)
+        token = _current.set(span) if activate else None
+        try:
+            yield span
+        except BaseException as exc:
+            self.finish(span, exc)
+            raise
+        else:
+            self.finish(span)
+        finally:
+            if token is not None:
+                _current.reset(token)
+
+    def instrument(self, executor: AgentExecutor) -> AgentExecutor:
+        """Wrap `executor` so each execute() continues the caller's trace."""
+        return _TracedExecutor(executor, self)
+
+    def install(self, app: FastAPI, path: str = "/traces") -> None:
+        """Serve the in-memory collector's spans (optionally ?trace_id=...) at `path`."""
+        exporter = self.exporter
+        if not isinstance(exporter, InMemoryExporter):
+            return
+
+        async def traces_endpoint(trace_id: str | None = None) -> dict:
+            spans = exporter.spans(trace_id)
+            return {"service": self.service, "count": len(spans), "spans": spans}
+
+        app.add_api_route(path, traces_endpoint, methods=["GET"], include_in_schema=False)
+
+
+# ── Internals ─────────────────────────────────────────────────────────────────
+class _TracingEventQueue:
+    """Proxy for EventQueue that marks the first and last artifact chunk on a span."""
+
+    def __init__(self, queue: EventQueue, span: Span) -> None:
+        self._queue = queue
+        self._span = span
+        self._chunks = 0
+
+    async def enqueue_event(self, event) -> None:
+        if isinstance(event, TaskArtifactUpdateEvent):
+            self._chunks += 1
+            if self._chunks == 1:
+                self._span.event("first_chunk")
+            if event.last_chunk:
+                self._span.event("last_chunk", chunks=self._chunks)
+        elif isinstance(event, TaskStatusUpdateEvent):
+            self._span.event(f"state:{event.status.state.value}")
+        await self._queue.enqueue_event(event)
+
+    def __getattr__(self, name: str):
+        return getattr(self._queue, name)
+
+
+class _TracedExecutor(AgentExecutor):
+    def __init__(self, executor: AgentExecutor, tracer: Tracer) -> None:
+        self.executor = executor
+        self.tracer = tracer
+
+    async def execute(self, context: RequestContext, event_queue: EventQueue) -> None:
+        with self.tracer.span(
+            "execute",
+            traceparent_from_context(context),
+            task_id=context.task_id,
+            context_id=context.context_id,
+        ) as span:
+            await self.executor.execute(context, _TracingEventQueue(event_queue, span))
+
+    async def cancel(self, context: RequestContext, event_queue: EventQueue) -> None:
+        with self.tracer.span("cancel", traceparent_from_context(context), task_id=context.task_id):
+            await self.executor.cancel(context, event_queue)
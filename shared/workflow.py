@@ -0,0 +1,225 @@
+"""
+shared/workflow.py
+==================
+A small declarative DAG engine for orchestration workflows (Section 11).
+
+Demonstrates:
+- Declaring steps and their data dependencies instead of hand-coding the
+  order of awaits
+- Maximal concurrency: every step starts as soon as all of its inputs are
+  ready, independent steps run in parallel
+- Per-step timeouts and retries (exponential backoff)
+- Per-step timing and outcome (`StepResult`) reported as each step finishes
+- Skipping a step whose dependency did not succeed
+- Degraded steps: a step that finished without a usable result for a reason
+  a retry cannot fix raises StepDegraded and is not retried
+- Steps with nothing to do (e.g. an optional action that was not requested)
+  raise StepSkipped and are reported as skipped rather than ok
+
+A step's `run` coroutine receives a dict mapping each dependency's name to
+its value. Raising (or timing out) marks an attempt as failed; the step is
+retried up to `retries` times. Raising StepDegraded marks the step degraded
+at once, keeping the value it carries; raising StepSkipped marks it skipped.
+
+Usage:
+    workflow = Workflow([
+        Step("discover", discover),
+        Step("flight", flight, after=("discover",), timeout=30, retries=1),
+        Step("booking", booking, after=("flight",)),
+    ])
+    results = await workflow.run(on_step=log_step)
+"""
+
+import asyncio
+import logging
+import time
+from collections.abc import Awaitable, Callable, Sequence
+from dataclasses import dataclass
+from enum import Enum
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+
+class WorkflowError(Exception):
+    """The declared steps do not form a valid DAG."""
+
+
+class StepDegraded(Exception):
+    """Raised by a step whose result is unusable for a reason a retry would not fix."""
+
+    def __init__(self, reason: str, value: Any = None) -> None:
+        super().__init__(reason)
+        self.value = value
+
+
+class StepSkipped(Exception):
+    """Raised by a step that found nothing to do; steps that depend on it are skipped too."""
+
+
+class StepStatus(str, Enum):
+    ok = "ok"
+    failed = "failed"
+    timeout = "timeout"
+    skipped = "skipped"
+    degraded = "degraded"
+
+
+@dataclass(frozen=True)
+class Step:
+    name: str
+    run: Callable[[dict[str, Any]], Awaitable[Any]]
+    after: tuple[str, ...] = ()
+    timeout: float | None = None
+    retries: int = 0
+    backoff: float = 0.1
+
+
+@dataclass
+class StepResult:
+    name: str
+    status: StepStatus
+    value: Any = None
+    error: str | None = None
+    attempts: int = 0
+    started_at: float = 0.0  # seconds since the workflow started
+    duration: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return self.status is StepStatus.ok
+
+    def as_dict(self) -> dict:
+        return {
+            "status": self.status.value,
+            "attempts": self.attempts,
+            "started_ms": round(self.started_at * 1000),
+            "duration_ms": round(self.duration * 1000),
+            "error": self.error,
+        }
+
+
+class Workflow:
+    """A validated set of steps, runnable any number of times."""
+
+    def __init__(self, steps: Sequence[Step]) -> None:
+        self.steps = list(steps)
+        self._validate()
+
+    async def run(
+        self, on_step: Callable[[StepResult], Awaitable[None]] | None = None
+    ) -> dict[str, StepResult]:
+        """Execute the DAG; `on_step` is awaited once per step as it finishes."""
+        started = time.monotonic()
+        results: dict[str, StepResult] = {}
+        waiting = list(self.steps)
+        running: dict[asyncio.Task, Step] = {}
+
+        async def finish(result: StepResult) -> None:
+            results[result.name] = result
+            if on_step is not None:
+                await on_step(result)
+
+        try:
+            while waiting or running:
+                # Start (or skip) every step whose dependencies have all finished.
+                progressed = True
+                while progressed:
+                    progressed = False
+                    for step in list(waiting):
+                        if not all(dep in results for dep in step.after):
+                            continue
+                        waiting.remove(step)
+                        progressed = True
+                        failed_deps = [dep for dep in step.after if not results[dep].ok]
+                        if failed_deps:
+                            await finish(StepResult(
+                                step.name,
+                                StepStatus.skipped,
+                                error=f"dependency not satisfied: {', '.join(failed_deps)}",
+                                started_at=time.monotonic() - started,
+                            ))
+                            continue
+                        inputs = {dep: results[dep].value for dep in step.after}
+                        running[asyncio.create_task(self._run_step(step, inputs, started))] = step
+
+                if not running:
+                    break
+                done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    running.pop(task)
+                    await finish(task.result())
+        finally:
+            for task in running:
+                task.cancel()
+            await asyncio.gather(*running, return_exceptions=True)
+        return results
+
+    # ── Internals ─────────────────────────────────────────────────────────────
+    async def _run_step(self, step: Step, inputs: dict[str, Any], origin: float) -> StepResult:
+        begun = time.monotonic()
+        status, error = StepStatus.failed, None
+        for attempt in range(1, step.retries + 2):
+            try:
+                value = await asyncio.wait_for(step.run(inputs), step.timeout)
+            except TimeoutError:
+                status, error = StepStatus.timeout, f"timed out after {step.timeout:g}s"
+            except StepDegraded as exc:
+                logger.warning("Step '%s' degraded: %s", step.name, exc)
+                return StepResult(
+                    step.name, StepStatus.degraded, exc.value,
+                    error=str(exc),
+                    attempts=attempt,
+                    started_at=begun - origin,
+                    duration=time.monotonic() - begun,
+                )
+            except StepSkipped as exc:
+                return StepResult(
+                    step.name, StepStatus.skipped,
+                    error=str(exc) or None,
+                    attempts=attempt,
+                    started_at=begun - origin,
+                    duration=time.monotonic() - begun,
+                )
+            except Exception as exc:
+                status, error = StepStatus.failed, str(exc) or type(exc).__name__
+            else:
+                return StepResult(
+                    step.name, StepStatus.ok, value,
+                    attempts=attempt,
+                    started_at=begun - origin,
+                    duration=time.monotonic() - begun,
+                )
+            logger.warning(
+                "Step '%s' attempt %d/%d %s: %s",
+                step.name, attempt, step.retries + 1, status.value, error,
+            )
+            if attempt <= step.retries:
+                await asyncio.sleep(step.backoff * 2 ** (attempt - 1))
+        return StepResult(
+            step.name, status,
+            error=error,
+            attempts=step.retries + 1,
+            started_at=begun - origin,
+            duration=time.monotonic() - begun,
+        )
+
+    def _validate(self) -> None:
+        names = [step.name for step in self.steps]
+        duplicates = {name for name in names if names.count(name) > 1}
+        if duplicates:
+            raise WorkflowError(f"duplicate step names: {', '.join(sorted(duplicates))}")
+        for step in self.steps:
+            unknown = [dep for dep in step.after if dep not in names]
+            if unknown:
+                raise WorkflowError(f"step '{step.name}' depends on unknown {', '.join(unknown)}")
+        # Kahn's algorithm: every step must become ready eventually.
+        resolved: set[str] = set()
+        remaining = list(self.steps)
+        while remaining:
+            ready = [step for step in remaining if set(step.after) <= resolved]
+            if not ready:
+                cycle = ", ".join(step.name for step in remaining)
+                raise WorkflowError(f"dependency cycle among: {cycle}")
+            resolved.update(step.name for step in ready)
+            remaining = [step for step in remaining if step.name not in resolved]